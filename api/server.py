@@ -11,7 +11,7 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from loguru import logger
 
@@ -19,6 +19,7 @@ from config.settings import settings
 from crawler.main import AINewsCrawler
 from crawler.content_processor import ContentProcessor
 from crawler.news_sources import NewsSources
+from feishu.http_pool import start_http_client, close_http_client, get_pool_stats
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -52,6 +53,7 @@ class ProcessRequest(BaseModel):
     """内容处理请求模型"""
     articles: List[Dict[str, Any]]
     enhancement_type: Optional[str] = "summary"
+    use_cache: Optional[bool] = True  # 需要重新生成时传入false
 
  
 
@@ -69,6 +71,7 @@ async def startup_event():
     
     try:
         # 初始化组件
+        await start_http_client()
         crawler_instance = AINewsCrawler()
         await crawler_instance.init_crawler()
         
@@ -88,7 +91,8 @@ async def shutdown_event():
     
     if crawler_instance:
         await crawler_instance.cleanup()
-        logger.info("API服务已关闭")
+    await close_http_client()
+    logger.info("API服务已关闭")
 
 @app.get("/")
 async def root():
@@ -157,7 +161,9 @@ async def process_content(request: ProcessRequest):
             raise HTTPException(status_code=500, detail="内容处理器未初始化")
         
         # 处理文章
-        processed_content = await content_processor.process_articles(request.articles)
+        processed_content = await content_processor.process_articles(
+            request.articles, use_cache=request.use_cache is not False
+        )
         
         return {
             "success": True,
@@ -170,6 +176,53 @@ async def process_content(request: ProcessRequest):
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/process/stream")
+async def process_content_stream(request: ProcessRequest):
+    """流式处理早报内容
+    
+    返回NDJSON，每行一个事件，第一行channel为status立即返回，channel为map的事件是分组概括进度，
+    channel为summary/trends/image_prompts的事件携带生成中的文本片段，
+    最后一行channel为done，包含完整的处理结果
+    """
+    if not content_processor:
+        raise HTTPException(status_code=500, detail="内容处理器未初始化")
+    
+    async def event_stream():
+        try:
+            async for event in content_processor.stream_articles(
+                request.articles, use_cache=request.use_cache is not False
+            ):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"流式处理内容失败: {e}")
+            yield json.dumps({"channel": "error", "error": str(e)}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/search")
+async def search_articles(q: str, top_k: int = 10, days: Optional[int] = None):
+    """检索历史文章，按与查询的语义相似度排序，days限定最近若干天收录的文章"""
+    try:
+        if not crawler_instance:
+            raise HTTPException(status_code=500, detail="爬虫未初始化")
+        
+        results = crawler_instance.embedding_index.search(q, top_k=max(1, min(top_k, 100)), days=days)
+        return {
+            "success": True,
+            "data": results,
+            "count": len(results)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"检索文章失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/feishu/record")
 async def create_feishu_record(request: FeishuRecordRequest):
     """创建飞书记录"""
@@ -296,7 +349,19 @@ async def get_stats():
             "ai_sources": len(news_sources.get_ai_sources()) if news_sources else 0,
             "tech_sources": len(news_sources.get_tech_sources()) if news_sources else 0,
             "last_crawl": datetime.now().isoformat(),
-            "system_status": "running"
+            "system_status": "running",
+            "browser_pool": crawler_instance.browser_pool.get_stats() if crawler_instance else None,
+            "fetch_tiers": crawler_instance.fetcher.get_tiers() if crawler_instance else {},
+            "seen_articles": crawler_instance.article_store.count() if crawler_instance else 0,
+            "embedding_index": crawler_instance.embedding_index.get_stats() if crawler_instance else None,
+            "extract_executor": crawler_instance.extract_executor.get_stats() if crawler_instance else None,
+            "last_pipeline": crawler_instance.last_pipeline_metrics if crawler_instance else {},
+            "article_enrichment": crawler_instance.enricher.get_stats() if crawler_instance and crawler_instance.enricher else None,
+            "llm_cache": content_processor.get_cache_stats() if content_processor else None,
+            "llm_rate_limiter": content_processor.get_rate_limit_stats() if content_processor else None,
+            "llm_router": content_processor.get_router_stats() if content_processor else None,
+            "feishu_http_pool": get_pool_stats(),
+            "feishu_outbox": crawler_instance.feishu_outbox.get_stats() if crawler_instance and crawler_instance.feishu_outbox else None
         }
         
         return {
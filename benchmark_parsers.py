@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端性能对比
+对每个可用的解析后端统计单页解析+提取耗时，并检查提取结果是否一致
+
+用法:
+    python benchmark_parsers.py                 # 使用生成的模拟列表页
+    python benchmark_parsers.py page1.html ...  # 使用保存下来的真实页面
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import NEWS_SOURCES
+from crawler.extraction import ExtractionEngine
+from crawler.parsers import available_backends
+
+ROUNDS = 5
+
+
+def build_sample_page(item_count: int = 3000) -> str:
+    """生成一个数MB大小、结构接近新闻列表页的页面"""
+    items = []
+    for i in range(item_count):
+        items.append(f"""
+        <div class="article-item-wrapper">
+            <div class="article-item-pic"><img src="/img/{i}.jpg" alt=""></div>
+            <div class="article-item-info">
+                <a class="article-item-title" href="/p/{i}">第{i}条：大模型技术持续突破，多模态能力全面升级</a>
+                <div class="article-item-summary">  这是第{i}篇文章的摘要，介绍了最新的AI进展与行业动态，
+                    <span>以及对开发者生态的影响</span>。</div>
+                <div class="kr-flow-bar"><span>作者{i}</span><span>{i}分钟前</span></div>
+            </div>
+            <script>window.__stat && window.__stat({i});</script>
+        </div>""")
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>模拟列表页</title>
+<style>.article-item-wrapper {{ margin: 0; }}</style></head>
+<body><div class="information-flow-list">{''.join(items)}</div></body></html>"""
+
+
+def benchmark(html: str, source: dict):
+    """对单个页面比较各解析后端"""
+    results = {}
+
+    for backend in available_backends():
+        engine = ExtractionEngine(backend=backend, max_items=10000)
+        engine.extract(html, source)  # 预热：编译选择器
+
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            articles = engine.extract(html, source)
+        elapsed = (time.perf_counter() - started) / ROUNDS
+
+        results[backend.name] = articles
+        print(f"  {backend.name:<6} {elapsed * 1000:8.1f} ms/页   提取 {len(articles)} 篇文章")
+
+    outputs = list(results.values())
+    identical = all(output == outputs[0] for output in outputs[1:])
+    print(f"  结果一致: {'✅' if identical else '❌'}")
+    return identical
+
+
+def main():
+    """主函数"""
+    source = NEWS_SOURCES[0]
+    print("⏱️ HTML解析后端性能对比")
+    print("=" * 60)
+
+    if len(sys.argv) > 1:
+        pages = [(path, Path(path).read_text(encoding='utf-8', errors='ignore')) for path in sys.argv[1:]]
+    else:
+        pages = [("模拟列表页", build_sample_page())]
+
+    all_identical = True
+    for name, html in pages:
+        print(f"\n📄 {name} ({len(html) / 1024 / 1024:.1f} MB)")
+        all_identical = benchmark(html, source) and all_identical
+
+    sys.exit(0 if all_identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,18 @@ class Settings(BaseSettings):
     FEISHU_APP_SECRET: str = Field(default="", env="FEISHU_APP_SECRET")
     FEISHU_BASE_URL: str = Field(default="https://open.feishu.cn/open-apis", env="FEISHU_BASE_URL")
     FEISHU_TABLE_TOKEN: str = Field(default="", env="FEISHU_TABLE_TOKEN")
+    FEISHU_BATCH_SIZE: int = Field(default=500, env="FEISHU_BATCH_SIZE")  # 批量写入每次请求的记录数，上限500
+    FEISHU_BATCH_CONCURRENCY: int = Field(default=2, env="FEISHU_BATCH_CONCURRENCY")  # 批量写入并发请求数
+    FEISHU_TOKEN_REFRESH_MARGIN: int = Field(default=300, env="FEISHU_TOKEN_REFRESH_MARGIN")  # 访问令牌过期前提前刷新的秒数
+    FEISHU_HTTP2: bool = Field(default=True, env="FEISHU_HTTP2")  # 安装h2时使用HTTP/2
+    FEISHU_HTTP_TIMEOUT: float = Field(default=30.0, env="FEISHU_HTTP_TIMEOUT")
+    FEISHU_HTTP_MAX_CONNECTIONS: int = Field(default=20, env="FEISHU_HTTP_MAX_CONNECTIONS")
+    FEISHU_HTTP_MAX_KEEPALIVE: int = Field(default=10, env="FEISHU_HTTP_MAX_KEEPALIVE")
+    FEISHU_HTTP_KEEPALIVE_EXPIRY: float = Field(default=60.0, env="FEISHU_HTTP_KEEPALIVE_EXPIRY")  # 空闲连接保留秒数
+    FEISHU_OUTBOX_ENABLED: bool = Field(default=True, env="FEISHU_OUTBOX_ENABLED")  # 写入飞书前先保存到本地发件箱
+    FEISHU_OUTBOX_MAX_ATTEMPTS: int = Field(default=8, env="FEISHU_OUTBOX_MAX_ATTEMPTS")
+    FEISHU_OUTBOX_BASE_DELAY: float = Field(default=30.0, env="FEISHU_OUTBOX_BASE_DELAY")  # 首次重试等待秒数，之后逐次翻倍
+    FEISHU_OUTBOX_MAX_DELAY: float = Field(default=3600.0, env="FEISHU_OUTBOX_MAX_DELAY")
     
     # 微信配置
     WECHAT_APP_ID: str = Field(default="", env="WECHAT_APP_ID")
@@ -44,6 +56,66 @@ class Settings(BaseSettings):
         default="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
         env="USER_AGENT"
     )
+    CRAWL_CONCURRENCY: int = Field(default=4, env="CRAWL_CONCURRENCY")  # 同时打开的页面数
+    CRAWL_SOURCE_TIMEOUT: int = Field(default=60, env="CRAWL_SOURCE_TIMEOUT")  # 单个新闻源超时（秒）
+    
+    # 浏览器页面池配置
+    BROWSER_POOL_SIZE: int = Field(default=4, env="BROWSER_POOL_SIZE")
+    BROWSER_PAGE_MAX_USES: int = Field(default=20, env="BROWSER_PAGE_MAX_USES")  # 页面导航多少次后回收
+    BROWSER_MEMORY_LIMIT_MB: int = Field(default=768, env="BROWSER_MEMORY_LIMIT_MB")  # 需低于PM2的1G重启阈值
+    BROWSER_HEALTH_CHECK_INTERVAL: int = Field(default=300, env="BROWSER_HEALTH_CHECK_INTERVAL")  # 空闲页面健康检查间隔（秒）
+    
+    # 分级抓取配置
+    HTTP_TIER_MIN_ARTICLES: int = Field(default=3, env="HTTP_TIER_MIN_ARTICLES")  # 静态页面至少提取到的文章数
+    FETCH_TIER_REPROBE_HOURS: int = Field(default=24, env="FETCH_TIER_REPROBE_HOURS")  # 浏览器抓取的新闻源多久重新尝试HTTP
+    HTTP_CACHE_ENABLED: bool = Field(default=True, env="HTTP_CACHE_ENABLED")  # 列表页未变化时复用上次的文章
+    PARSER_BACKEND: str = Field(default="auto", env="PARSER_BACKEND")  # auto/lxml/bs4，auto优先使用lxml
+    EXTRACT_EXECUTOR: str = Field(default="auto", env="EXTRACT_EXECUTOR")  # auto/process/thread/inline
+    EXTRACT_WORKERS: int = Field(default=2, env="EXTRACT_WORKERS")
+    EXTRACT_MAX_PENDING: int = Field(default=8, env="EXTRACT_MAX_PENDING")  # 同时提交到执行池的页面数上限
+    
+    # 流式流水线配置
+    STREAMING_PIPELINE: bool = Field(default=True, env="STREAMING_PIPELINE")  # 每日任务使用流式流水线
+    PIPELINE_QUEUE_SIZE: int = Field(default=16, env="PIPELINE_QUEUE_SIZE")  # 阶段之间队列的容量
+    PIPELINE_ENRICH_WORKERS: int = Field(default=4, env="PIPELINE_ENRICH_WORKERS")
+    
+    # 增量爬取配置
+    INCREMENTAL_CRAWL: bool = Field(default=True, env="INCREMENTAL_CRAWL")  # 早报只处理之前未处理过的文章
+    SEEN_ARTICLE_RETENTION_DAYS: int = Field(default=90, env="SEEN_ARTICLE_RETENTION_DAYS")
+    
+    # 近似去重配置
+    NEAR_DUP_ENABLED: bool = Field(default=True, env="NEAR_DUP_ENABLED")
+    NEAR_DUP_THRESHOLD: float = Field(default=0.2, env="NEAR_DUP_THRESHOLD")  # 标题+摘要Jaccard相似度阈值
+    
+    # AI响应缓存配置
+    LLM_CACHE_ENABLED: bool = Field(default=True, env="LLM_CACHE_ENABLED")
+    LLM_CACHE_TTL: int = Field(default=86400, env="LLM_CACHE_TTL")  # 缓存有效期（秒）
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=1000, env="LLM_CACHE_MAX_ENTRIES")  # 超过后淘汰最久未使用的条目
+    LLM_REQUESTS_PER_MINUTE: int = Field(default=60, env="LLM_REQUESTS_PER_MINUTE")
+    LLM_TOKENS_PER_MINUTE: int = Field(default=100000, env="LLM_TOKENS_PER_MINUTE")
+    LLM_MAX_CONCURRENCY: int = Field(default=8, env="LLM_MAX_CONCURRENCY")  # 并发上限，被限流时自动降低
+    LLM_LATENCY_TARGET: float = Field(default=30.0, env="LLM_LATENCY_TARGET")  # 响应超过该秒数时降低并发
+    LLM_MAX_RETRIES: int = Field(default=3, env="LLM_MAX_RETRIES")  # 被限流(429)后的重试次数
+    ANTHROPIC_MODEL: str = Field(default="claude-3-5-haiku-latest", env="ANTHROPIC_MODEL")
+    LLM_HEDGE_ENABLED: bool = Field(default=True, env="LLM_HEDGE_ENABLED")  # 配置了多个AI服务时对慢请求发送对冲请求
+    LLM_HEDGE_AFTER: float = Field(default=0.0, env="LLM_HEDGE_AFTER")  # 对冲等待秒数，0表示按首选服务的p95延迟
+    ARTICLE_ENRICH_ENABLED: bool = Field(default=True, env="ARTICLE_ENRICH_ENABLED")  # 逐篇生成一句话摘要、标签和重要性
+    ARTICLE_ENRICH_BATCH_SIZE: int = Field(default=10, env="ARTICLE_ENRICH_BATCH_SIZE")  # 每次请求包含的文章数
+    ARTICLE_ENRICH_CONCURRENCY: int = Field(default=2, env="ARTICLE_ENRICH_CONCURRENCY")
+    AI_IMPORTANCE_WEIGHT: float = Field(default=1.0, env="AI_IMPORTANCE_WEIGHT")  # AI重要性评分（1-10）计入文章分数的权重
+    AI_PROCESS_MODE: str = Field(default="combined", env="AI_PROCESS_MODE")  # combined一次调用生成全部内容，separate分三次调用
+    AI_PROMPT_TOKEN_BUDGET: int = Field(default=3000, env="AI_PROMPT_TOKEN_BUDGET")  # 提示词中文章内容的token上限
+    AI_PROMPT_MAX_ARTICLES: int = Field(default=20, env="AI_PROMPT_MAX_ARTICLES")
+    AI_SUMMARY_MAX_TOKENS: int = Field(default=150, env="AI_SUMMARY_MAX_TOKENS")  # 单篇文章摘要的token上限
+    AI_MAP_REDUCE_THRESHOLD: int = Field(default=40, env="AI_MAP_REDUCE_THRESHOLD")  # 文章数超过该值时先按来源分组概括再汇总
+    AI_MAP_GROUP_BY: str = Field(default="cluster", env="AI_MAP_GROUP_BY")  # cluster按相似话题分组（单篇按来源），source按来源分组
+    AI_MAP_CONCURRENCY: int = Field(default=4, env="AI_MAP_CONCURRENCY")  # 分组概括的并发数
+    AI_MAP_GROUP_MAX_ARTICLES: int = Field(default=15, env="AI_MAP_GROUP_MAX_ARTICLES")  # 每个分组最多概括的文章数
+    
+    # 本地向量索引配置
+    EMBEDDING_INDEX_PATH: str = Field(default="./ai_news_vectors.f32", env="EMBEDDING_INDEX_PATH")
+    EMBEDDING_DIM: int = Field(default=512, env="EMBEDDING_DIM")  # 修改后会重建索引
+    CLUSTER_SIMILARITY: float = Field(default=0.3, env="CLUSTER_SIMILARITY")  # 余弦相似度不低于该值的文章归为同一话题
     
     # 服务器配置
     HOST: str = Field(default="0.0.0.0", env="HOST")
@@ -75,7 +147,15 @@ NEWS_SOURCES = [
         "url": "https://36kr.com",
         "category": "tech",
         "weight": 1.0,
+        "render": True,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'div[class*="item"]',
+                'article',
+                'div[class*="card"]'
+            ],
             "title": ".article-item-title",
             "link": ".article-item-title a",
             "summary": ".article-item-summary"
@@ -86,7 +166,14 @@ NEWS_SOURCES = [
         "url": "https://www.huxiu.com",
         "category": "tech",
         "weight": 1.0,
+        "render": True,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-item-title",
             "link": ".article-item-title a",
             "summary": ".article-item-summary"
@@ -97,7 +184,14 @@ NEWS_SOURCES = [
         "url": "https://www.jiqizhixin.com",
         "category": "ai",
         "weight": 1.2,
+        "render": True,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-title",
             "link": ".article-title a",
             "summary": ".article-summary"
@@ -108,7 +202,16 @@ NEWS_SOURCES = [
         "url": "https://www.csdn.net",
         "category": "ai",
         "weight": 1.1,
+        "render": True,
         "selectors": {
+            "items": [
+                'div[class*="blog-list-box"] div[class*="blog-list-item"]',
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]',
+                'div[class*="blog"]'
+            ],
             "title": ".title",
             "link": ".title a",
             "summary": ".summary"
@@ -119,7 +222,14 @@ NEWS_SOURCES = [
         "url": "https://www.qbitai.com",
         "category": "ai",
         "weight": 1.3,
+        "render": False,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-title",
             "link": ".article-title a",
             "summary": ".article-summary"
@@ -130,7 +240,14 @@ NEWS_SOURCES = [
         "url": "https://www.aiera.cn",
         "category": "ai",
         "weight": 1.2,
+        "render": True,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-title",
             "link": ".article-title a",
             "summary": ".article-summary"
@@ -141,7 +258,14 @@ NEWS_SOURCES = [
         "url": "https://www.infoq.cn",
         "category": "ai",
         "weight": 1.1,
+        "render": False,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-title",
             "link": ".article-title a",
             "summary": ".article-summary"
@@ -152,7 +276,14 @@ NEWS_SOURCES = [
         "url": "https://www.leiphone.com",
         "category": "tech",
         "weight": 1.0,
+        "render": False,
         "selectors": {
+            "items": [
+                'div[class*="article-item"]',
+                'div[class*="news-item"]',
+                'article',
+                'div[class*="item"]'
+            ],
             "title": ".article-title",
             "link": ".article-title a",
             "summary": ".article-summary"
@@ -193,6 +324,42 @@ AI_PROMPTS = {
 4. 每个提示词不超过50字
 5. 风格统一，适合早报使用
 
+新闻内容：
+{articles}
+""",
+    
+    "map_summary": """
+以下是「{group}」相关的AI科技新闻，请提炼其中最重要的要点，要求：
+1. 列出3-5条要点，按重要性排序
+2. 每条要点用1句话概括，保留关键的公司、产品和数据
+3. 不要输出与新闻无关的内容
+
+新闻内容：
+{articles}
+""",
+    
+    "enrich": """
+请逐篇处理以下AI科技新闻，为每篇文章生成：
+1. summary：一句话中文摘要，不超过40字
+2. tags：2-4个中文标签，如公司、技术方向、产品类型
+3. importance：重要性评分，1-10的整数，10表示行业重大事件
+
+只输出一个JSON数组，每篇文章一个对象，id与文章编号一致，格式如下：
+[{{"id": 1, "summary": "一句话摘要", "tags": ["标签1", "标签2"], "importance": 7}}]
+
+新闻内容：
+{articles}
+""",
+    
+    "combined": """
+请基于以下AI科技新闻，一次性完成三项任务：
+1. summary：整理一份简洁的早报摘要，突出最重要的3-5条新闻，每条用1-2句话概括，按重要性排序，总字数控制在300字以内
+2. trends：识别当前AI领域的3-5个主要发展趋势，每个趋势用1句话描述
+3. image_prompts：生成3个适合制作早报图片的提示词，包含AI、科技、未来等元素，风格简洁现代、统一，每个不超过50字
+
+只输出一个JSON对象，不要输出其他内容，格式如下：
+{{"summary": "早报摘要", "trends": ["趋势1", "趋势2", "趋势3"], "image_prompts": ["提示词1", "提示词2", "提示词3"]}}
+
 新闻内容：
 {articles}
 """
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已处理文章存储
+持久化记录已经进入过早报的文章，按URL和标准化标题哈希判重，
+实现增量爬取
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+from typing import List, Dict, Any
+
+from crawler.storage import connect_database
+
+# 标准化标题时去掉的空白和标点
+_TITLE_NOISE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """标准化标题：全半角统一、小写、去除空白和标点"""
+    title = unicodedata.normalize('NFKC', title or '').lower()
+    return _TITLE_NOISE.sub('', title)
+
+
+def title_hash(title: str) -> str:
+    """标准化标题的哈希"""
+    return hashlib.sha1(normalize_title(title).encode('utf-8')).hexdigest()
+
+
+class ArticleStore:
+    """已处理文章存储"""
+
+    def __init__(self):
+        """初始化存储表"""
+        self.db = connect_database()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_articles (
+                url TEXT PRIMARY KEY,
+                title_hash TEXT NOT NULL,
+                title TEXT,
+                source TEXT,
+                first_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_articles_title_hash ON seen_articles (title_hash);
+            CREATE INDEX IF NOT EXISTS idx_seen_articles_first_seen ON seen_articles (first_seen);
+        """)
+        self.db.commit()
+
+    def is_seen(self, article: Dict[str, Any]) -> bool:
+        """文章是否已经处理过"""
+        url = article.get('url', '')
+        if url and self.db.execute("SELECT 1 FROM seen_articles WHERE url = ?", (url,)).fetchone():
+            return True
+
+        # 同一篇文章换了链接（跟踪参数、移动版等）时按标题判重
+        if not normalize_title(article.get('title', '')):
+            return False
+        row = self.db.execute(
+            "SELECT 1 FROM seen_articles WHERE title_hash = ? LIMIT 1",
+            (title_hash(article.get('title', '')),)
+        ).fetchone()
+        return row is not None
+
+    def filter_new(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """只保留从未处理过的文章"""
+        return [article for article in articles if not self.is_seen(article)]
+
+    def mark_seen(self, articles: List[Dict[str, Any]]):
+        """记录文章已处理，保留首次出现的时间"""
+        now = time.time()
+        # 近似重复合并掉的其他来源版本也一并记录
+        articles = [
+            entry
+            for article in articles
+            for entry in [article] + article.get('alternates', [])
+        ]
+        self.db.executemany(
+            """
+            INSERT OR IGNORE INTO seen_articles (url, title_hash, title, source, first_seen)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    article.get('url') or f"title:{title_hash(article.get('title', ''))}",
+                    title_hash(article.get('title', '')),
+                    article.get('title', ''),
+                    article.get('source', ''),
+                    now
+                )
+                for article in articles
+            ]
+        )
+        self.db.commit()
+
+    def prune(self, retention_days: int) -> int:
+        """删除超过保留期的记录，返回删除数量"""
+        cutoff = time.time() - retention_days * 86400
+        cursor = self.db.execute("DELETE FROM seen_articles WHERE first_seen < ?", (cutoff,))
+        self.db.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        """已记录的文章数量"""
+        return self.db.execute("SELECT COUNT(*) FROM seen_articles").fetchone()[0]
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器页面池
+常驻一个预热好的AsyncWebCrawler，以会话（session）形式复用页面，
+按导航次数回收页面，并在内存超限时重启浏览器
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List
+
+from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+from loguru import logger
+
+try:
+    import psutil
+except ImportError:  # psutil不可用时不做内存检查
+    psutil = None
+
+# 健康检查使用的本地页面，不产生网络请求
+HEALTH_CHECK_URL = "raw:<html><body>ok</body></html>"
+
+
+class PageSlot:
+    """页面槽位，对应浏览器中的一个复用会话"""
+
+    def __init__(self, pool: "BrowserPool"):
+        self.pool = pool
+        self.session_id = f"pool-{uuid.uuid4().hex[:12]}"
+        self.uses = 0
+        self.healthy = True
+        self.last_used = time.monotonic()
+
+    @property
+    def crawler(self) -> AsyncWebCrawler:
+        """当前槽位所属的爬虫引擎"""
+        return self.pool.crawler
+
+
+class BrowserPool:
+    """浏览器页面池"""
+
+    def __init__(self, user_agent: str, size: int = 4, max_uses: int = 20,
+                 memory_limit_mb: int = 768, health_check_interval: int = 300):
+        """初始化页面池"""
+        self.user_agent = user_agent
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.memory_limit_mb = memory_limit_mb
+        self.health_check_interval = health_check_interval
+
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._in_use = 0
+        self._restart_pending = False
+        self._start_lock = asyncio.Lock()
+        self._restart_lock = asyncio.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'recycled_pages': 0,
+            'browser_restarts': 0,
+            'failed_health_checks': 0
+        }
+
+    async def start(self):
+        """启动浏览器并预热页面槽位，并发调用时只启动一个浏览器"""
+        async with self._start_lock:
+            if self.crawler is not None:
+                return
+
+            if self.memory_limit_mb and psutil is None:
+                logger.warning(f"未安装psutil，浏览器内存上限 {self.memory_limit_mb}MB 不会生效")
+
+            await self._start_browser()
+
+            if self._idle is None:
+                self._idle = asyncio.Queue()
+                for _ in range(self.size):
+                    self._idle.put_nowait(PageSlot(self))
+
+            logger.info(f"浏览器页面池已启动，容量 {self.size}")
+
+    async def _start_browser(self):
+        """启动浏览器进程，启动完成后才对外可见"""
+        crawler = AsyncWebCrawler(
+            headless=True,
+            browser_type="chromium",
+            user_agent=self.user_agent
+        )
+        await crawler.start()
+        self.crawler = crawler
+
+    async def close(self):
+        """关闭浏览器"""
+        if self.crawler is not None:
+            await self.crawler.close()
+            self.crawler = None
+            logger.info("浏览器页面池已关闭")
+
+    @asynccontextmanager
+    async def page(self):
+        """借出一个页面槽位，使用完毕后自动归还"""
+        if self.crawler is None or self._idle is None:
+            await self.start()
+
+        slot = await self._idle.get()
+        self._in_use += 1
+        self._stats['checkouts'] += 1
+
+        try:
+            if self.crawler is None:
+                # 等待期间浏览器重启失败，重新启动
+                await self.start()
+            await self._prepare_slot(slot)
+            slot.uses += 1
+            yield slot
+        except BaseException:
+            # 导航中途失败或被取消的页面状态不可信，下次借出前回收
+            slot.healthy = False
+            raise
+        finally:
+            slot.last_used = time.monotonic()
+            self._in_use -= 1
+            self._idle.put_nowait(slot)
+
+            if self._restart_pending and self._in_use == 0:
+                await self._restart_browser()
+
+    async def _prepare_slot(self, slot: PageSlot):
+        """借出前检查槽位状态，必要时回收页面"""
+        if not slot.healthy or slot.uses >= self.max_uses:
+            await self._recycle(slot)
+        elif time.monotonic() - slot.last_used > self.health_check_interval:
+            if not await self._health_check(slot):
+                self._stats['failed_health_checks'] += 1
+                await self._recycle(slot)
+
+        if self._memory_exceeded():
+            # 先回收当前页面释放内存，仍超限时待所有页面归还后重启浏览器
+            await self._recycle(slot)
+            if self._memory_exceeded():
+                logger.warning(f"浏览器内存超过 {self.memory_limit_mb}MB，将在空闲时重启")
+                self._restart_pending = True
+
+    async def _health_check(self, slot: PageSlot) -> bool:
+        """通过本地页面检查会话是否可用"""
+        try:
+            result = await asyncio.wait_for(
+                self.crawler.arun(
+                    url=HEALTH_CHECK_URL,
+                    config=CrawlerRunConfig(session_id=slot.session_id, cache_mode=CacheMode.BYPASS)
+                ),
+                timeout=10
+            )
+            return bool(result.success)
+        except Exception as e:
+            logger.warning(f"页面健康检查失败: {e}")
+            return False
+
+    async def _recycle(self, slot: PageSlot):
+        """关闭槽位对应的页面，下一次导航时重新创建"""
+        try:
+            await self.crawler.crawler_strategy.kill_session(slot.session_id)
+        except Exception as e:
+            logger.debug(f"关闭页面会话失败: {e}")
+
+        slot.session_id = f"pool-{uuid.uuid4().hex[:12]}"
+        slot.uses = 0
+        slot.healthy = True
+        self._stats['recycled_pages'] += 1
+
+    async def _restart_browser(self):
+        """重启浏览器以释放内存"""
+        async with self._restart_lock:
+            if not self._restart_pending or self._in_use:
+                return
+
+            # 先取出全部槽位，重启期间等待借出的协程保持阻塞，不会用到正在关闭的浏览器
+            slots: List[PageSlot] = []
+            while not self._idle.empty():
+                slots.append(self._idle.get_nowait())
+
+            logger.info("正在重启浏览器页面池")
+            try:
+                old_crawler, self.crawler = self.crawler, None
+                try:
+                    await old_crawler.close()
+                except Exception as e:
+                    logger.warning(f"关闭浏览器失败: {e}")
+
+                await self._start_browser()
+                self._stats['browser_restarts'] += 1
+            except Exception as e:
+                # 启动失败时下一次借出页面会重新启动浏览器
+                logger.error(f"重启浏览器失败: {e}")
+            finally:
+                # 旧会话已随浏览器关闭，重置所有槽位后放回
+                for slot in slots:
+                    slot.session_id = f"pool-{uuid.uuid4().hex[:12]}"
+                    slot.uses = 0
+                    slot.healthy = True
+                    self._idle.put_nowait(slot)
+                self._restart_pending = False
+
+    def _memory_exceeded(self) -> bool:
+        """检查本进程及浏览器子进程的内存占用"""
+        if not self.memory_limit_mb:
+            return False
+        return self.memory_usage_mb() > self.memory_limit_mb
+
+    def memory_usage_mb(self) -> float:
+        """本进程及所有子进程的常驻内存（MB）"""
+        if psutil is None:
+            return 0.0
+
+        try:
+            process = psutil.Process(os.getpid())
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            return rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取页面池统计信息"""
+        return {
+            'size': self.size,
+            'in_use': self._in_use,
+            'idle': self._idle.qsize() if self._idle else 0,
+            'memory_mb': round(self.memory_usage_mb(), 1),
+            'memory_limit_mb': self.memory_limit_mb,
+            **self._stats
+        }
@@ -7,50 +7,267 @@
 
 import json
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator
 from datetime import datetime
 import openai
 from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
 
 from config.settings import settings, AI_PROMPTS
+from crawler.llm_cache import LLMResponseCache
+from crawler.rate_limiter import get_llm_rate_limiter
+from crawler.llm_router import (
+    LLMRouter, OpenAICompatibleBackend, AnthropicBackend, anthropic, is_rate_limit_error
+)
+from crawler.token_budget import estimate_tokens, truncate_to_tokens
+from crawler.keyword_matcher import get_keyword_matcher
+from crawler.embeddings import HashingEmbedder, cluster_articles
+
+# 重要性关键词
+IMPORTANCE_KEYWORDS = {
+    'high': ['突破', '重大', '首次', '革命性', '里程碑', '创新', '领先'],
+    'medium': ['发布', '推出', '合作', '投资', '融资', '上市'],
+    'low': ['更新', '优化', '改进', '修复', '调整']
+}
+
+# 分别生成早报各部分时使用的系统提示词、参数和失败时的默认内容
+SEPARATE_TASKS = {
+    'summary': {
+        'system': "你是一个专业的AI科技早报编辑，擅长将复杂的科技新闻整理成简洁易懂的早报。",
+        'max_tokens': 500,
+        'temperature': 0.7,
+        'fallback': "今日AI科技新闻摘要生成失败，请查看详细内容。"
+    },
+    'trends': {
+        'system': "你是一个AI行业分析师，擅长识别和分析AI技术的发展趋势。",
+        'max_tokens': 300,
+        'temperature': 0.7,
+        'fallback': ["AI技术持续快速发展", "各行业AI应用不断深化"]
+    },
+    'image_prompts': {
+        'system': "你是一个专业的视觉设计师，擅长为AI科技内容创作视觉提示词。",
+        'max_tokens': 200,
+        'temperature': 0.8,
+        'fallback': [
+            "AI科技未来场景，简洁现代设计风格",
+            "人工智能与人类协作，科技感十足",
+            "数字化世界，AI驱动的未来生活"
+        ]
+    }
+}
+
+class CombinedReport(BaseModel):
+    """一次调用生成的早报内容"""
+    summary: str = Field(min_length=1)
+    trends: List[str] = Field(min_length=1)
+    image_prompts: List[str] = Field(min_length=1)
 
 class ContentProcessor:
     """内容处理器"""
     
     def __init__(self):
         """初始化内容处理器"""
-        # 优先使用DeepSeek，如果没有配置则使用OpenAI
+        # 按优先级配置所有可用的AI服务：DeepSeek、OpenAI、Anthropic
+        backends = []
         if settings.DEEPSEEK_API_KEY:
-            self.ai_client = openai.AsyncOpenAI(
-                api_key=settings.DEEPSEEK_API_KEY,
-                base_url="https://ark.cn-beijing.volces.com/api/v3"
-            )
-            self.ai_model = "ep-20250823010411-p5fnv"  # 火山方舟的模型ID
+            backends.append(OpenAICompatibleBackend(
+                "deepseek",
+                openai.AsyncOpenAI(
+                    api_key=settings.DEEPSEEK_API_KEY,
+                    base_url="https://ark.cn-beijing.volces.com/api/v3"
+                ),
+                "ep-20250823010411-p5fnv"  # 火山方舟的模型ID
+            ))
             logger.info("使用火山方舟DeepSeek API进行内容处理")
-        elif settings.OPENAI_API_KEY:
-            self.ai_client = openai.AsyncOpenAI(
-                api_key=settings.OPENAI_API_KEY
-            )
-            self.ai_model = "gpt-3.5-turbo"
+        if settings.OPENAI_API_KEY:
+            backends.append(OpenAICompatibleBackend(
+                "openai",
+                openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY),
+                "gpt-3.5-turbo"
+            ))
             logger.info("使用OpenAI API进行内容处理")
+        if settings.ANTHROPIC_API_KEY:
+            if anthropic is None:
+                logger.warning("已配置ANTHROPIC_API_KEY，但未安装anthropic，跳过Anthropic服务")
+            else:
+                backends.append(AnthropicBackend(settings.ANTHROPIC_API_KEY, settings.ANTHROPIC_MODEL))
+                logger.info("使用Anthropic API进行内容处理")
+        
+        # 进程内所有AI调用共用的限流器，对冲请求同样受其限制
+        self.rate_limiter = get_llm_rate_limiter()
+        
+        if backends:
+            self.router = LLMRouter(
+                backends,
+                hedge_enabled=settings.LLM_HEDGE_ENABLED,
+                hedge_after=settings.LLM_HEDGE_AFTER,
+                rate_limiter=self.rate_limiter
+            )
         else:
-            self.ai_client = None
+            self.router = None
             logger.warning("未配置AI API密钥，将使用模拟数据")
+        
+        # AI响应缓存
+        self.llm_cache = None
+        if settings.LLM_CACHE_ENABLED:
+            self.llm_cache = LLMResponseCache(settings.LLM_CACHE_TTL, settings.LLM_CACHE_MAX_ENTRIES)
+        
+        # 相似话题聚类使用的文章向量
+        self.embedder = HashingEmbedder(settings.EMBEDDING_DIM)
     
-    async def process_articles(self, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _estimate_request_tokens(self, system_prompt: str, prompt: str, max_tokens: int) -> int:
+        """估算一次调用的token数（输入加最大输出）"""
+        return estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens
+    
+    def _retry_after(self, error: Exception) -> Optional[float]:
+        """读取429响应中的Retry-After"""
+        response = getattr(error, 'response', None)
+        value = response.headers.get('retry-after') if response is not None else None
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+    
+    async def _chat(self, system_prompt: str, prompt: str, max_tokens: int,
+                    temperature: float, use_cache: bool = True,
+                    usage: Optional[Dict[str, int]] = None,
+                    cache_if: Optional[Callable[[str], bool]] = None) -> str:
+        """调用AI模型，相同的模型、提示词和参数优先返回缓存结果
+        
+        需要每次得到不同结果时传入use_cache=False；usage用于累计token用量，
+        cache_if返回False的结果不写入缓存
+        """
+        cache = self.llm_cache if use_cache else None
+        key = None
+        if cache:
+            # 对冲或故障转移时可能由任一服务作答，缓存键使用路由的整体标识
+            key = cache.make_key(self.router.model_id, system_prompt, prompt, temperature, max_tokens)
+            cached = cache.get(key)
+            if cached is not None and (cache_if is None or cache_if(cached)):
+                logger.debug("命中AI响应缓存")
+                if usage is not None:
+                    usage['cached_calls'] += 1
+                return cached
+        
+        # 被限流(429)时由限流器暂停并降低并发，然后重新排队
+        estimated = self._estimate_request_tokens(system_prompt, prompt, max_tokens)
+        max_retries = max(0, settings.LLM_MAX_RETRIES)
+        for attempt in range(max_retries + 1):
+            async with self.rate_limiter.slot(estimated) as permit:
+                try:
+                    result = await self.router.complete(system_prompt, prompt, max_tokens, temperature,
+                                                        estimated_tokens=estimated)
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    permit.mark_rate_limited(self._retry_after(e))
+                    if attempt == max_retries:
+                        raise
+                    continue
+                if result.total_tokens:
+                    permit.record_tokens(result.total_tokens)
+                break
+        content = result.content.strip()
+        
+        if usage is not None:
+            usage['calls'] += 1
+            usage['prompt_tokens'] += result.prompt_tokens
+            usage['completion_tokens'] += result.completion_tokens
+        
+        if cache and content and (cache_if is None or cache_if(content)):
+            cache.put(key, self.router.model_of(result.backend), content)
+        return content
+    
+    async def _chat_stream(self, system_prompt: str, prompt: str, max_tokens: int,
+                           temperature: float, use_cache: bool = True,
+                           usage: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        """流式调用AI模型，逐段返回生成的文本；命中缓存时一次返回完整结果"""
+        cache = self.llm_cache if use_cache else None
+        key = None
+        if cache:
+            # 对冲或故障转移时可能由任一服务作答，缓存键使用路由的整体标识
+            key = cache.make_key(self.router.model_id, system_prompt, prompt, temperature, max_tokens)
+            cached = cache.get(key)
+            if cached is not None:
+                if usage is not None:
+                    usage['cached_calls'] += 1
+                yield cached
+                return
+        
+        estimated = self._estimate_request_tokens(system_prompt, prompt, max_tokens)
+        parts = []
+        backend_name = ""
+        max_retries = max(0, settings.LLM_MAX_RETRIES)
+        for attempt in range(max_retries + 1):
+            # 流式输出期间一直占用并发名额
+            async with self.rate_limiter.slot(estimated) as permit:
+                tokens = 0
+                try:
+                    async for chunk in self.router.stream(system_prompt, prompt, max_tokens, temperature):
+                        permit.mark_first_token()
+                        backend_name = chunk.backend
+                        tokens += chunk.total_tokens
+                        if usage is not None:
+                            usage['prompt_tokens'] += chunk.prompt_tokens
+                            usage['completion_tokens'] += chunk.completion_tokens
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield chunk.content
+                except Exception as e:
+                    # 已经输出了部分内容时不再重试
+                    if parts or not is_rate_limit_error(e):
+                        raise
+                    permit.mark_rate_limited(self._retry_after(e))
+                    if attempt == max_retries:
+                        raise
+                    continue
+                if tokens:
+                    permit.record_tokens(tokens)
+                if usage is not None:
+                    usage['calls'] += 1
+                break
+        
+        # 与非流式调用共用缓存键，完整结果写入缓存
+        content = "".join(parts).strip()
+        if cache and content:
+            cache.put(key, self.router.model_of(backend_name), content)
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """获取AI响应缓存统计信息"""
+        return self.llm_cache.get_stats() if self.llm_cache else None
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """获取AI接口限流统计信息"""
+        return self.rate_limiter.get_stats()
+    
+    def get_router_stats(self) -> Optional[Dict[str, Any]]:
+        """获取各AI服务的延迟和错误率统计"""
+        return self.router.get_stats() if self.router else None
+    
+    async def process_articles(self, articles: List[Dict[str, Any]], use_cache: bool = True) -> Dict[str, Any]:
         """处理文章列表，生成早报内容"""
         try:
-            # 准备文章内容
-            articles_text = self._format_articles_for_ai(articles)
+            usage = self._new_usage()
+            articles_text, map_groups = await self._prepare_articles_text(articles, use_cache, usage)
             
-            # 并行处理多个AI任务
-            tasks = [
-                self._generate_summary(articles_text),
-                self._analyze_trends(articles_text),
-                self._generate_image_prompts(articles_text)
-            ]
+            # 一次调用生成全部内容，失败时改为分别调用
+            combined = None
+            if self.router and settings.AI_PROCESS_MODE == "combined":
+                combined = await self._generate_combined(articles_text, use_cache, usage)
             
-            summary, trends, image_prompts = await asyncio.gather(*tasks)
+            if combined:
+                mode = "combined"
+                summary, trends, image_prompts = combined
+            else:
+                mode = "separate"
+                # 并行处理多个AI任务
+                tasks = [
+                    self._generate_summary(articles_text, use_cache, usage),
+                    self._analyze_trends(articles_text, use_cache, usage),
+                    self._generate_image_prompts(articles_text, use_cache, usage)
+                ]
+                
+                summary, trends, image_prompts = await asyncio.gather(*tasks)
             
             return {
                 'summary': summary,
@@ -58,122 +275,414 @@ class ContentProcessor:
                 'image_prompts': image_prompts,
                 'articles': articles[:10],  # 只保留前10篇重要文章
                 'total_articles': len(articles),
-                'processed_at': datetime.now().isoformat()
+                'processed_at': datetime.now().isoformat(),
+                'token_usage': {
+                    **self._summarize_usage(mode, usage, articles_text),
+                    'map_groups': map_groups
+                }
             }
             
         except Exception as e:
             logger.error(f"处理文章内容失败: {e}")
             raise
     
-    def _format_articles_for_ai(self, articles: List[Dict[str, Any]]) -> str:
-        """格式化文章内容供AI处理"""
+    async def stream_articles(self, articles: List[Dict[str, Any]],
+                              use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """流式处理文章列表
+        
+        摘要、趋势、图片提示词三个部分同时生成，每个事件带有channel字段：
+        开始时立即输出{"channel": "status", "stage": "prepare"}；文章较多需要分组概括时，
+        每完成一组输出{"channel": "map", "group", "completed", "total"}；
+        生成中的文本片段为{"channel", "delta"}，某部分完成时为{"channel", "done", "result"}，
+        最后一个事件的channel为"done"，result与process_articles的返回值格式相同
+        """
+        usage = self._new_usage()
+        yield {'channel': 'status', 'stage': 'prepare', 'total_articles': len(articles)}
+        
+        # 分组概括耗时最长，期间逐组输出进度，不必等到准备完成才有响应
+        progress: asyncio.Queue = asyncio.Queue()
+        
+        def on_group_done(group: str, completed: int, total: int):
+            progress.put_nowait({'channel': 'map', 'group': group, 'completed': completed, 'total': total})
+        
+        prepare = asyncio.create_task(self._prepare_articles_text(articles, use_cache, usage, on_group_done))
+        prepare.add_done_callback(lambda _: progress.put_nowait(None))
+        try:
+            while True:
+                event = await progress.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            prepare.cancel()
+        articles_text, map_groups = prepare.result()
+        yield {'channel': 'status', 'stage': 'generate', 'total_articles': len(articles), 'map_groups': map_groups}
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        results: Dict[str, Any] = {}
+        
+        async def run_channel(task: str):
+            try:
+                if not self.router:
+                    mock = {
+                        'summary': self._get_mock_summary,
+                        'trends': self._get_mock_trends,
+                        'image_prompts': self._get_mock_image_prompts
+                    }[task]()
+                    results[task] = mock
+                    text = mock if isinstance(mock, str) else "\n".join(mock)
+                    await queue.put({'channel': task, 'delta': text})
+                else:
+                    params = SEPARATE_TASKS[task]
+                    parts = []
+                    async for delta in self._chat_stream(
+                        params['system'],
+                        AI_PROMPTS[task].format(articles=articles_text),
+                        max_tokens=params['max_tokens'],
+                        temperature=params['temperature'],
+                        use_cache=use_cache,
+                        usage=usage
+                    ):
+                        parts.append(delta)
+                        await queue.put({'channel': task, 'delta': delta})
+                    results[task] = self._parse_task_result(task, "".join(parts))
+            except Exception as e:
+                logger.error(f"流式生成 {task} 失败: {e}")
+                results[task] = self._fallback_result(task)
+                await queue.put({'channel': task, 'error': str(e)})
+            await queue.put({'channel': task, 'done': True, 'result': results[task]})
+        
+        tasks = [asyncio.create_task(run_channel(task)) for task in SEPARATE_TASKS]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event.get('done'):
+                    remaining -= 1
+                yield event
+        finally:
+            # 客户端断开时取消仍在生成的部分
+            for task in tasks:
+                task.cancel()
+        
+        yield {
+            'channel': 'done',
+            'result': {
+                'summary': results['summary'],
+                'trends': results['trends'],
+                'image_prompts': results['image_prompts'],
+                'articles': articles[:10],
+                'total_articles': len(articles),
+                'processed_at': datetime.now().isoformat(),
+                'token_usage': {
+                    **self._summarize_usage("stream", usage, articles_text),
+                    'map_groups': map_groups
+                }
+            }
+        }
+    
+    def _new_usage(self) -> Dict[str, int]:
+        """新建token用量统计"""
+        return {'calls': 0, 'cached_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    
+    async def _prepare_articles_text(self, articles: List[Dict[str, Any]], use_cache: bool,
+                                     usage: Dict[str, int],
+                                     on_group_done: Optional[Callable[[str, int, int], None]] = None) -> tuple:
+        """准备发送给AI的文章内容，文章较多时先按话题或来源分组概括，返回文本和分组数
+        
+        on_group_done在每个分组概括完成时调用，参数为分组名、已完成数和分组总数
+        """
+        if self.router and len(articles) > settings.AI_MAP_REDUCE_THRESHOLD:
+            return await self._map_group_summaries(articles, use_cache, usage, on_group_done)
+        return self._format_articles_for_ai(articles), 0
+    
+    async def _generate_combined(self, articles_text: str, use_cache: bool,
+                                 usage: Dict[str, int]) -> Optional[tuple]:
+        """一次调用生成摘要、趋势和图片提示词，返回结果无法解析时返回None"""
+        try:
+            prompt = AI_PROMPTS['combined'].format(articles=articles_text)
+            
+            content = await self._chat(
+                "你是一个专业的AI科技早报编辑，同时擅长分析AI行业趋势和创作视觉提示词。只输出JSON。",
+                prompt,
+                max_tokens=1000,
+                temperature=0.7,
+                use_cache=use_cache,
+                usage=usage,
+                cache_if=lambda text: self._parse_combined(text) is not None
+            )
+            
+            report = self._parse_combined(content)
+            if report is None:
+                logger.warning("早报JSON结果解析失败，改为分别生成摘要、趋势和图片提示词")
+                return None
+            
+            logger.info(f"一次调用生成早报成功: 趋势 {len(report.trends)} 个")
+            return report.summary, report.trends, self._normalize_image_prompts(report.image_prompts)
+            
+        except Exception as e:
+            logger.warning(f"一次调用生成早报失败，改为分别调用: {e}")
+            return None
+    
+    async def _map_group_summaries(self, articles: List[Dict[str, Any]], use_cache: bool,
+                                   usage: Dict[str, int],
+                                   on_group_done: Optional[Callable[[str, int, int], None]] = None) -> tuple:
+        """按话题或来源分组并行概括要点，返回汇总后的文本和分组数
+        
+        调用次数和汇总文本长度只随分组数增长，与文章总数无关
+        """
+        if settings.AI_MAP_GROUP_BY == "cluster":
+            # 在副本上按重要性顺序聚类，不改动调用方的文章；每个话题的中心是话题内最重要的文章
+            articles = sorted(
+                (dict(article) for article in articles),
+                key=lambda x: (-self.score_article(x), x.get('url', ''))
+            )
+            topic_count = cluster_articles(articles, self.embedder, settings.CLUSTER_SIMILARITY)
+            logger.info(f"{len(articles)} 篇文章聚类为 {topic_count} 个话题")
+        
+        groups = self._group_articles(articles)
+        
+        # 分组按组内最高分排序，保证相同输入得到相同的汇总文本
+        ordered = sorted(
+            groups.items(),
+            key=lambda item: (-max(self.score_article(a) for a in item[1]), item[0])
+        )
+        
+        semaphore = asyncio.Semaphore(max(1, settings.AI_MAP_CONCURRENCY))
+        completed = 0
+        
+        async def summarize(group: str, group_articles: List[Dict[str, Any]]) -> str:
+            nonlocal completed
+            async with semaphore:
+                summary = await self._summarize_group(group, group_articles, use_cache, usage)
+            completed += 1
+            if on_group_done:
+                on_group_done(group, completed, len(ordered))
+            return summary
+        
+        summaries = await asyncio.gather(*(summarize(group, items) for group, items in ordered))
+        
+        # 汇总文本同样受提示词token上限约束，平均分配给各分组
+        group_budget = max(60, settings.AI_PROMPT_TOKEN_BUDGET // max(1, len(ordered)))
+        sections = []
+        for (group, group_articles), summary in zip(ordered, summaries):
+            sections.append(
+                f"\n来源: {group}（{len(group_articles)}篇）\n要点:\n{truncate_to_tokens(summary, group_budget)}\n"
+            )
+        
+        logger.info(f"{len(articles)} 篇文章按来源分为 {len(ordered)} 组概括后汇总")
+        return "\n".join(sections), len(ordered)
+    
+    def _group_articles(self, articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """文章分组：已聚类的多篇文章按话题分组，其余文章按来源分组"""
+        by_cluster = settings.AI_MAP_GROUP_BY == "cluster"
+        topics: Dict[int, List[Dict[str, Any]]] = {}
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        
+        for article in articles:
+            if by_cluster and article.get('cluster_size', 1) > 1:
+                topics.setdefault(article['cluster_id'], []).append(article)
+            else:
+                groups.setdefault(article.get('source') or '其他', []).append(article)
+        
+        for topic_articles in topics.values():
+            # 以话题内最重要文章的标题作为话题名
+            leader = min(topic_articles, key=lambda x: (-self.score_article(x), x.get('url', '')))
+            groups[f"话题：{leader.get('title', '')}"] = topic_articles
+        return groups
+    
+    async def _summarize_group(self, group: str, articles: List[Dict[str, Any]], use_cache: bool,
+                               usage: Dict[str, int]) -> str:
+        """概括单个分组的新闻要点，失败时使用重要文章的标题"""
+        articles_text = self._format_articles_for_ai(articles, max_articles=settings.AI_MAP_GROUP_MAX_ARTICLES)
+        try:
+            prompt = AI_PROMPTS['map_summary'].format(group=group, articles=articles_text)
+            return await self._chat(
+                "你是一个专业的AI科技新闻编辑，擅长提炼新闻要点。",
+                prompt,
+                max_tokens=300,
+                temperature=0.3,
+                use_cache=use_cache,
+                usage=usage
+            )
+        except Exception as e:
+            logger.warning(f"概括 {group} 的新闻要点失败: {e}")
+            ranked = sorted(articles, key=lambda x: -self.score_article(x))[:5]
+            return "\n".join(f"- {article.get('title', '')}" for article in ranked)
+    
+    def _parse_combined(self, text: str) -> Optional[CombinedReport]:
+        """从模型输出中解析并校验早报JSON"""
+        start = text.find('{')
+        end = text.rfind('}')
+        if start == -1 or end <= start:
+            return None
+        
+        try:
+            report = CombinedReport.model_validate_json(text[start:end + 1])
+        except ValidationError:
+            return None
+        
+        report.summary = report.summary.strip()
+        report.trends = [trend.strip() for trend in report.trends if trend.strip()]
+        report.image_prompts = [prompt.strip() for prompt in report.image_prompts if prompt.strip()]
+        if not report.summary or not report.trends or not report.image_prompts:
+            return None
+        return report
+    
+    def _summarize_usage(self, mode: str, usage: Dict[str, int], articles_text: str) -> Dict[str, Any]:
+        """统计本次处理的token用量，合并调用时估算相比分别调用节省的token"""
+        result = {'mode': mode, **usage, 'estimated_saved_tokens': 0}
+        
+        if mode == "combined" and usage['prompt_tokens']:
+            # 分别调用时每次都会重新发送文章内容，按文章内容在提示词中的占比估算
+            prompt_chars = len(AI_PROMPTS['combined']) + len(articles_text)
+            articles_tokens = int(usage['prompt_tokens'] * len(articles_text) / prompt_chars)
+            result['estimated_saved_tokens'] = articles_tokens * 2
+        
+        if usage['calls'] or usage['cached_calls']:
+            logger.info(
+                f"早报生成方式: {mode}，调用 {usage['calls']} 次（缓存命中 {usage['cached_calls']} 次），"
+                f"输入 {usage['prompt_tokens']} tokens，输出 {usage['completion_tokens']} tokens，"
+                f"预计节省 {result['estimated_saved_tokens']} tokens"
+            )
+        return result
+    
+    def _format_articles_for_ai(self, articles: List[Dict[str, Any]],
+                                max_articles: Optional[int] = None) -> str:
+        """格式化文章内容供AI处理
+        
+        按重要性从高到低放入文章，总长度不超过AI_PROMPT_TOKEN_BUDGET；
+        相同的文章列表总是得到相同的结果，便于命中AI响应缓存
+        """
+        budget = settings.AI_PROMPT_TOKEN_BUDGET
+        min_summary_tokens = 20
+        
+        # 与rank_articles_by_importance使用相同的分数，分数相同时按链接和标题排序
+        ranked = sorted(
+            articles,
+            key=lambda x: (-self.score_article(x), x.get('url', ''), x.get('title', ''))
+        )
+        
         formatted_articles = []
+        used_tokens = 0
         
-        for i, article in enumerate(articles[:20], 1):  # 只处理前20篇
-            formatted_article = f"""
-文章 {i}:
+        for article in ranked[:max_articles or settings.AI_PROMPT_MAX_ARTICLES]:
+            # 已增强的文章使用一句话摘要
+            summary = truncate_to_tokens(
+                article.get('ai_summary') or article.get('summary') or 'N/A', settings.AI_SUMMARY_MAX_TOKENS
+            )
+            formatted_article = self._format_article(len(formatted_articles) + 1, article, summary)
+            tokens = estimate_tokens(formatted_article)
+            
+            if used_tokens + tokens > budget:
+                # 剩余空间不够时缩短摘要，连最短摘要都放不下则停止
+                header_tokens = estimate_tokens(self._format_article(len(formatted_articles) + 1, article, ""))
+                remaining = budget - used_tokens - header_tokens
+                if remaining < min_summary_tokens:
+                    break
+                summary = truncate_to_tokens(summary, remaining)
+                formatted_article = self._format_article(len(formatted_articles) + 1, article, summary)
+                tokens = estimate_tokens(formatted_article)
+            
+            formatted_articles.append(formatted_article)
+            used_tokens += tokens
+        
+        logger.debug(f"提示词包含 {len(formatted_articles)}/{len(articles)} 篇文章，约 {used_tokens} tokens")
+        return "\n".join(formatted_articles)
+    
+    def _format_article(self, index: int, article: Dict[str, Any], summary: str) -> str:
+        """格式化单篇文章"""
+        tags = f"标签: {'、'.join(article['tags'])}\n" if article.get('tags') else ""
+        return f"""
+文章 {index}:
 标题: {article.get('title', 'N/A')}
 来源: {article.get('source', 'N/A')}
 发布时间: {article.get('publish_time', 'N/A')}
-摘要: {article.get('summary', 'N/A')}
-链接: {article.get('url', 'N/A')}
+摘要: {summary}
+{tags}链接: {article.get('url', 'N/A')}
 """
-            formatted_articles.append(formatted_article)
-        
-        return "\n".join(formatted_articles)
     
-    async def _generate_summary(self, articles_text: str) -> str:
+    async def _generate_summary(self, articles_text: str, use_cache: bool = True,
+                                usage: Optional[Dict[str, int]] = None) -> str:
         """生成早报摘要"""
         try:
-            if not self.ai_client:
+            if not self.router:
                 return self._get_mock_summary()
-                
-            prompt = AI_PROMPTS['summary'].format(articles=articles_text)
             
-            response = await self.ai_client.chat.completions.create(
-                model=self.ai_model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的AI科技早报编辑，擅长将复杂的科技新闻整理成简洁易懂的早报。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            summary = response.choices[0].message.content.strip()
+            summary = await self._run_task('summary', articles_text, use_cache, usage)
             logger.info("早报摘要生成成功")
             return summary
             
         except Exception as e:
             logger.error(f"生成早报摘要失败: {e}")
-            return "今日AI科技新闻摘要生成失败，请查看详细内容。"
+            return self._fallback_result('summary')
     
-    async def _analyze_trends(self, articles_text: str) -> List[str]:
+    async def _analyze_trends(self, articles_text: str, use_cache: bool = True,
+                              usage: Optional[Dict[str, int]] = None) -> List[str]:
         """分析AI发展趋势"""
         try:
-            if not self.ai_client:
+            if not self.router:
                 return self._get_mock_trends()
-                
-            prompt = AI_PROMPTS['trends'].format(articles=articles_text)
             
-            response = await self.ai_client.chat.completions.create(
-                model=self.ai_model,
-                messages=[
-                    {"role": "system", "content": "你是一个AI行业分析师，擅长识别和分析AI技术的发展趋势。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.7
-            )
-            
-            trends_text = response.choices[0].message.content.strip()
-            
-            # 将趋势文本转换为列表
-            trends = [trend.strip() for trend in trends_text.split('\n') if trend.strip()]
+            trends = await self._run_task('trends', articles_text, use_cache, usage)
             logger.info(f"分析出 {len(trends)} 个发展趋势")
             return trends
             
         except Exception as e:
             logger.error(f"分析发展趋势失败: {e}")
-            return ["AI技术持续快速发展", "各行业AI应用不断深化"]
+            return self._fallback_result('trends')
     
-    async def _generate_image_prompts(self, articles_text: str) -> List[str]:
+    async def _generate_image_prompts(self, articles_text: str, use_cache: bool = True,
+                                      usage: Optional[Dict[str, int]] = None) -> List[str]:
         """生成图片提示词"""
         try:
-            if not self.ai_client:
+            if not self.router:
                 return self._get_mock_image_prompts()
-                
-            prompt = AI_PROMPTS['image_prompts'].format(articles=articles_text)
-            
-            response = await self.ai_client.chat.completions.create(
-                model=self.ai_model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的视觉设计师，擅长为AI科技内容创作视觉提示词。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.8
-            )
-            
-            prompts_text = response.choices[0].message.content.strip()
-            
-            # 将提示词文本转换为列表
-            prompts = [prompt.strip() for prompt in prompts_text.split('\n') if prompt.strip()]
-            
-            # 确保有3个提示词
-            while len(prompts) < 3:
-                prompts.append("AI科技未来场景，简洁现代设计风格")
             
+            prompts = await self._run_task('image_prompts', articles_text, use_cache, usage)
             logger.info(f"生成了 {len(prompts)} 个图片提示词")
-            return prompts[:3]
+            return prompts
             
         except Exception as e:
             logger.error(f"生成图片提示词失败: {e}")
-            return [
-                "AI科技未来场景，简洁现代设计风格",
-                "人工智能与人类协作，科技感十足",
-                "数字化世界，AI驱动的未来生活"
-            ]
+            return self._fallback_result('image_prompts')
+    
+    async def _run_task(self, task: str, articles_text: str, use_cache: bool,
+                        usage: Optional[Dict[str, int]]):
+        """调用AI生成早报的一个部分并解析结果"""
+        params = SEPARATE_TASKS[task]
+        text = await self._chat(
+            params['system'],
+            AI_PROMPTS[task].format(articles=articles_text),
+            max_tokens=params['max_tokens'],
+            temperature=params['temperature'],
+            use_cache=use_cache,
+            usage=usage
+        )
+        return self._parse_task_result(task, text)
+    
+    def _parse_task_result(self, task: str, text: str):
+        """将模型输出转换为早报对应部分的格式"""
+        if task == 'summary':
+            return text.strip()
+        
+        # 趋势和图片提示词按行转换为列表
+        items = [line.strip() for line in text.split('\n') if line.strip()]
+        if task == 'image_prompts':
+            return self._normalize_image_prompts(items)
+        return items
+    
+    def _fallback_result(self, task: str):
+        """生成失败时使用的默认内容"""
+        fallback = SEPARATE_TASKS[task]['fallback']
+        return list(fallback) if isinstance(fallback, list) else fallback
+    
+    def _normalize_image_prompts(self, prompts: List[str]) -> List[str]:
+        """确保有3个提示词"""
+        prompts = list(prompts)
+        while len(prompts) < 3:
+            prompts.append("AI科技未来场景，简洁现代设计风格")
+        return prompts[:3]
     
     def _get_mock_summary(self) -> str:
         """获取模拟摘要数据"""
@@ -210,20 +719,18 @@ AI技术正在改变我们的生活方式，未来充满无限可能。"""
                 "trend": "请将以下内容优化为更专业的发展趋势分析："
             }
             
+            if not self.router:
+                return content
+            
             prompt = enhancement_prompts.get(enhancement_type, "请优化以下内容：")
             full_prompt = f"{prompt}\n\n{content}"
             
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "你是一个专业的内容编辑，擅长优化各种类型的文本内容。"},
-                    {"role": "user", "content": full_prompt}
-                ],
+            enhanced_content = await self._chat(
+                "你是一个专业的内容编辑，擅长优化各种类型的文本内容。",
+                full_prompt,
                 max_tokens=300,
                 temperature=0.7
             )
-            
-            enhanced_content = response.choices[0].message.content.strip()
             logger.info(f"内容增强成功: {enhancement_type}")
             return enhanced_content
             
@@ -233,60 +740,45 @@ AI技术正在改变我们的生活方式，未来充满无限可能。"""
     
     def filter_articles_by_keywords(self, articles: List[Dict[str, Any]], keywords: List[str]) -> List[Dict[str, Any]]:
         """根据关键词过滤文章"""
+        # 空关键词匹配所有文章
+        if any(not keyword for keyword in keywords):
+            return list(articles)
+        
+        matcher = get_keyword_matcher({'keywords': keywords})
         filtered_articles = []
         
         for article in articles:
-            title = article.get('title', '').lower()
-            summary = article.get('summary', '').lower()
-            content = article.get('content', '').lower()
-            
             # 检查是否包含任何关键词
-            for keyword in keywords:
-                if keyword.lower() in title or keyword.lower() in summary or keyword.lower() in content:
-                    filtered_articles.append(article)
-                    break
+            if matcher.find_all(article.get('title', ''), article.get('summary', ''), article.get('content', '')):
+                filtered_articles.append(article)
         
         return filtered_articles
     
-    def rank_articles_by_importance(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """根据重要性对文章进行排序"""
-        # 定义重要性关键词
-        importance_keywords = {
-            'high': ['突破', '重大', '首次', '革命性', '里程碑', '创新', '领先'],
-            'medium': ['发布', '推出', '合作', '投资', '融资', '上市'],
-            'low': ['更新', '优化', '改进', '修复', '调整']
-        }
+    def score_article(self, article: Dict[str, Any]) -> float:
+        """计算单篇文章的重要性分数，经过AI增强的文章计入AI重要性评分"""
+        matcher = get_keyword_matcher(IMPORTANCE_KEYWORDS)
         
-        def calculate_importance_score(article):
-            score = 0
-            title = article.get('title', '').lower()
-            summary = article.get('summary', '').lower()
-            
-            # 检查高重要性关键词
-            for keyword in importance_keywords['high']:
-                if keyword in title or keyword in summary:
-                    score += 3
-            
-            # 检查中等重要性关键词
-            for keyword in importance_keywords['medium']:
-                if keyword in title or keyword in summary:
-                    score += 2
-            
-            # 检查低重要性关键词
-            for keyword in importance_keywords['low']:
-                if keyword in title or keyword in summary:
-                    score += 1
-            
-            # 根据来源权重调整分数
-            source_weight = article.get('source_weight', 1.0)
-            score *= source_weight
-            
-            return score
+        # 每个等级按命中的不同关键词计分：高3分、中2分、低1分
+        counts = matcher.group_counts(article.get('title', ''), article.get('summary', ''))
+        score = counts['high'] * 3 + counts['medium'] * 2 + counts['low'] * 1
+        
+        # AI重要性评分为1-10分
+        ai_importance = article.get('ai_importance')
+        if ai_importance:
+            score += ai_importance * settings.AI_IMPORTANCE_WEIGHT
         
+        # 根据来源权重调整分数
+        source_weight = article.get('source_weight', 1.0)
+        score *= source_weight
+        
+        return score
+    
+    def rank_articles_by_importance(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """根据重要性对文章进行排序"""
         # 计算分数并排序
         scored_articles = []
         for article in articles:
-            article['importance_score'] = calculate_importance_score(article)
+            article['importance_score'] = self.score_article(article)
             scored_articles.append(article)
         
         # 按分数降序排序
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地文章向量索引
+使用字符n-gram特征哈希生成文章向量，无需模型和网络；向量以NumPy内存映射文件保存，
+文章元数据保存在sqlite中，支持批量余弦相似度top-k检索和相似文章聚类
+"""
+
+import hashlib
+import math
+import os
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from loguru import logger
+
+from crawler.near_dup import char_ngrams
+from crawler.storage import connect_database
+
+DTYPE = np.float32
+
+
+class HashingEmbedder:
+    """字符n-gram特征哈希向量"""
+
+    def __init__(self, dim: int = 512, ngram_sizes: tuple = (2, 3)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def _features(self, text: str) -> Counter:
+        features = Counter()
+        for n in self.ngram_sizes:
+            features.update(char_ngrams(text, n))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """批量生成L2归一化的向量，返回 (len(texts), dim) 矩阵"""
+        matrix = np.zeros((len(texts), self.dim), dtype=DTYPE)
+        for row, text in enumerate(texts):
+            for gram, count in self._features(text).items():
+                value = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+                # 用一位决定符号，减少哈希冲突带来的偏差
+                sign = 1.0 if value & 1 else -1.0
+                matrix[row, (value >> 1) % self.dim] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def article_embedding_text(article: Dict[str, Any]) -> str:
+    """用于生成向量的文章文本，标题出现两次以提高权重"""
+    title = article.get('title', '')
+    summary = article.get('ai_summary') or article.get('summary', '')
+    return f"{title} {title} {summary}"
+
+
+def cluster_vectors(vectors: np.ndarray, threshold: float = 0.3) -> List[int]:
+    """按输入顺序贪心聚类：未归类的向量成为新簇的中心，相似度不低于threshold的向量归入该簇
+
+    输入按重要性排序时，每个簇的中心就是簇内最重要的文章
+    """
+    count = len(vectors)
+    labels = [-1] * count
+    if count == 0:
+        return labels
+
+    similarity = vectors @ vectors.T
+    cluster_id = 0
+    for i in range(count):
+        if labels[i] != -1:
+            continue
+        labels[i] = cluster_id
+        for j in np.nonzero(similarity[i] >= threshold)[0]:
+            if labels[j] == -1:
+                labels[j] = cluster_id
+        cluster_id += 1
+    return labels
+
+
+def cluster_articles(articles: List[Dict[str, Any]], embedder: HashingEmbedder,
+                     threshold: float = 0.3) -> int:
+    """为文章设置cluster_id和cluster_size，返回簇数"""
+    if not articles:
+        return 0
+
+    vectors = embedder.embed([article_embedding_text(article) for article in articles])
+    labels = cluster_vectors(vectors, threshold)
+    sizes = Counter(labels)
+    for article, label in zip(articles, labels):
+        article['cluster_id'] = label
+        article['cluster_size'] = sizes[label]
+    return len(sizes)
+
+
+class EmbeddingIndex:
+    """文章向量索引"""
+
+    def __init__(self, path: str, embedder: HashingEmbedder, initial_capacity: int = 1024):
+        """打开或创建向量文件和元数据表"""
+        self.path = path
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.initial_capacity = initial_capacity
+
+        self.db = connect_database()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS article_vectors (
+                row_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                source TEXT,
+                summary TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_article_vectors_created_at ON article_vectors (created_at);
+            CREATE TABLE IF NOT EXISTS article_vectors_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        row = self.db.execute("SELECT value FROM article_vectors_meta WHERE key = 'dim'").fetchone()
+        self._dim_changed = row is not None and int(row['value']) != self.dim
+        self.db.execute(
+            "INSERT OR REPLACE INTO article_vectors_meta (key, value) VALUES ('dim', ?)", (str(self.dim),)
+        )
+        self.db.commit()
+
+        self.size = self._stored_size()
+        self._matrix: Optional[np.memmap] = None
+        self._open(max(self.initial_capacity, self.size))
+
+    def _stored_size(self) -> int:
+        """数据库中已收录的向量行数；API服务与定时任务共用索引，行数以数据库为准"""
+        return self.db.execute("SELECT COALESCE(MAX(row_id) + 1, 0) FROM article_vectors").fetchone()[0]
+
+    def _refresh(self):
+        """同步其他进程新增的向量，向量文件变大时重新映射"""
+        self.size = self._stored_size()
+        if self.size > self.capacity:
+            self._open(self.size)
+
+    def _open(self, capacity: int):
+        """以内存映射方式打开向量文件，容量不足时扩大文件"""
+        row_bytes = self.dim * np.dtype(DTYPE).itemsize
+        existing = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+        if self._dim_changed or existing % row_bytes or existing // row_bytes < self.size:
+            # 向量维度变化或文件损坏，清空索引后重新积累
+            logger.warning(f"向量文件 {self.path} 与当前配置不一致，已重建索引")
+            self.db.execute("DELETE FROM article_vectors")
+            self.db.commit()
+            self.size = 0
+            existing = 0
+            self._dim_changed = False
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+        capacity = max(capacity, existing // row_bytes)
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            f.truncate(capacity * row_bytes)
+        self._matrix = np.memmap(self.path, dtype=DTYPE, mode='r+', shape=(capacity, self.dim))
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    def add(self, articles: List[Dict[str, Any]]) -> int:
+        """添加文章向量，已收录的链接跳过，返回新增数量
+
+        分配行号和写入向量在同一个写事务中完成，多个进程同时添加时不会占用相同的行
+        """
+        candidates = {}
+        for article in articles:
+            url = article.get('url')
+            if url and url not in candidates:
+                candidates[url] = article
+        if not candidates:
+            return 0
+
+        # 写锁之外先计算向量，缩短持有写锁的时间
+        texts = [article_embedding_text(article) for article in candidates.values()]
+        vectors = dict(zip(candidates, self.embedder.embed(texts)))
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            new_articles = [
+                article for url, article in candidates.items()
+                if self.db.execute("SELECT 1 FROM article_vectors WHERE url = ?", (url,)).fetchone() is None
+            ]
+            if not new_articles:
+                self.db.rollback()
+                return 0
+
+            start = self._stored_size()
+            end = start + len(new_articles)
+            now = time.time()
+            self.db.executemany(
+                """
+                INSERT INTO article_vectors (row_id, url, title, source, summary, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (start + offset, article['url'], article.get('title', ''), article.get('source', ''),
+                     article.get('ai_summary') or article.get('summary', ''), now)
+                    for offset, article in enumerate(new_articles)
+                ]
+            )
+
+            # 元数据插入成功后再写向量，提交前写入文件，其他进程看到新行时向量已就绪
+            if end > self.capacity:
+                self._open(max(self.capacity * 2, end))
+            self._matrix[start:end] = np.stack([vectors[article['url']] for article in new_articles])
+            self._matrix.flush()
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+
+        self.size = end
+        return len(new_articles)
+
+    def search_batch(self, queries: List[str], top_k: int = 10,
+                     days: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """批量检索，每个查询返回余弦相似度最高的top_k篇文章"""
+        self._refresh()
+        if self.size == 0 or not queries:
+            return [[] for _ in queries]
+
+        rows = None
+        matrix = self._matrix[:self.size]
+        if days:
+            cutoff = time.time() - days * 86400
+            rows = np.array([
+                row['row_id'] for row in self.db.execute(
+                    "SELECT row_id FROM article_vectors WHERE created_at >= ?", (cutoff,)
+                )
+            ], dtype=np.int64)
+            if len(rows) == 0:
+                return [[] for _ in queries]
+            matrix = matrix[rows]
+
+        scores = self.embedder.embed(queries) @ matrix.T  # (查询数, 文章数)
+        k = min(top_k, scores.shape[1])
+
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, k - 1)[:k]
+            top = top[np.argsort(-query_scores[top])]
+            row_ids = [int(rows[i]) if rows is not None else int(i) for i in top]
+            results.append(self._describe(row_ids, [float(query_scores[i]) for i in top]))
+        return results
+
+    def search(self, query: str, top_k: int = 10, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """检索与查询最相似的文章"""
+        return self.search_batch([query], top_k, days)[0]
+
+    def _describe(self, row_ids: List[int], scores: List[float]) -> List[Dict[str, Any]]:
+        """查询文章元数据"""
+        if not row_ids:
+            return []
+        placeholders = ",".join("?" * len(row_ids))
+        rows = {
+            row['row_id']: row for row in self.db.execute(
+                f"SELECT * FROM article_vectors WHERE row_id IN ({placeholders})", row_ids
+            )
+        }
+        return [
+            {
+                'title': rows[row_id]['title'],
+                'url': rows[row_id]['url'],
+                'source': rows[row_id]['source'],
+                'summary': rows[row_id]['summary'],
+                'indexed_at': rows[row_id]['created_at'],
+                'score': round(score, 4)
+            }
+            for row_id, score in zip(row_ids, scores) if row_id in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        self._refresh()
+        return {'articles': self.size, 'capacity': self.capacity, 'dim': self.dim, 'path': self.path}
+
+    def close(self):
+        """写回并关闭向量文件"""
+        if self._matrix is not None:
+            self._matrix.flush()
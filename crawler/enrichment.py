@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐篇文章AI增强
+为每篇文章生成一句话中文摘要、标签和重要性评分，多篇文章合并成一次请求；
+结果按文章内容哈希缓存，同一篇文章只处理一次
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import List, Dict, Any, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+
+from config.settings import AI_PROMPTS
+from crawler.storage import connect_database
+from crawler.token_budget import truncate_to_tokens
+
+
+class EnrichedItem(BaseModel):
+    """单篇文章的增强结果"""
+    id: int
+    summary: str = Field(min_length=1)
+    tags: List[str] = Field(default_factory=list)
+    importance: int = Field(ge=1, le=10)
+
+
+def content_hash(article: Dict[str, Any]) -> str:
+    """文章内容哈希（标题+摘要）"""
+    text = f"{article.get('title', '').strip()}\n{article.get('summary', '').strip()}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ArticleEnricher:
+    """逐篇文章AI增强"""
+
+    def __init__(self, content_processor, batch_size: int = 10, concurrency: int = 2,
+                 summary_max_tokens: int = 150):
+        """初始化增强器和结果缓存表"""
+        self.content_processor = content_processor
+        self.batch_size = max(1, batch_size)
+        self.summary_max_tokens = summary_max_tokens
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._stats = {'cached': 0, 'enriched': 0, 'failed': 0, 'requests': 0}
+
+        self.db = connect_database()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS article_enrichment (
+                content_hash TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                importance INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+        """)
+        self.db.commit()
+
+    async def enrich(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """增强文章列表，结果写回文章的ai_summary、tags、ai_importance字段"""
+        if not self.content_processor.router:
+            return articles
+
+        pending = []
+        for article in articles:
+            if 'ai_summary' in article:
+                continue
+            cached = self._lookup(content_hash(article))
+            if cached:
+                article.update(cached)
+                self._stats['cached'] += 1
+            else:
+                pending.append(article)
+
+        # 同一批次内内容相同的文章只请求一次
+        unique: Dict[str, List[Dict[str, Any]]] = {}
+        for article in pending:
+            unique.setdefault(content_hash(article), []).append(article)
+        groups = list(unique.values())
+
+        batches = [groups[i:i + self.batch_size] for i in range(0, len(groups), self.batch_size)]
+        await asyncio.gather(*(self._enrich_batch(batch) for batch in batches))
+        return articles
+
+    async def _enrich_batch(self, batch: List[List[Dict[str, Any]]]):
+        """一次请求增强一批文章"""
+        async with self._semaphore:
+            self._stats['requests'] += 1
+            try:
+                content = await self.content_processor._chat(
+                    "你是一个专业的AI科技新闻编辑，擅长提炼新闻要点并进行分类。只输出JSON。",
+                    AI_PROMPTS['enrich'].format(articles=self._format_batch(batch)),
+                    max_tokens=80 * len(batch) + 100,
+                    temperature=0.3,
+                    use_cache=False  # 结果按文章缓存，不再按整批提示词缓存
+                )
+            except Exception as e:
+                logger.warning(f"文章增强请求失败: {e}")
+                self._stats['failed'] += len(batch)
+                return
+
+        items = self._parse(content, len(batch))
+        for index, group in enumerate(batch, 1):
+            item = items.get(index)
+            if item is None:
+                self._stats['failed'] += 1
+                continue
+
+            result = {
+                'ai_summary': item.summary.strip(),
+                'tags': [tag.strip() for tag in item.tags if tag.strip()][:5],
+                'ai_importance': item.importance
+            }
+            for article in group:
+                article.update(result)
+            self._store(content_hash(group[0]), result)
+            self._stats['enriched'] += 1
+
+    def _format_batch(self, batch: List[List[Dict[str, Any]]]) -> str:
+        """格式化一批文章，编号从1开始"""
+        lines = []
+        for index, group in enumerate(batch, 1):
+            article = group[0]
+            summary = truncate_to_tokens(article.get('summary', ''), self.summary_max_tokens)
+            lines.append(f"[{index}] 标题: {article.get('title', '')}\n摘要: {summary}")
+        return "\n\n".join(lines)
+
+    def _parse(self, content: str, size: int) -> Dict[int, EnrichedItem]:
+        """解析模型返回的JSON数组，跳过格式不正确的条目
+
+        输出被截断时保留截断位置之前的完整条目
+        """
+        start = content.find('[')
+        if start == -1:
+            logger.warning("文章增强结果不是JSON数组")
+            return {}
+
+        raw_items = self._decode_items(content, start)
+        if not raw_items:
+            logger.warning("文章增强结果JSON解析失败")
+            return {}
+
+        items = {}
+        for raw in raw_items:
+            try:
+                item = EnrichedItem.model_validate(raw)
+            except ValidationError:
+                continue
+            if 1 <= item.id <= size:
+                items[item.id] = item
+        return items
+
+    @staticmethod
+    def _decode_items(content: str, start: int) -> List[Any]:
+        """从start处的'['开始逐个解码数组元素，遇到无法解码的位置时停止"""
+        decoder = json.JSONDecoder()
+        raw_items = []
+        position = start + 1
+        while position < len(content):
+            # 跳过元素之间的空白和逗号
+            while position < len(content) and content[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(content) or content[position] == ']':
+                break
+            try:
+                raw, position = decoder.raw_decode(content, position)
+            except json.JSONDecodeError:
+                break
+            raw_items.append(raw)
+        return raw_items
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute(
+            "SELECT summary, tags, importance FROM article_enrichment WHERE content_hash = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'ai_summary': row['summary'],
+            'tags': json.loads(row['tags']),
+            'ai_importance': row['importance']
+        }
+
+    def _store(self, key: str, result: Dict[str, Any]):
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO article_enrichment (content_hash, summary, tags, importance, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (key, result['ai_summary'], json.dumps(result['tags'], ensure_ascii=False),
+             result['ai_importance'], time.time())
+        )
+        self.db.commit()
+
+    def prune(self, retention_days: int):
+        """清理过期的增强结果"""
+        cutoff = time.time() - retention_days * 86400
+        self.db.execute("DELETE FROM article_enrichment WHERE created_at < ?", (cutoff,))
+        self.db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取增强统计信息"""
+        return dict(self._stats)
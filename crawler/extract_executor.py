@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章提取执行器
+将CPU密集的HTML解析和文章提取放到进程池或线程池中执行，
+避免阻塞事件循环中的页面抓取、AI调用和API请求
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from loguru import logger
+
+from crawler.extraction import init_extraction_worker, extract_in_worker
+from crawler.parsers import get_parser_backend
+
+# 执行方式
+MODE_PROCESS = "process"
+MODE_THREAD = "thread"
+MODE_INLINE = "inline"
+
+
+class ExtractionExecutor:
+    """文章提取执行器"""
+
+    def __init__(self, mode: str = "auto", workers: int = 2, max_pending: int = 8,
+                 backend_name: str = "auto"):
+        """初始化执行器
+
+        mode为auto时：lxml解析时会释放GIL，使用线程池即可；
+        BeautifulSoup是纯Python解析，使用进程池
+        """
+        self.backend_name = backend_name
+        if mode == "auto":
+            backend = get_parser_backend(backend_name)
+            mode = MODE_THREAD if backend.name == "lxml" else MODE_PROCESS
+        self.mode = mode
+        if mode == MODE_INLINE:
+            init_extraction_worker(backend_name)
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._preferred: Dict[str, str] = {}
+        self._stats = {'submitted': 0, 'completed': 0, 'waiting': 0}
+
+    def _get_executor(self) -> Executor:
+        """按需创建执行池"""
+        if self._executor is None:
+            if self.mode == MODE_PROCESS:
+                # spawn避免在已有事件循环和浏览器子进程的进程中fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_extraction_worker,
+                    initargs=(self.backend_name,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="extract",
+                    initializer=init_extraction_worker,
+                    initargs=(self.backend_name,)
+                )
+            logger.info(f"文章提取执行器已启动: {self.mode} x {self.workers}")
+        return self._executor
+
+    async def extract(self, html: str, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """提取文章，排队的任务数超过上限时等待"""
+        preferred = self._preferred.get(source['name'])
+
+        if self.mode == MODE_INLINE:
+            articles, matched = extract_in_worker(html, source, preferred)
+        else:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.max_pending)
+
+            self._stats['waiting'] += 1
+            async with self._slots:
+                self._stats['waiting'] -= 1
+                self._stats['submitted'] += 1
+                loop = asyncio.get_running_loop()
+                articles, matched = await loop.run_in_executor(
+                    self._get_executor(), extract_in_worker, html, source, preferred
+                )
+                self._stats['completed'] += 1
+
+        # 命中的选择器记录在主进程中，下次提交时带给任意工作进程
+        if matched:
+            self._preferred[source['name']] = matched
+        return articles
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器统计信息"""
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'in_flight': self._stats['submitted'] - self._stats['completed'],
+            **self._stats
+        }
+
+    def shutdown(self):
+        """关闭执行池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
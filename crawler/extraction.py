@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章提取引擎
+根据NEWS_SOURCES中每个新闻源的selectors配置提取文章列表，
+选择器按新闻源预编译缓存，并优先尝试上次命中的列表项选择器
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urljoin
+
+from loguru import logger
+
+from crawler.parsers import ParserBackend, get_parser_backend
+
+# 未配置时使用的列表项候选选择器
+DEFAULT_ITEM_SELECTORS = [
+    'div[class*="article-item"]',
+    'div[class*="news-item"]',
+    'article',
+    'div[class*="item"]'
+]
+
+# 所有候选选择器都提取不到文章时使用的通用选择器
+GENERIC_ITEM_SELECTOR = ", ".join(
+    f'{tag}[class*="{keyword}"]'
+    for tag in ('article', 'div')
+    for keyword in ('article', 'news', 'item', 'card')
+)
+
+HEADING_SELECTOR = "h1, h2, h3, h4, h5, h6"
+TITLE_LINK_SELECTOR = 'a[class*="title"]'
+SUMMARY_FALLBACK_SELECTOR = '[class*="summary"], [class*="desc"]'
+LINK_SELECTOR = "a"
+
+
+class SourceRules:
+    """单个新闻源预编译的提取规则"""
+
+    def __init__(self, source: Dict[str, Any], backend: ParserBackend):
+        selectors = source.get('selectors', {})
+        self.fingerprint = self.make_fingerprint(source)
+        self.backend = backend
+
+        self.items = [(selector, backend.compile(selector))
+                      for selector in selectors.get('items') or DEFAULT_ITEM_SELECTORS]
+        self.title = self._compile_chain(selectors.get('title'), HEADING_SELECTOR, TITLE_LINK_SELECTOR)
+        self.link = self._compile_chain(selectors.get('link'))
+        self.summary = self._compile_chain(selectors.get('summary'), 'p', SUMMARY_FALLBACK_SELECTOR)
+
+    @staticmethod
+    def make_fingerprint(source: Dict[str, Any]) -> Tuple:
+        """用于判断新闻源配置是否变化"""
+        selectors = source.get('selectors', {})
+        return (
+            source.get('url'),
+            tuple(selectors.get('items') or ()),
+            selectors.get('title'),
+            selectors.get('link'),
+            selectors.get('summary')
+        )
+
+    def _compile_chain(self, *selectors: Optional[str]) -> list:
+        """按顺序编译一组候选选择器，跳过未配置的项"""
+        return [self.backend.compile(selector) for selector in selectors if selector]
+
+
+class ExtractionEngine:
+    """文章提取引擎"""
+
+    def __init__(self, backend: Optional[ParserBackend] = None, max_items: int = 10,
+                 generic_max_items: int = 15, min_title_length: int = 10):
+        """初始化提取引擎"""
+        self.backend = backend or get_parser_backend()
+        self.max_items = max_items
+        self.generic_max_items = generic_max_items
+        self.min_title_length = min_title_length
+
+        self._rules: Dict[str, SourceRules] = {}
+        self._preferred: Dict[str, str] = {}
+        self._generic = self.backend.compile(GENERIC_ITEM_SELECTOR)
+        self._link = self.backend.compile(LINK_SELECTOR)
+
+    def get_rules(self, source: Dict[str, Any]) -> SourceRules:
+        """获取新闻源的预编译规则，配置变化时重新编译"""
+        rules = self._rules.get(source['name'])
+        if rules is None or rules.fingerprint != SourceRules.make_fingerprint(source):
+            rules = SourceRules(source, self.backend)
+            self._rules[source['name']] = rules
+        return rules
+
+    def extract(self, html: str, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """从页面HTML中提取文章列表"""
+        try:
+            root = self.backend.parse(html)
+            rules = self.get_rules(source)
+
+            for selector, compiled in self._ordered_items(source['name'], rules):
+                elements = self.backend.select(root, compiled)
+                if not elements:
+                    continue
+
+                articles = self._extract_items(elements[:self.max_items], rules, source)
+                if articles:
+                    logger.debug(f"{source['name']} 使用选择器: {selector} (找到 {len(elements)} 个元素)")
+                    self._preferred[source['name']] = selector
+                    return articles
+
+            # 所有候选选择器都没有提取到文章，使用通用选择器
+            logger.debug(f"{source['name']} 使用通用选择器")
+            elements = self.backend.select(root, self._generic, limit=self.generic_max_items)
+            return self._extract_items(elements, rules, source)
+
+        except Exception as e:
+            logger.warning(f"提取 {source['name']} 文章时出错: {e}")
+            return []
+
+    def _ordered_items(self, source_name: str, rules: SourceRules):
+        """上次命中的列表项选择器排在最前"""
+        preferred = self._preferred.get(source_name)
+        return sorted(rules.items, key=lambda item: item[0] != preferred)
+
+    def _extract_items(self, elements, rules: SourceRules, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """从列表项元素中提取文章"""
+        backend = self.backend
+        articles = []
+
+        for element in elements:
+            title_elem = self._first_match(element, rules.title)
+            if title_elem is None:
+                continue
+
+            title = backend.text(title_elem)
+            if len(title) < self.min_title_length:
+                continue
+
+            link_elem = self._first_match(element, rules.link)
+            if link_elem is None:
+                if backend.tag(title_elem) == 'a':
+                    link_elem = title_elem
+                else:
+                    link_elem = backend.select_one(title_elem, self._link)
+                    if link_elem is None:
+                        link_elem = backend.select_one(element, self._link)
+            url = backend.attr(link_elem, 'href') if link_elem is not None else ''
+            if url:
+                url = urljoin(source['url'], url)
+
+            summary_elem = self._first_match(element, rules.summary)
+            summary = backend.text(summary_elem) if summary_elem is not None else title
+
+            articles.append({
+                'title': title,
+                'summary': summary or title,
+                'source': source['name'],
+                'url': url
+            })
+
+        return articles
+
+    def _first_match(self, element, chain):
+        """按顺序尝试候选选择器，返回第一个匹配的元素"""
+        for compiled in chain:
+            match = self.backend.select_one(element, compiled)
+            if match is not None:
+                return match
+        return None
+
+    def get_preferred_selectors(self) -> Dict[str, str]:
+        """各新闻源上次命中的列表项选择器"""
+        return dict(self._preferred)
+
+    def set_preferred_selector(self, source_name: str, selector: str):
+        """设置新闻源优先尝试的列表项选择器"""
+        self._preferred[source_name] = selector
+
+
+# 进程池/线程池工作进程中的提取引擎，每个工作进程只初始化一次
+_worker_engine: Optional[ExtractionEngine] = None
+
+
+def init_extraction_worker(backend_name: str = "auto"):
+    """初始化工作进程中的提取引擎"""
+    global _worker_engine
+    _worker_engine = ExtractionEngine(get_parser_backend(backend_name))
+
+
+def extract_in_worker(html: str, source: Dict[str, Any],
+                      preferred: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """在工作进程中提取文章，返回文章列表和本次命中的列表项选择器"""
+    if _worker_engine is None:
+        init_extraction_worker()
+
+    if preferred:
+        _worker_engine.set_preferred_selector(source['name'], preferred)
+    articles = _worker_engine.extract(html, source)
+    return articles, _worker_engine.get_preferred_selectors().get(source['name'])
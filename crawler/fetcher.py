@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分级页面抓取
+优先使用HTTP直接获取页面，只有在需要渲染时才使用无头浏览器，
+并记录每个新闻源最终成功的抓取方式
+"""
+
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+from crawl4ai import CrawlerRunConfig, CacheMode
+from loguru import logger
+
+from crawler.browser_pool import BrowserPool
+from crawler.http_cache import ValidatorCache, hash_content
+from crawler.storage import connect_database
+
+# 抓取方式
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+# 页面加载后执行的脚本：等待渲染并滚动以触发懒加载
+PAGE_PREPARE_JS = """
+// 等待页面加载完成
+await new Promise(resolve => setTimeout(resolve, 2000));
+
+// 尝试滚动页面以触发懒加载
+window.scrollTo(0, document.body.scrollHeight);
+await new Promise(resolve => setTimeout(resolve, 1500));
+window.scrollTo(0, 0);
+"""
+
+
+class FetchResult:
+    """单次页面抓取结果"""
+
+    def __init__(self, tier: str, html: Optional[str] = None, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, not_modified: bool = False):
+        self.tier = tier
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+        self.content_hash = hash_content(html) if html else None
+
+    @property
+    def ok(self) -> bool:
+        """是否拿到了页面内容或确认页面未变化"""
+        return self.html is not None or self.not_modified
+
+
+class TieredFetcher:
+    """分级页面抓取器"""
+
+    def __init__(self, browser_pool: BrowserPool, user_agent: str, page_timeout: int = 60,
+                 min_articles: int = 3, reprobe_hours: int = 24, max_connections: int = 10,
+                 validator_cache: Optional[ValidatorCache] = None):
+        """初始化抓取器"""
+        self.browser_pool = browser_pool
+        self.validator_cache = validator_cache
+        self.user_agent = user_agent
+        self.page_timeout = page_timeout
+        self.min_articles = min_articles
+        self.reprobe_seconds = reprobe_hours * 3600
+        self.max_connections = max_connections
+
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.db = connect_database()
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_tiers (
+                source_url TEXT PRIMARY KEY,
+                tier TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """获取复用连接的HTTP客户端"""
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.page_timeout, connect=10.0),
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8"
+                }
+            )
+        return self.http_client
+
+    def choose_tier(self, source: Dict[str, Any]) -> str:
+        """选择新闻源的抓取方式"""
+        if source.get('render'):
+            return TIER_BROWSER
+
+        row = self.db.execute(
+            "SELECT tier, updated_at FROM fetch_tiers WHERE source_url = ?",
+            (source['url'],)
+        ).fetchone()
+        if row is None:
+            return TIER_HTTP
+
+        # 记录为浏览器的新闻源定期重新尝试HTTP，页面改版后可以自动降级
+        if row['tier'] == TIER_BROWSER and time.time() - row['updated_at'] > self.reprobe_seconds:
+            return TIER_HTTP
+        return row['tier']
+
+    def record_tier(self, source: Dict[str, Any], tier: str):
+        """记录新闻源成功的抓取方式"""
+        self.db.execute(
+            "INSERT OR REPLACE INTO fetch_tiers (source_url, tier, updated_at) VALUES (?, ?, ?)",
+            (source['url'], tier, time.time())
+        )
+        self.db.commit()
+
+    def needs_escalation(self, tier: str, article_count: int) -> bool:
+        """HTTP抓取得到的文章太少时需要改用浏览器"""
+        return tier == TIER_HTTP and article_count < self.min_articles
+
+    async def fetch(self, source: Dict[str, Any], tier: str) -> FetchResult:
+        """按指定方式抓取页面"""
+        if tier == TIER_HTTP:
+            return await self._fetch_http(source)
+        return await self._fetch_browser(source)
+
+    async def _fetch_http(self, source: Dict[str, Any]) -> FetchResult:
+        """直接通过HTTP获取页面，带上条件请求头"""
+        headers = self.validator_cache.conditional_headers(source['url']) if self.validator_cache else {}
+        try:
+            response = await self._get_http_client().get(source['url'], headers=headers)
+            if response.status_code == 304:
+                return FetchResult(TIER_HTTP, not_modified=True)
+
+            response.raise_for_status()
+            return FetchResult(
+                TIER_HTTP,
+                html=response.text,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        except Exception as e:
+            logger.warning(f"HTTP抓取 {source['name']} 失败: {e}")
+            return FetchResult(TIER_HTTP)
+
+    async def _fetch_browser(self, source: Dict[str, Any]) -> FetchResult:
+        """从页面池借出页面渲染"""
+        async with self.browser_pool.page() as slot:
+            result = await slot.crawler.arun(
+                url=source['url'],
+                config=self.build_run_config(session_id=slot.session_id)
+            )
+
+        if not result.success:
+            logger.warning(f"浏览器抓取 {source['name']} 失败")
+            return FetchResult(TIER_BROWSER)
+        return FetchResult(TIER_BROWSER, html=result.html)
+
+    def build_run_config(self, session_id: Optional[str] = None) -> CrawlerRunConfig:
+        """构建页面爬取配置"""
+        return CrawlerRunConfig(
+            session_id=session_id,
+            wait_until="networkidle",
+            delay_before_return_html=3,
+            page_timeout=self.page_timeout * 1000,
+            cache_mode=CacheMode.BYPASS,
+            js_code=PAGE_PREPARE_JS
+        )
+
+    def get_tiers(self) -> Dict[str, str]:
+        """获取所有新闻源记录的抓取方式"""
+        rows = self.db.execute("SELECT source_url, tier FROM fetch_tiers").fetchall()
+        return {row['source_url']: row['tier'] for row in rows}
+
+    async def close(self):
+        """关闭HTTP客户端"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表页验证缓存
+按新闻源URL保存ETag、Last-Modified、页面内容哈希以及上次提取的文章列表，
+页面未变化时直接复用上次的结果
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+from crawler.storage import connect_database
+
+
+def hash_content(html: str) -> str:
+    """计算页面内容哈希"""
+    return hashlib.sha256(html.encode('utf-8', errors='ignore')).hexdigest()
+
+
+class ValidatorCache:
+    """HTTP验证缓存"""
+
+    def __init__(self):
+        """初始化缓存表"""
+        self.db = connect_database()
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS http_validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                articles TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """获取URL的缓存记录"""
+        row = self.db.execute(
+            "SELECT etag, last_modified, content_hash, articles FROM http_validators WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            'etag': row['etag'],
+            'last_modified': row['last_modified'],
+            'content_hash': row['content_hash'],
+            'articles': json.loads(row['articles'])
+        }
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """构建条件请求头"""
+        entry = self.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def lookup_unchanged(self, url: str, content_hash: Optional[str], not_modified: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """页面未变化（304或内容哈希相同）时返回上次的文章列表"""
+        entry = self.get(url)
+        if not entry or not entry['articles']:
+            return None
+
+        if not_modified or (content_hash and content_hash == entry['content_hash']):
+            return entry['articles']
+        return None
+
+    def store(self, url: str, content_hash: str, articles: List[Dict[str, Any]],
+              etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """保存页面验证信息和提取结果"""
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO http_validators
+                (url, etag, last_modified, content_hash, articles, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (url, etag, last_modified, content_hash, json.dumps(articles, ensure_ascii=False), time.time())
+        )
+        self.db.commit()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多关键词匹配
+基于Aho–Corasick自动机，一次扫描文本即可找出所有命中的关键词，
+耗时只与文本长度有关，与关键词数量无关，适合较大的用户关注词表
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Iterable, Set, Tuple
+
+
+class KeywordMatcher:
+    """Aho–Corasick多关键词匹配器（不区分大小写）"""
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        """按分组构建自动机，keywords为 {分组名: 关键词列表}"""
+        self.keywords: List[str] = []
+        self.groups: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for group, words in keywords.items():
+            for word in words:
+                word = word.lower()
+                if not word or (group, word) in seen:
+                    continue
+                seen.add((group, word))
+                self._insert(word, len(self.keywords))
+                self.keywords.append(word)
+                self.groups.append(group)
+
+        self._build_failure_links()
+
+    def _insert(self, word: str, keyword_id: int):
+        node = 0
+        for char in word:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] += (keyword_id,)
+
+    def _build_failure_links(self):
+        """广度优先计算失配指针，并把失配链上的输出合并到当前节点"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] += self._output[self._fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        """扫描文本，返回命中的关键词编号"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def find_all(self, *texts: str) -> Set[int]:
+        """分别扫描多个字段并合并结果，不会跨字段拼出关键词"""
+        found = set()
+        for text in texts:
+            if text:
+                found |= self.find(text)
+        return found
+
+    def matched_keywords(self, *texts: str) -> List[str]:
+        """命中的关键词"""
+        return sorted({self.keywords[i] for i in self.find_all(*texts)})
+
+    def group_counts(self, *texts: str) -> Dict[str, int]:
+        """每个分组命中的不同关键词数量"""
+        counts = {group: 0 for group in dict.fromkeys(self.groups)}
+        for keyword_id in self.find_all(*texts):
+            counts[self.groups[keyword_id]] += 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+
+@lru_cache(maxsize=32)
+def _compile(keywords: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> KeywordMatcher:
+    return KeywordMatcher({group: words for group, words in keywords})
+
+
+def get_keyword_matcher(keywords: Dict[str, Iterable[str]]) -> KeywordMatcher:
+    """获取关键词表对应的匹配器，相同的关键词表只构建一次"""
+    key = tuple((group, tuple(words)) for group, words in keywords.items())
+    return _compile(key)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI响应缓存
+以（模型, 系统提示词, 用户提示词, temperature, max_tokens）的内容哈希为键持久化模型输出，
+支持过期时间和按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, Any, Optional
+
+from crawler.storage import connect_database
+
+
+class LLMResponseCache:
+    """AI响应缓存"""
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 1000):
+        """初始化缓存表"""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+
+        self.db = connect_database()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access);
+        """)
+        self.db.commit()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str,
+                 temperature: float, max_tokens: int) -> str:
+        """计算请求内容的哈希键"""
+        payload = json.dumps(
+            [model, system_prompt, user_prompt, temperature, max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，过期或不存在时返回None"""
+        row = self.db.execute(
+            "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None:
+            self._stats['misses'] += 1
+            return None
+
+        if self.ttl_seconds and now - row['created_at'] > self.ttl_seconds:
+            self.db.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+            self.db.commit()
+            self._stats['expired'] += 1
+            self._stats['misses'] += 1
+            return None
+
+        self.db.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+        self.db.commit()
+        self._stats['hits'] += 1
+        return row['response']
+
+    def put(self, key: str, model: str, response: str):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        now = time.time()
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO llm_cache (cache_key, model, response, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (key, model, response, now, now)
+        )
+        self._stats['writes'] += 1
+
+        if self.max_entries:
+            overflow = self.size() - self.max_entries
+            if overflow > 0:
+                self.db.execute(
+                    """
+                    DELETE FROM llm_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_cache ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,)
+                )
+                self._stats['evictions'] += overflow
+        self.db.commit()
+
+    def size(self) -> int:
+        """当前缓存条目数"""
+        return self.db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self):
+        """清空缓存"""
+        self.db.execute("DELETE FROM llm_cache")
+        self.db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中率等统计信息"""
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            'entries': self.size(),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+            **self._stats
+        }
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多服务商AI调用路由
+同时持有多个AI服务（火山方舟DeepSeek、OpenAI、Anthropic），按滚动窗口统计各服务的
+p50/p95延迟和错误率，每次调用发往最快的健康服务；超过对冲阈值仍未返回时向下一个服务
+发送相同请求，先返回的结果生效，另一个请求被取消
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+import openai
+from loguru import logger
+
+try:
+    import anthropic
+except ImportError:  # Anthropic为可选依赖
+    anthropic = None
+
+
+class ChatResult:
+    """一次调用的结果，流式调用时表示一个片段"""
+
+    def __init__(self, content: str = "", prompt_tokens: int = 0, completion_tokens: int = 0,
+                 backend: str = ""):
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.backend = backend
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """判断是否为429限流错误"""
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if anthropic is not None and isinstance(error, anthropic.RateLimitError):
+        return True
+    return getattr(error, 'status_code', None) == 429
+
+
+class BackendStats:
+    """单个服务的滚动窗口统计"""
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, cooldown: float = 30.0,
+                 recent_window: int = 5):
+        self.samples = deque(maxlen=window)  # (延迟秒数, 是否成功)，只记录实际完成的调用
+        # 最近几次调用是否因对冲落败被取消，窗口较短，服务变慢后能很快反映到排序上
+        self.outcomes = deque(maxlen=recent_window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_errors = 0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.wins = 0
+
+    def record_success(self, latency: float):
+        self.samples.append((latency, True))
+        self.outcomes.append(False)
+        self.requests += 1
+        self.consecutive_errors = 0
+
+    def record_cancelled(self, elapsed: float):
+        """被对冲请求抢先后取消；实际延迟未知，不计入延迟样本，只单独计数"""
+        self.outcomes.append(True)
+        self.cancelled += 1
+
+    def record_error(self, latency: float):
+        self.samples.append((latency, False))
+        self.outcomes.append(False)
+        self.requests += 1
+        self.errors += 1
+        self.consecutive_errors += 1
+        # 连续失败后暂停一段时间，之后允许再次尝试
+        if self.consecutive_errors >= self.failure_threshold:
+            self.unhealthy_until = time.monotonic() + self.cooldown
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def cancel_rate(self) -> float:
+        """最近调用中对冲落败被取消的比例"""
+        if not self.outcomes:
+            return 0.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """成功调用延迟的分位数，没有样本时返回None"""
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[int(round(q * (len(latencies) - 1)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            'healthy': self.healthy,
+            'p50_seconds': round(p50, 3) if p50 is not None else None,
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'cancel_rate': round(self.cancel_rate, 3),
+            'samples': len(self.samples),
+            'requests': self.requests,
+            'errors': self.errors,
+            'cancelled': self.cancelled,
+            'wins': self.wins
+        }
+
+
+class LLMBackend(ABC):
+    """AI服务基类"""
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+        self.stats = BackendStats()
+
+    @abstractmethod
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int,
+                       temperature: float) -> ChatResult:
+        """一次性返回完整结果"""
+
+    @abstractmethod
+    def stream(self, system_prompt: str, prompt: str, max_tokens: int,
+               temperature: float) -> AsyncIterator[ChatResult]:
+        """逐段返回生成的文本，token用量在content为空的片段中返回"""
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """OpenAI接口兼容的服务（OpenAI、火山方舟）"""
+
+    def __init__(self, name: str, client: openai.AsyncOpenAI, model: str):
+        super().__init__(name, model)
+        self.client = client
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int,
+                       temperature: float) -> ChatResult:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        result = ChatResult(response.choices[0].message.content or "")
+        if response.usage is not None:
+            result.prompt_tokens = response.usage.prompt_tokens or 0
+            result.completion_tokens = response.usage.completion_tokens or 0
+        return result
+
+    async def stream(self, system_prompt: str, prompt: str, max_tokens: int,
+                     temperature: float) -> AsyncIterator[ChatResult]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            # 流式响应默认不带token用量，需要显式请求在最后一个片段中返回；
+            # 通过extra_body传入，兼容不认识stream_options参数的旧版SDK
+            extra_body={"stream_options": {"include_usage": True}}
+        )
+        async for chunk in stream:
+            usage = getattr(chunk, 'usage', None)
+            if usage is not None:
+                yield ChatResult("", usage.prompt_tokens or 0, usage.completion_tokens or 0)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield ChatResult(chunk.choices[0].delta.content)
+
+
+class AnthropicBackend(LLMBackend):
+    """Anthropic服务"""
+
+    def __init__(self, api_key: str, model: str):
+        super().__init__("anthropic", model)
+        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int,
+                       temperature: float) -> ChatResult:
+        response = await self.client.messages.create(
+            model=self.model,
+            system=system_prompt,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        content = "".join(block.text for block in response.content if getattr(block, 'type', '') == 'text')
+        return ChatResult(content, response.usage.input_tokens, response.usage.output_tokens)
+
+    async def stream(self, system_prompt: str, prompt: str, max_tokens: int,
+                     temperature: float) -> AsyncIterator[ChatResult]:
+        stream = await self.client.messages.create(
+            model=self.model,
+            system=system_prompt,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        async for event in stream:
+            if event.type == 'message_start':
+                yield ChatResult("", event.message.usage.input_tokens, 0)
+            elif event.type == 'content_block_delta' and getattr(event.delta, 'text', None):
+                yield ChatResult(event.delta.text)
+            elif event.type == 'message_delta' and event.usage is not None:
+                yield ChatResult("", 0, event.usage.output_tokens)
+
+
+class LLMRouter:
+    """多服务商AI调用路由"""
+
+    def __init__(self, backends: List[LLMBackend], hedge_enabled: bool = True,
+                 hedge_after: float = 0.0, default_hedge_after: float = 20.0, rate_limiter=None):
+        """初始化路由
+
+        hedge_after为0时按当前首选服务的p95延迟决定对冲时机，样本不足时使用default_hedge_after；
+        传入rate_limiter时对冲请求另外占用一个限流许可，调用方的许可只覆盖首个请求
+        """
+        self.backends = backends
+        self.hedge_enabled = hedge_enabled
+        self.hedge_after = hedge_after
+        self.default_hedge_after = default_hedge_after
+        self.rate_limiter = rate_limiter
+        self._stats = {'hedges': 0, 'hedge_wins': 0, 'failovers': 0}
+
+    @property
+    def model_id(self) -> str:
+        """路由的整体标识，由所有服务及其模型组成；任一服务可能作答，缓存键使用该标识"""
+        return "+".join(f"{backend.name}/{backend.model}" for backend in self.backends)
+
+    def model_of(self, backend_name: str) -> str:
+        """返回指定服务使用的模型名"""
+        for backend in self.backends:
+            if backend.name == backend_name:
+                return backend.model
+        return backend_name
+
+    def ordered_backends(self) -> List[LLMBackend]:
+        """按健康状况、错误率、对冲落败率和p50延迟排序；没有样本的服务按配置顺序排在
+        有样本的服务之后，在对冲或故障转移时获得样本。被取消的调用不计入延迟样本，
+        经常在对冲中落败的服务通过落败率排到后面
+        """
+        def sort_key(item):
+            priority, backend = item
+            p50 = backend.stats.percentile(0.5)
+            return (
+                not backend.stats.healthy,
+                backend.stats.error_rate > 0.5,
+                backend.stats.cancel_rate > 0.5,
+                p50 is None,
+                p50 or 0.0,
+                priority
+            )
+        return [backend for _, backend in sorted(enumerate(self.backends), key=sort_key)]
+
+    def _hedge_delay(self, backend: LLMBackend) -> Optional[float]:
+        """对冲请求的等待时间"""
+        if not self.hedge_enabled:
+            return None
+        if self.hedge_after > 0:
+            return self.hedge_after
+        if len(backend.stats.samples) >= 5:
+            return backend.stats.percentile(0.95) or self.default_hedge_after
+        return self.default_hedge_after
+
+    async def _hedge_call(self, backend: LLMBackend, timing: Dict[str, float], estimated_tokens: int,
+                          system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> ChatResult:
+        """对冲请求与首个请求同时进行，另外占用一个限流许可；延迟从取得许可后开始计算"""
+        async with self.rate_limiter.slot(estimated_tokens) as permit:
+            timing['started'] = time.monotonic()
+            try:
+                result = await backend.complete(system_prompt, prompt, max_tokens, temperature)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    permit.mark_rate_limited()
+                raise
+            if result.total_tokens:
+                permit.record_tokens(result.total_tokens)
+            return result
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int,
+                       temperature: float, estimated_tokens: int = 0) -> ChatResult:
+        """调用最快的健康服务，超时未返回时对冲，失败时转移到下一个服务
+
+        estimated_tokens为对冲请求申请限流许可时使用的token估算值
+        """
+        candidates = self.ordered_backends()
+        if not candidates:
+            raise RuntimeError("没有可用的AI服务")
+
+        pending: Dict[asyncio.Task, tuple] = {}
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch(hedge: bool = False):
+            backend = candidates.pop(0)
+            timing = {'started': time.monotonic()}
+            if hedge and self.rate_limiter is not None:
+                coro = self._hedge_call(backend, timing, estimated_tokens,
+                                        system_prompt, prompt, max_tokens, temperature)
+            else:
+                # 首个请求和故障转移的请求依次进行，使用调用方的许可
+                coro = backend.complete(system_prompt, prompt, max_tokens, temperature)
+            pending[asyncio.create_task(coro)] = (backend, timing)
+
+        launch()
+        primary = next(iter(pending.values()))[0]
+        try:
+            while pending:
+                timeout = None
+                if not hedged and candidates and len(pending) == 1:
+                    timeout = self._hedge_delay(primary)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 超过对冲阈值仍未返回，向下一个服务发送相同请求
+                    hedged = True
+                    self._stats['hedges'] += 1
+                    logger.debug(f"{primary.name} 超过 {timeout:.1f}s 未返回，同时请求 {candidates[0].name}")
+                    launch(hedge=True)
+                    continue
+
+                for task in done:
+                    backend, timing = pending.pop(task)
+                    latency = time.monotonic() - timing['started']
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        backend.stats.record_error(latency)
+                        last_error = e
+                        logger.warning(f"AI服务 {backend.name} 调用失败: {e}")
+                        continue
+
+                    backend.stats.record_success(latency)
+                    backend.stats.wins += 1
+                    if hedged and backend is not primary:
+                        self._stats['hedge_wins'] += 1
+                    result.backend = backend.name
+                    return result
+
+                # 进行中的请求都失败了，转移到下一个服务
+                if not pending and candidates:
+                    self._stats['failovers'] += 1
+                    launch()
+
+            raise last_error or RuntimeError("所有AI服务调用失败")
+
+        finally:
+            # 取消仍未返回的请求
+            for task, (backend, timing) in pending.items():
+                task.cancel()
+                backend.stats.record_cancelled(time.monotonic() - timing['started'])
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def stream(self, system_prompt: str, prompt: str, max_tokens: int,
+                     temperature: float) -> AsyncIterator[ChatResult]:
+        """流式调用最快的健康服务，第一个片段返回前失败时转移到下一个服务
+
+        延迟样本为首个片段的等待时间，总耗时取决于生成长度，不用于比较服务快慢；
+        输出过程中断开的调用记为失败
+        """
+        last_error: Optional[Exception] = None
+
+        for index, backend in enumerate(self.ordered_backends()):
+            if index:
+                self._stats['failovers'] += 1
+            started = time.monotonic()
+            iterator = backend.stream(system_prompt, prompt, max_tokens, temperature).__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except Exception as e:
+                backend.stats.record_error(time.monotonic() - started)
+                last_error = e
+                logger.warning(f"AI服务 {backend.name} 流式调用失败: {e}")
+                continue
+            first_chunk_latency = time.monotonic() - started
+
+            failed = False
+            try:
+                if first is not None:
+                    first.backend = backend.name
+                    yield first
+                    async for chunk in iterator:
+                        chunk.backend = backend.name
+                        yield chunk
+            except Exception as e:
+                failed = True
+                backend.stats.record_error(first_chunk_latency)
+                logger.warning(f"AI服务 {backend.name} 流式输出中断: {e}")
+                raise
+            finally:
+                # 调用方提前结束读取不算服务失败
+                if not failed:
+                    backend.stats.record_success(first_chunk_latency)
+                    backend.stats.wins += 1
+            return
+
+        raise last_error or RuntimeError("没有可用的AI服务")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取各服务的延迟、错误率和对冲统计"""
+        return {
+            'backends': {
+                backend.name: {'model': backend.model, **backend.stats.to_dict()}
+                for backend in self.backends
+            },
+            'order': [backend.name for backend in self.ordered_backends()],
+            **self._stats
+        }
@@ -10,13 +10,12 @@ import json
 import os
 import sys
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 sys.path.append(str(Path(__file__).parent.parent))
 
-from crawl4ai import AsyncWebCrawler
 from crawl4ai.extraction_strategy import LLMExtractionStrategy, LLMConfig
 from loguru import logger
 import schedule
@@ -26,6 +25,17 @@ from dotenv import load_dotenv
 from config.settings import Settings
 from crawler.news_sources import NewsSources
 from crawler.content_processor import ContentProcessor
+from crawler.browser_pool import BrowserPool
+from crawler.fetcher import TieredFetcher, FetchResult, TIER_BROWSER
+from crawler.http_cache import ValidatorCache
+from crawler.article_store import ArticleStore
+from crawler.near_dup import cluster_near_duplicates
+from crawler.extract_executor import ExtractionExecutor
+from crawler.pipeline import CrawlPipeline
+from crawler.enrichment import ArticleEnricher
+from crawler.embeddings import HashingEmbedder, EmbeddingIndex
+from feishu.http_pool import start_http_client, close_http_client
+from feishu.outbox import FeishuOutbox, make_idempotency_key
 import uvicorn
 
 # 加载环境变量
@@ -39,7 +49,49 @@ class AINewsCrawler:
         self.settings = Settings()
         self.news_sources = NewsSources()
         self.content_processor = ContentProcessor()
-        self.crawler = None
+        self.browser_pool = BrowserPool(
+            user_agent=self.settings.USER_AGENT,
+            size=self.settings.BROWSER_POOL_SIZE,
+            max_uses=self.settings.BROWSER_PAGE_MAX_USES,
+            memory_limit_mb=self.settings.BROWSER_MEMORY_LIMIT_MB,
+            health_check_interval=self.settings.BROWSER_HEALTH_CHECK_INTERVAL
+        )
+        self.article_store = ArticleStore()
+        self.extract_executor = ExtractionExecutor(
+            mode=self.settings.EXTRACT_EXECUTOR,
+            workers=self.settings.EXTRACT_WORKERS,
+            max_pending=self.settings.EXTRACT_MAX_PENDING,
+            backend_name=self.settings.PARSER_BACKEND
+        )
+        self.enricher = None
+        if self.settings.ARTICLE_ENRICH_ENABLED:
+            self.enricher = ArticleEnricher(
+                self.content_processor,
+                batch_size=self.settings.ARTICLE_ENRICH_BATCH_SIZE,
+                concurrency=self.settings.ARTICLE_ENRICH_CONCURRENCY,
+                summary_max_tokens=self.settings.AI_SUMMARY_MAX_TOKENS
+            )
+        self.embedder = HashingEmbedder(self.settings.EMBEDDING_DIM)
+        self.embedding_index = EmbeddingIndex(self.settings.EMBEDDING_INDEX_PATH, self.embedder)
+        self.feishu_client = None
+        self.feishu_outbox = None
+        if self.settings.FEISHU_OUTBOX_ENABLED:
+            self.feishu_outbox = FeishuOutbox(
+                self._get_feishu_client,
+                max_attempts=self.settings.FEISHU_OUTBOX_MAX_ATTEMPTS,
+                base_delay=self.settings.FEISHU_OUTBOX_BASE_DELAY,
+                max_delay=self.settings.FEISHU_OUTBOX_MAX_DELAY
+            )
+        self.last_pipeline_metrics: Dict[str, Any] = {}
+        self.validator_cache = ValidatorCache() if self.settings.HTTP_CACHE_ENABLED else None
+        self.fetcher = TieredFetcher(
+            browser_pool=self.browser_pool,
+            user_agent=self.settings.USER_AGENT,
+            page_timeout=self.settings.CRAWL_SOURCE_TIMEOUT,
+            min_articles=self.settings.HTTP_TIER_MIN_ARTICLES,
+            reprobe_hours=self.settings.FETCH_TIER_REPROBE_HOURS,
+            validator_cache=self.validator_cache
+        )
         
         # 配置日志
         logger.add(
@@ -49,66 +101,53 @@ class AINewsCrawler:
             level=self.settings.LOG_LEVEL
         )
         
+    @property
+    def crawler(self):
+        """当前页面池中的爬虫引擎"""
+        return self.browser_pool.crawler
+    
     async def init_crawler(self):
-        """初始化爬虫引擎"""
+        """初始化爬虫引擎（预热浏览器页面池）"""
         try:
-            self.crawler = AsyncWebCrawler(
-                headless=True,
-                browser_type="chromium",
-                user_agent=self.settings.USER_AGENT
-            )
-            await self.crawler.start()
+            await self.browser_pool.start()
+            if self.feishu_outbox:
+                # 补发上次运行未成功写入的早报
+                self.feishu_outbox.start()
             logger.info("爬虫引擎初始化成功")
         except Exception as e:
             logger.error(f"爬虫引擎初始化失败: {e}")
             raise
     
-    async def crawl_news_sources(self) -> List[Dict[str, Any]]:
-        """爬取所有新闻源"""
-        all_articles = []
+    async def crawl_news_sources(self, sources: Optional[List[Dict[str, Any]]] = None,
+                                 only_new: bool = False) -> List[Dict[str, Any]]:
+        """并发爬取所有新闻源，only_new为True时只返回之前未处理过的文章"""
+        if sources is None:
+            sources = self.news_sources.get_sources()
         
-        # 使用简化的爬取策略，避免LLM提取的复杂性
-        for source in self.news_sources.get_sources()[:3]:  # 先测试前3个源
-            try:
-                logger.info(f"开始爬取: {source['name']}")
-                
-                # 执行简单爬取
-                result = await self.crawler.arun(
-                    url=source['url'],
-                    wait_for="networkidle",
-                    delay_before_return_html=3,
-                    js_code="""
-                    // 等待页面加载完成
-                    await new Promise(resolve => setTimeout(resolve, 2000));
-                    
-                    // 尝试滚动页面以触发懒加载
-                    window.scrollTo(0, document.body.scrollHeight);
-                    await new Promise(resolve => setTimeout(resolve, 1500));
-                    window.scrollTo(0, 0);
-                    """
-                )
-                
-                if result.success:
-                    # 使用我们成功的文章提取逻辑
-                    from improved_crawler_test import extract_articles_improved
-                    articles = extract_articles_improved(result.html, source['name'], source['url'])
-                    
-                    # 添加来源信息
-                    for article in articles:
-                        article['source_url'] = source['url']
-                        article['crawl_time'] = datetime.now().isoformat()
-                    
-                    all_articles.extend(articles)
-                    logger.info(f"从 {source['name']} 获取到 {len(articles)} 篇文章")
-                else:
-                    logger.warning(f"爬取 {source['name']} 失败")
-                    
-            except Exception as e:
-                logger.error(f"爬取 {source['name']} 时发生错误: {e}")
-                continue
+        # 同一个AsyncWebCrawler上最多同时打开CRAWL_CONCURRENCY个页面
+        semaphore = asyncio.Semaphore(max(1, self.settings.CRAWL_CONCURRENCY))
+        
+        async def crawl_indexed(index: int, source: Dict[str, Any]):
+            return index, await self._crawl_source_bounded(source, semaphore)
+        
+        # 按完成顺序收集结果，最终按新闻源顺序合并，保证结果稳定
+        results: List[List[Dict[str, Any]]] = [[] for _ in sources]
+        for next_done in asyncio.as_completed([crawl_indexed(i, s) for i, s in enumerate(sources)]):
+            index, articles = await next_done
+            results[index] = articles
+        
+        all_articles = [article for articles in results for article in articles]
         
         # 去重和排序
         unique_articles = self._deduplicate_articles(all_articles)
+        if self.settings.NEAR_DUP_ENABLED:
+            clustered = cluster_near_duplicates(unique_articles, self.settings.NEAR_DUP_THRESHOLD)
+            logger.info(f"近似去重: {len(unique_articles)} 篇文章合并为 {len(clustered)} 篇")
+            unique_articles = clustered
+        if only_new:
+            new_articles = self.article_store.filter_new(unique_articles)
+            logger.info(f"增量爬取: {len(unique_articles)} 篇文章中有 {len(new_articles)} 篇为新文章")
+            unique_articles = new_articles
         sorted_articles = sorted(
             unique_articles, 
             key=lambda x: x.get('publish_time', ''), 
@@ -118,6 +157,85 @@ class AINewsCrawler:
         logger.info(f"总共获取到 {len(sorted_articles)} 篇去重后的文章")
         return sorted_articles[:self.settings.MAX_ARTICLES]
     
+    async def _crawl_source_bounded(self, source: Dict[str, Any], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """在并发上限和超时限制内爬取单个新闻源"""
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                articles = await asyncio.wait_for(
+                    self._crawl_source(source),
+                    timeout=self.settings.CRAWL_SOURCE_TIMEOUT
+                )
+                logger.info(f"从 {source['name']} 获取到 {len(articles)} 篇文章，耗时 {time.monotonic() - started:.1f}s")
+                return articles
+            except asyncio.TimeoutError:
+                logger.warning(f"爬取 {source['name']} 超时（{self.settings.CRAWL_SOURCE_TIMEOUT}s），已跳过")
+            except Exception as e:
+                logger.error(f"爬取 {source['name']} 时发生错误: {e}")
+            return []
+    
+    async def _crawl_source(self, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """爬取单个新闻源并提取文章"""
+        tier = self.fetcher.choose_tier(source)
+        logger.info(f"开始爬取: {source['name']}（{tier}）")
+        
+        fetched = await self.fetcher.fetch(source, tier)
+        articles = await self._articles_from_fetch(fetched, source)
+        
+        # 静态HTML中提取不到足够的文章时，改用浏览器渲染
+        if self.fetcher.needs_escalation(tier, len(articles)):
+            logger.info(f"{source['name']} 静态页面仅提取到 {len(articles)} 篇文章，改用浏览器渲染")
+            tier = TIER_BROWSER
+            fetched = await self.fetcher.fetch(source, tier)
+            articles = await self._articles_from_fetch(fetched, source)
+        
+        if articles:
+            self.fetcher.record_tier(source, tier)
+        
+        return articles
+    
+    async def _articles_from_fetch(self, fetched: FetchResult, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """从抓取结果得到文章列表，页面未变化时复用上次的提取结果"""
+        if not fetched.ok:
+            return []
+        
+        if self.validator_cache:
+            cached = self.validator_cache.lookup_unchanged(
+                source['url'], fetched.content_hash, fetched.not_modified
+            )
+            if cached is not None:
+                logger.info(f"{source['name']} 页面未变化，复用上次的 {len(cached)} 篇文章")
+                return cached
+        
+        if fetched.html is None:
+            return []
+        
+        articles = await self._extract_articles(fetched.html, source)
+        
+        if self.validator_cache and articles:
+            self.validator_cache.store(
+                source['url'],
+                fetched.content_hash,
+                articles,
+                etag=fetched.etag,
+                last_modified=fetched.last_modified
+            )
+        
+        return articles
+    
+    async def _extract_articles(self, html: str, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """从页面HTML中提取文章（在执行池中运行，不阻塞事件循环）"""
+        articles = await self.extract_executor.extract(html, source)
+        
+        # 添加来源信息
+        for article in articles:
+            article['source_url'] = source['url']
+            article['source_weight'] = source.get('weight', 1.0)
+            article['category'] = source.get('category', '')
+            article['crawl_time'] = datetime.now().isoformat()
+        
+        return articles
+    
     def _deduplicate_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """文章去重"""
         seen_urls = set()
@@ -155,13 +273,22 @@ class AINewsCrawler:
             logger.error(f"生成每日早报失败: {e}")
             raise
     
+    def _get_feishu_client(self):
+        """复用同一个飞书客户端，访问令牌在多次保存之间共享"""
+        if self.feishu_client is None:
+            from feishu.client import FeishuClient
+            self.feishu_client = FeishuClient()
+        return self.feishu_client
+    
+    def _outbox_key(self, report: Dict[str, Any]) -> str:
+        """早报在发件箱中的幂等键"""
+        report_date = report.get('date') or datetime.now().strftime('%Y-%m-%d')
+        content = {key: value for key, value in report.items() if key != 'created_at'}
+        return make_idempotency_key(report_date, content)
+    
     async def save_to_feishu(self, report: Dict[str, Any]) -> bool:
         """保存到飞书多维表格"""
         try:
-            from feishu.client import FeishuClient
-            
-            client = FeishuClient()
-            
             # 准备数据 - 使用正确的字段名称和日期格式
             from datetime import datetime
             current_date = datetime.now()
@@ -174,11 +301,19 @@ class AINewsCrawler:
                 '图片提示词3': report['image_prompts'][2] if len(report['image_prompts']) > 2 else ''
             }
             
-            # 创建记录
-            success = await client.create_record(record_data)
+            if self.feishu_outbox:
+                # 先写入本地发件箱再发送，失败时由后台任务重试
+                key = self._outbox_key(report)
+                self.feishu_outbox.enqueue(record_data, key)
+                success = await self.feishu_outbox.send(key)
+            else:
+                # 创建记录
+                success = await self._get_feishu_client().create_record(record_data)
             
             if success:
                 logger.info("早报已保存到飞书多维表格")
+            elif self.feishu_outbox:
+                logger.warning("保存到飞书多维表格失败，已保留在发件箱中稍后重试")
             else:
                 logger.error("保存到飞书多维表格失败")
                 
@@ -193,18 +328,54 @@ class AINewsCrawler:
         try:
             logger.info("开始执行每日爬取任务")
             
-            # 爬取新闻
-            articles = await self.crawl_news_sources()
+            if self.settings.STREAMING_PIPELINE:
+                # 流式处理：第一个新闻源返回后即开始去重和增强
+                pipeline = CrawlPipeline(
+                    self,
+                    queue_size=self.settings.PIPELINE_QUEUE_SIZE,
+                    enrich_workers=self.settings.PIPELINE_ENRICH_WORKERS,
+                    only_new=self.settings.INCREMENTAL_CRAWL
+                )
+                report = await pipeline.run()
+                articles = pipeline.articles
+                self.last_pipeline_metrics = pipeline.get_metrics()
+            else:
+                # 爬取新闻（增量模式下只处理新文章）
+                articles = await self.crawl_news_sources(only_new=self.settings.INCREMENTAL_CRAWL)
+                if articles and self.enricher:
+                    await self.enricher.enrich(articles)
+                report = await self.generate_daily_report(articles) if articles else None
             
-            if not articles:
+            if not report:
                 logger.warning("未获取到任何文章，跳过早报生成")
                 return
             
-            # 生成早报
-            report = await self.generate_daily_report(articles)
+            # 先保存到飞书：启用发件箱时早报已持久化，之后的步骤出错也不会丢失早报
+            saved = await self.save_to_feishu(report)
             
-            # 保存到飞书
-            await self.save_to_feishu(report)
+            # 早报已保存或已进入发件箱后才记录已处理的文章，否则下次爬取重新处理这些文章
+            if saved or (self.feishu_outbox and self.feishu_outbox.is_queued(self._outbox_key(report))):
+                try:
+                    self.article_store.mark_seen(articles)
+                except Exception as e:
+                    logger.error(f"记录已处理文章失败: {e}")
+            else:
+                logger.warning("早报未能保存，本次文章不标记为已处理，下次爬取时重新处理")
+            
+            try:
+                self.article_store.prune(self.settings.SEEN_ARTICLE_RETENTION_DAYS)
+                if self.enricher:
+                    self.enricher.prune(self.settings.SEEN_ARTICLE_RETENTION_DAYS)
+                if self.feishu_outbox:
+                    self.feishu_outbox.prune(self.settings.SEEN_ARTICLE_RETENTION_DAYS)
+            except Exception as e:
+                logger.error(f"清理过期记录失败: {e}")
+            
+            # 向量索引只用于检索和聚类，出错时不影响早报
+            try:
+                self.embedding_index.add(articles)
+            except Exception as e:
+                logger.error(f"更新文章向量索引失败: {e}")
             
             # 微信发送功能已移除（风险规避）
             
@@ -217,30 +388,59 @@ class AINewsCrawler:
     
     async def cleanup(self):
         """清理资源"""
+        await self.fetcher.close()
+        self.extract_executor.shutdown()
+        self.embedding_index.close()
+        if self.feishu_outbox:
+            await self.feishu_outbox.stop()
+            self.feishu_outbox.close()
+        if self.feishu_client:
+            await self.feishu_client.close()
+            self.feishu_client = None
         if self.crawler:
-            await self.crawler.close()
+            await self.browser_pool.close()
             logger.info("爬虫引擎已关闭")
 
-def run_scheduler():
-    """运行定时任务"""
+async def run_scheduler_loop():
+    """在常驻事件循环中运行定时任务，浏览器页面池跨任务复用"""
+    await start_http_client()
     crawler = AINewsCrawler()
+    await crawler.init_crawler()
+    
+    running_task: Optional[asyncio.Task] = None
+    
+    def submit_daily_crawl():
+        nonlocal running_task
+        # 上一次任务仍在运行时跳过，避免共用页面池和存储的任务重叠
+        if running_task is not None and not running_task.done():
+            logger.warning("上一次爬取任务仍在运行，跳过本次调度")
+            return
+        # 保留任务引用，防止任务在运行中被垃圾回收
+        running_task = asyncio.create_task(crawler.run_daily_crawl())
     
     # 设置定时任务 - 每天上午8点执行
-    schedule.every().day.at("08:00").do(
-        lambda: asyncio.run(crawler.run_daily_crawl())
-    )
+    schedule.every().day.at("08:00").do(submit_daily_crawl)
     
     # 也可以设置每小时执行一次（用于测试）
     if os.getenv('DEBUG', 'False').lower() == 'true':
-        schedule.every().hour.do(
-            lambda: asyncio.run(crawler.run_daily_crawl())
-        )
+        schedule.every().hour.do(submit_daily_crawl)
     
     logger.info("定时任务已启动，每天上午8点执行爬取")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    try:
+        while True:
+            schedule.run_pending()
+            await asyncio.sleep(60)
+    finally:
+        if running_task is not None and not running_task.done():
+            running_task.cancel()
+            await asyncio.gather(running_task, return_exceptions=True)
+        await crawler.cleanup()
+        await close_http_client()
+
+def run_scheduler():
+    """运行定时任务"""
+    asyncio.run(run_scheduler_loop())
 
 async def main():
     """主函数"""
@@ -259,6 +459,7 @@ async def main():
         logger.error(f"程序运行出错: {e}")
     finally:
         await crawler.cleanup()
+        await close_http_client()
 
 if __name__ == "__main__":
     import argparse
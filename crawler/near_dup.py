@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨来源近似重复检测
+以标题和摘要的shingle集合的Jaccard相似度判断是否为同一事件，MinHash LSH分桶实现亚线性查找，
+同一事件在多个来源的报道只保留权重最高来源的一份
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import List, Dict, Any, Set
+
+import numpy as np
+
+from crawler.article_store import normalize_title
+
+# 英文单词/数字串，或其他文字（中文等）的连续片段
+_TOKEN_RUNS = re.compile(r"[a-z0-9]+|[^\W\d_a-z]+")
+
+# 大于2^32的素数，MinHash排列函数的模数
+_MINHASH_PRIME = np.uint64(4294967311)
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """按字符切分n-gram，中文无需分词"""
+    text = normalize_title(text)
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def shingles(text: str) -> Set[str]:
+    """文本的shingle集合：英文单词和数字整体作为一个shingle，中文按字符二元组切分
+
+    英文按字符切分时型号、人名被拆成大量无意义的片段，同一事件不同措辞的报道相似度被稀释
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    result = set()
+    for run in _TOKEN_RUNS.findall(text):
+        if run.isascii() or len(run) == 1:
+            result.add(run)
+        else:
+            result.update(run[i:i + 2] for i in range(len(run) - 1))
+    return result
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """两个shingle集合的Jaccard相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSHIndex:
+    """MinHash局部敏感哈希索引
+
+    每个集合计算num_perm个MinHash值，按每段rows个值切分后分桶，任一段相同即为候选，
+    候选再用精确Jaccard相似度确认；rows按相似度恰为threshold时候选召回率不低于99%选取
+    """
+
+    def __init__(self, threshold: float = 0.2, num_perm: int = 256, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+        self.rows = 1
+        for rows in range(2, num_perm + 1):
+            if 1 - (1 - threshold ** rows) ** (num_perm // rows) < 0.99:
+                break
+            self.rows = rows
+        self.bands = num_perm // self.rows
+
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._shingles: Dict[int, Set[str]] = {}
+
+    def _band_keys(self, items: Set[str]) -> List[bytes]:
+        values = np.array([
+            int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=4).digest(), 'big')
+            for item in items
+        ], dtype=np.uint64)
+        # (a * x + b) mod p 模拟随机排列，x < 2^32、a和b < 2^31，运算不会溢出uint64
+        signature = ((np.outer(values, self._a) + self._b) % _MINHASH_PRIME).min(axis=0)
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, item_id: int, items: Set[str]):
+        """加入一个集合，空集合不参与匹配"""
+        self._shingles[item_id] = items
+        if not items:
+            return
+        for band, key in enumerate(self._band_keys(items)):
+            self._buckets[band].setdefault(key, []).append(item_id)
+
+    def query(self, items: Set[str]) -> List[int]:
+        """查找Jaccard相似度不低于threshold的所有条目"""
+        if not items:
+            return []
+        candidates = set()
+        for band, key in enumerate(self._band_keys(items)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        return [item_id for item_id in candidates if jaccard(self._shingles[item_id], items) >= self.threshold]
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """用于相似度计算的文章文本（标题+摘要）"""
+    title = article.get('title', '')
+    summary = article.get('summary', '')
+    # 提取不到摘要时摘要会回退为标题，避免标题权重翻倍
+    if summary == title:
+        summary = ''
+    return f"{title} {summary}"
+
+
+class NearDuplicateIndex:
+    """增量式近似重复索引
+
+    逐篇加入文章：与已有文章近似重复时并入该组。replace_keeper为True时每组保留
+    来源权重最高的文章；流式处理中保留的文章已经交给下游，应设为False，
+    只在最早出现的文章上追加alternates，不再改动它的内容
+    """
+
+    def __init__(self, threshold: float = 0.2, replace_keeper: bool = True):
+        self.replace_keeper = replace_keeper
+        self._index = MinHashLSHIndex(threshold)
+        self._keepers: List[Dict[str, Any]] = []
+        self._cluster_of: Dict[int, int] = {}
+
+    @property
+    def keepers(self) -> List[Dict[str, Any]]:
+        """每组保留的文章，按组首次出现的顺序"""
+        return list(self._keepers)
+
+    def merge(self, article: Dict[str, Any]) -> bool:
+        """加入一篇文章，是已有文章的近似重复时返回True"""
+        item_id = len(self._cluster_of)
+        items = shingles(article_text(article))
+        matches = self._index.query(items)
+        self._index.add(item_id, items)
+
+        if not matches:
+            self._cluster_of[item_id] = len(self._keepers)
+            self._keepers.append(article)
+            return False
+
+        # 加入最早出现的相似文章所在的组
+        cluster_id = min(self._cluster_of[m] for m in matches)
+        self._cluster_of[item_id] = cluster_id
+        keeper = self._keepers[cluster_id]
+
+        if self.replace_keeper and article.get('source_weight', 1.0) > keeper.get('source_weight', 1.0):
+            # 由权重更高的文章代替原文章保留，原文章本身不做修改
+            article['alternates'] = (
+                keeper.get('alternates', []) + [_alternate_of(keeper)] + article.get('alternates', [])
+            )
+            self._keepers[cluster_id] = article
+        else:
+            keeper['alternates'] = keeper.get('alternates', []) + [_alternate_of(article)]
+        return True
+
+
+def _alternate_of(article: Dict[str, Any]) -> Dict[str, Any]:
+    """被合并文章保留的信息"""
+    return {
+        'source': article.get('source', ''),
+        'title': article.get('title', ''),
+        'url': article.get('url', '')
+    }
+
+
+def cluster_near_duplicates(articles: List[Dict[str, Any]], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """聚合近似重复的文章
+
+    每组只保留source_weight最高的一篇（权重相同时保留靠前的一篇），
+    其余文章的来源、标题和链接记录在保留文章的alternates字段中
+    """
+    index = NearDuplicateIndex(threshold)
+    for article in articles:
+        index.merge(article)
+    return index.keepers
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端
+提取引擎通过统一接口访问解析树：lxml后端（CSS选择器预编译为XPath）速度快，
+BeautifulSoup后端作为lxml不可用时的兜底
+"""
+
+from abc import ABC, abstractmethod
+from typing import List
+
+from bs4 import BeautifulSoup
+from loguru import logger
+import soupsieve
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import GenericTranslator
+except ImportError:  # 未安装lxml/cssselect时只能使用BeautifulSoup
+    lxml = None
+
+# 提取文本时忽略的标签，与BeautifulSoup.get_text的行为保持一致
+_SKIP_TEXT_TAGS = {'script', 'style'}
+
+
+class ParserBackend(ABC):
+    """解析后端接口"""
+
+    name = ""
+
+    @abstractmethod
+    def parse(self, html: str):
+        """解析HTML，返回根节点"""
+
+    @abstractmethod
+    def compile(self, selector: str):
+        """预编译CSS选择器"""
+
+    @abstractmethod
+    def select(self, node, compiled, limit: int = 0) -> list:
+        """查找所有匹配的后代节点，limit为0时不限数量"""
+
+    def select_one(self, node, compiled):
+        """查找第一个匹配的后代节点"""
+        matches = self.select(node, compiled, limit=1)
+        return matches[0] if matches else None
+
+    @abstractmethod
+    def text(self, node) -> str:
+        """获取节点文本，合并连续空白"""
+
+    @abstractmethod
+    def attr(self, node, name: str, default: str = '') -> str:
+        """获取节点属性"""
+
+    @abstractmethod
+    def tag(self, node) -> str:
+        """获取节点标签名"""
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """BeautifulSoup（html.parser）解析后端"""
+
+    name = "bs4"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def compile(self, selector: str):
+        return soupsieve.compile(selector)
+
+    def select(self, node, compiled, limit: int = 0) -> list:
+        return compiled.select(node, limit=limit)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def text(self, node) -> str:
+        return " ".join(node.get_text(" ").split())
+
+    def attr(self, node, name: str, default: str = '') -> str:
+        value = node.get(name, default)
+        # class等多值属性在BeautifulSoup中是列表
+        return " ".join(value) if isinstance(value, list) else value
+
+    def tag(self, node) -> str:
+        return node.name
+
+
+class LxmlBackend(ParserBackend):
+    """lxml解析后端"""
+
+    name = "lxml"
+
+    def __init__(self):
+        self._translator = GenericTranslator()
+
+    def parse(self, html: str):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # 带有XML编码声明的页面不能以str形式解析
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+
+    def compile(self, selector: str):
+        # 只匹配后代节点，与soupsieve的select语义一致
+        return etree.XPath(self._translator.css_to_xpath(selector, prefix='descendant::'))
+
+    def select(self, node, compiled, limit: int = 0) -> list:
+        matches = compiled(node)
+        return matches[:limit] if limit else matches
+
+    def text(self, node) -> str:
+        parts: List[str] = []
+        self._collect_text(node, parts)
+        return " ".join(" ".join(parts).split())
+
+    def _collect_text(self, node, parts: List[str]):
+        """按文档顺序收集文本，跳过注释和脚本样式"""
+        if node.text and node.tag not in _SKIP_TEXT_TAGS:
+            parts.append(node.text)
+        for child in node:
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+                self._collect_text(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+
+    def attr(self, node, name: str, default: str = '') -> str:
+        return node.get(name, default)
+
+    def tag(self, node) -> str:
+        return node.tag
+
+
+def get_parser_backend(name: str = "auto") -> ParserBackend:
+    """按名称获取解析后端，auto表示优先使用lxml"""
+    if name in ("auto", "lxml"):
+        if lxml is not None:
+            return LxmlBackend()
+        if name == "lxml":
+            logger.warning("lxml或cssselect未安装，改用BeautifulSoup解析")
+    return BeautifulSoupBackend()
+
+
+def available_backends() -> List[ParserBackend]:
+    """当前环境可用的所有解析后端"""
+    backends: List[ParserBackend] = [BeautifulSoupBackend()]
+    if lxml is not None:
+        backends.insert(0, LxmlBackend())
+    return backends
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式早报生成流水线
+抓取 → 提取 → 去重 → 增强 → 早报 五个阶段之间用有界队列连接，
+第一个新闻源返回后下游阶段立即开始工作，并统计各阶段的背压指标
+"""
+
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from loguru import logger
+
+from crawler.fetcher import TIER_BROWSER
+from crawler.near_dup import NearDuplicateIndex
+
+# 队列结束标记
+_STOP = object()
+
+
+class StageMetrics:
+    """单个阶段的运行指标"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.received = 0
+        self.emitted = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0   # 等待上游输入的时间
+        self.blocked_seconds = 0.0   # 下游队列已满、等待放入的时间（背压）
+        self.max_queue_depth = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            'workers': self.workers,
+            'received': self.received,
+            'emitted': self.emitted,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'starved_seconds': round(self.starved_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+class CrawlPipeline:
+    """流式早报生成流水线"""
+
+    def __init__(self, crawler, queue_size: int = 16, enrich_workers: int = 4, only_new: bool = False):
+        """初始化流水线，crawler为AINewsCrawler实例"""
+        self.crawler = crawler
+        self.settings = crawler.settings
+        self.queue_size = max(1, queue_size)
+        self.enrich_workers = max(1, enrich_workers)
+        self.only_new = only_new
+
+        self.articles: List[Dict[str, Any]] = []
+        self.metrics: Dict[str, StageMetrics] = {}
+        self.wall_seconds = 0.0
+
+        self._pending_sources = 0
+        self._fetch_queue: Optional[asyncio.Queue] = None
+        self._fetch_workers = max(1, self.settings.CRAWL_CONCURRENCY)
+        self._seen_urls = set()
+        # 文章去重后立即交给下游，不能再被权重更高的重复文章替换
+        self._near_dup = NearDuplicateIndex(self.settings.NEAR_DUP_THRESHOLD, replace_keeper=False)
+        self._enrich_buffer: List[Dict[str, Any]] = []
+
+    async def run(self, sources: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """运行流水线，返回生成的早报；没有文章时返回None"""
+        if sources is None:
+            sources = self.crawler.news_sources.get_sources()
+        started = time.monotonic()
+
+        # 抓取队列不设上限：提取阶段可能把需要浏览器渲染的新闻源放回抓取队列
+        self._fetch_queue = asyncio.Queue()
+        extract_queue = asyncio.Queue(maxsize=self.queue_size)
+        dedup_queue = asyncio.Queue(maxsize=self.queue_size)
+        enrich_queue = asyncio.Queue(maxsize=self.queue_size)
+        report_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        extract_workers = max(1, self.settings.EXTRACT_WORKERS)
+
+        self._pending_sources = len(sources)
+        for source in sources:
+            self._fetch_queue.put_nowait((source, None))
+        if not sources:
+            self._close_fetch_queue()
+
+        await asyncio.gather(
+            self._run_stage("fetch", self._fetch_queue, extract_queue, self._fetch,
+                            self._fetch_workers, extract_workers),
+            self._run_stage("extract", extract_queue, dedup_queue, self._extract,
+                            extract_workers, 1),
+            self._run_stage("dedup", dedup_queue, enrich_queue, self._dedup,
+                            1, self.enrich_workers),
+            self._run_stage("enrich", enrich_queue, report_queue, self._enrich,
+                            self.enrich_workers, 1, flush=self._flush_enrich),
+            self._run_stage("report", report_queue, None, self._collect, 1, 0)
+        )
+
+        report = None
+        if self.articles:
+            self.articles = sorted(
+                self.articles,
+                key=lambda x: (x.get('publish_time', ''), x.get('importance_score', 0)),
+                reverse=True
+            )[:self.settings.MAX_ARTICLES]
+
+            report_started = time.monotonic()
+            report = await self.crawler.generate_daily_report(self.articles)
+            report_metrics = self.metrics["report"]
+            report_metrics.busy_seconds += time.monotonic() - report_started
+            report_metrics.emitted = 1
+
+        self.wall_seconds = time.monotonic() - started
+        self._log_metrics()
+        return report
+
+    async def _run_stage(self, name: str, in_queue: asyncio.Queue, out_queue: Optional[asyncio.Queue],
+                         handler: Callable[[Any], Awaitable[List[Any]]], workers: int,
+                         downstream_workers: int,
+                         flush: Optional[Callable[[], Awaitable[List[Any]]]] = None):
+        """运行一个阶段的所有工作协程，结束后通知下游
+
+        flush用于按批处理的阶段在输入结束后输出剩余的数据
+        """
+        metrics = StageMetrics(name, workers)
+        self.metrics[name] = metrics
+
+        async def worker():
+            while True:
+                wait_started = time.monotonic()
+                item = await in_queue.get()
+                metrics.starved_seconds += time.monotonic() - wait_started
+                if item is _STOP:
+                    return
+
+                metrics.received += 1
+                metrics.max_queue_depth = max(metrics.max_queue_depth, in_queue.qsize() + 1)
+
+                busy_started = time.monotonic()
+                try:
+                    outputs = await handler(item)
+                except Exception as e:
+                    logger.error(f"流水线阶段 {name} 处理失败: {e}")
+                    outputs = []
+                metrics.busy_seconds += time.monotonic() - busy_started
+
+                for output in outputs:
+                    put_started = time.monotonic()
+                    await out_queue.put(output)
+                    metrics.blocked_seconds += time.monotonic() - put_started
+                    metrics.emitted += 1
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        if flush is not None:
+            busy_started = time.monotonic()
+            try:
+                outputs = await flush()
+            except Exception as e:
+                logger.error(f"流水线阶段 {name} 处理失败: {e}")
+                outputs = []
+            metrics.busy_seconds += time.monotonic() - busy_started
+            for output in outputs:
+                await out_queue.put(output)
+                metrics.emitted += 1
+
+        if out_queue is not None:
+            for _ in range(downstream_workers):
+                await out_queue.put(_STOP)
+
+    def _source_done(self):
+        """一个新闻源处理完毕，全部完成后关闭抓取队列"""
+        self._pending_sources -= 1
+        if self._pending_sources == 0:
+            self._close_fetch_queue()
+
+    def _close_fetch_queue(self):
+        for _ in range(self._fetch_workers):
+            self._fetch_queue.put_nowait(_STOP)
+
+    async def _fetch(self, item) -> List[Any]:
+        """抓取阶段：按新闻源选择的方式获取页面"""
+        source, tier = item
+        tier = tier or self.crawler.fetcher.choose_tier(source)
+        logger.info(f"开始爬取: {source['name']}（{tier}）")
+
+        try:
+            fetched = await asyncio.wait_for(
+                self.crawler.fetcher.fetch(source, tier),
+                timeout=self.settings.CRAWL_SOURCE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"爬取 {source['name']} 超时（{self.settings.CRAWL_SOURCE_TIMEOUT}s），已跳过")
+            self._source_done()
+            return []
+        except Exception as e:
+            logger.error(f"爬取 {source['name']} 时发生错误: {e}")
+            self._source_done()
+            return []
+
+        return [(source, tier, fetched)]
+
+    async def _extract(self, item) -> List[Any]:
+        """提取阶段：静态页面文章太少时放回抓取队列改用浏览器"""
+        source, tier, fetched = item
+        try:
+            articles = await self.crawler._articles_from_fetch(fetched, source)
+
+            if self.crawler.fetcher.needs_escalation(tier, len(articles)):
+                logger.info(f"{source['name']} 静态页面仅提取到 {len(articles)} 篇文章，改用浏览器渲染")
+                self._fetch_queue.put_nowait((source, TIER_BROWSER))
+                return []
+
+            if articles:
+                self.crawler.fetcher.record_tier(source, tier)
+            logger.info(f"从 {source['name']} 获取到 {len(articles)} 篇文章")
+            self._source_done()
+            return articles
+
+        except Exception:
+            self._source_done()
+            raise
+
+    async def _dedup(self, article: Dict[str, Any]) -> List[Any]:
+        """去重阶段：URL去重、近似重复合并、增量过滤"""
+        url = article.get('url', '')
+        if not url or url in self._seen_urls:
+            return []
+        self._seen_urls.add(url)
+
+        if self.settings.NEAR_DUP_ENABLED and self._near_dup.merge(article):
+            return []
+
+        if self.only_new and self.crawler.article_store.is_seen(article):
+            return []
+
+        return [article]
+
+    async def _enrich(self, article: Dict[str, Any]) -> List[Any]:
+        """增强阶段：凑满一批后进行AI增强，然后按增强后的内容计算重要性分数"""
+        if self.crawler.enricher is None:
+            return self._score([article])
+
+        self._enrich_buffer.append(article)
+        if len(self._enrich_buffer) < self.crawler.enricher.batch_size:
+            return []
+        batch, self._enrich_buffer = self._enrich_buffer, []
+        return self._score(await self.crawler.enricher.enrich(batch))
+
+    async def _flush_enrich(self) -> List[Any]:
+        """增强阶段结束时处理不足一批的文章"""
+        batch, self._enrich_buffer = self._enrich_buffer, []
+        if not batch:
+            return []
+        return self._score(await self.crawler.enricher.enrich(batch))
+
+    def _score(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """计算重要性分数，AI增强结果中的重要性评分一并计入"""
+        for article in articles:
+            article['importance_score'] = self.crawler.content_processor.score_article(article)
+        return articles
+
+    async def _collect(self, article: Dict[str, Any]) -> List[Any]:
+        """早报阶段：收集文章"""
+        self.articles.append(article)
+        return []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取流水线运行指标"""
+        return {
+            'wall_seconds': round(self.wall_seconds, 3),
+            'articles': len(self.articles),
+            'stages': {name: metrics.to_dict() for name, metrics in self.metrics.items()}
+        }
+
+    def _log_metrics(self):
+        logger.info(f"流水线完成，总耗时 {self.wall_seconds:.1f}s，文章 {len(self.articles)} 篇")
+        for name, metrics in self.metrics.items():
+            logger.info(
+                f"  阶段 {name}: 输入 {metrics.received} 输出 {metrics.emitted} "
+                f"忙碌 {metrics.busy_seconds:.2f}s 等待输入 {metrics.starved_seconds:.2f}s "
+                f"背压阻塞 {metrics.blocked_seconds:.2f}s 最大队列 {metrics.max_queue_depth}"
+            )
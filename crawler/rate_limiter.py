@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI接口限流器
+按每分钟请求数和token数进行令牌桶限流，并根据429和响应延迟按AIMD方式调整并发数；
+所有调用按到达顺序排队等待，而不是直接失败
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """取出amount个令牌需要等待的秒数"""
+        self._refill()
+        # 单次请求超过桶容量时按装满计算，避免永远等待
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        """取出令牌，允许透支，透支部分由后续补充抵扣"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RatePermit:
+    """一次调用占用的限流许可"""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+        self.rate_limited = False
+        self.retry_after: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+
+    def record_tokens(self, tokens: int):
+        """记录实际消耗的token数"""
+        self.actual_tokens = tokens
+
+    def mark_first_token(self):
+        """流式调用收到第一个片段时调用，延迟按首个片段到达的时间计算"""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def mark_rate_limited(self, retry_after: Optional[float] = None):
+        """标记本次调用被限流（429）"""
+        self.rate_limited = True
+        self.retry_after = retry_after
+
+
+class LLMRateLimiter:
+    """AI接口限流器"""
+
+    def __init__(self, requests_per_minute: int = 60, tokens_per_minute: int = 100000,
+                 max_concurrency: int = 8, min_concurrency: int = 1, latency_target: float = 30.0):
+        """初始化限流器"""
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_target = latency_target
+
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self._paused_until = 0.0
+        self._consecutive_429 = 0
+
+        self._loop = None
+        self._queue_lock: Optional[asyncio.Lock] = None
+        self._slot_freed: Optional[asyncio.Event] = None
+        self._stats = {'requests': 0, 'rate_limited': 0, 'slow': 0, 'queued_seconds': 0.0}
+
+    def _ensure_primitives(self):
+        """asyncio同步原语与事件循环绑定，事件循环变化时重新创建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue_lock = asyncio.Lock()
+            self._slot_freed = asyncio.Event()
+            self.in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """按到达顺序等待许可，退出时根据调用结果调整并发数"""
+        self._ensure_primitives()
+        permit = RatePermit(estimated_tokens)
+
+        queued_started = time.monotonic()
+        self.waiting += 1
+        try:
+            # asyncio.Lock按等待顺序唤醒，保证先到先得
+            async with self._queue_lock:
+                while True:
+                    pause = self._paused_until - time.monotonic()
+                    if pause > 0:
+                        await asyncio.sleep(pause)
+                        continue
+
+                    if self.in_flight >= int(self.concurrency_limit):
+                        self._slot_freed.clear()
+                        await self._slot_freed.wait()
+                        continue
+
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                        continue
+                    break
+
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+        self._stats['queued_seconds'] += time.monotonic() - queued_started
+        self._stats['requests'] += 1
+
+        started = time.monotonic()
+        try:
+            yield permit
+        finally:
+            # 流式调用的总耗时取决于生成长度和调用方读取速度，只按首个片段的延迟判断是否过载
+            self._release(permit, (permit.first_token_at or time.monotonic()) - started)
+
+    def _release(self, permit: RatePermit, latency: float):
+        """释放许可并按AIMD调整并发数"""
+        self.in_flight -= 1
+        if self._slot_freed is not None:
+            self._slot_freed.set()
+
+        # 按实际用量修正token桶
+        if permit.actual_tokens is not None:
+            self.tokens.consume(permit.actual_tokens - permit.estimated_tokens)
+
+        if permit.rate_limited:
+            # 乘性减：并发减半，并暂停所有调用一段时间
+            self._stats['rate_limited'] += 1
+            self._consecutive_429 += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            backoff = permit.retry_after or min(60.0, 2 ** self._consecutive_429)
+            self._paused_until = max(self._paused_until, time.monotonic() + backoff)
+            logger.warning(
+                f"AI接口限流(429)，并发数降为 {int(self.concurrency_limit)}，暂停 {backoff:.1f}s"
+            )
+        elif latency > self.latency_target:
+            self._stats['slow'] += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.75)
+        else:
+            # 加性增：每个并发窗口内成功一轮后并发数加1
+            self._consecutive_429 = 0
+            self.concurrency_limit = min(
+                self.max_concurrency, self.concurrency_limit + 1 / max(1.0, self.concurrency_limit)
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流器统计信息"""
+        return {
+            'concurrency_limit': int(self.concurrency_limit),
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'paused_seconds': round(max(0.0, self._paused_until - time.monotonic()), 1),
+            'requests': self._stats['requests'],
+            'rate_limited': self._stats['rate_limited'],
+            'slow': self._stats['slow'],
+            'queued_seconds': round(self._stats['queued_seconds'], 2)
+        }
+
+
+# 进程内共享的限流器
+_shared_limiter: Optional[LLMRateLimiter] = None
+
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """获取进程内共享的限流器，API请求和定时任务共用同一个配额"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = LLMRateLimiter(
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            latency_target=settings.LLM_LATENCY_TARGET
+        )
+    return _shared_limiter
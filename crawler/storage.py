@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地持久化存储
+基于Settings.DATABASE_URL指定的sqlite数据库
+"""
+
+import sqlite3
+from pathlib import Path
+
+from config.settings import settings
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+
+def get_database_path(database_url: str = None) -> str:
+    """从DATABASE_URL解析sqlite数据库文件路径"""
+    database_url = database_url or settings.DATABASE_URL
+    if not database_url.startswith(SQLITE_URL_PREFIX):
+        raise ValueError(f"仅支持sqlite数据库: {database_url}")
+    return database_url[len(SQLITE_URL_PREFIX):]
+
+
+def connect_database(database_url: str = None) -> sqlite3.Connection:
+    """打开sqlite连接"""
+    path = get_database_path(database_url)
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if path != ":memory:":
+        # WAL模式下读写互不阻塞，API服务与定时任务可以共用一个数据库文件
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
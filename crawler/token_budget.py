@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token估算工具
+不依赖分词器，按字符类别近似估算token数：中日韩字符约1个token，
+英文、数字等约4个字符1个token，用于控制发送给AI的提示词长度
+"""
+
+import math
+
+# 截断时优先在这些标点之后断开
+SENTENCE_ENDINGS = "。！？；!?;.…"
+ELLIPSIS = "…"
+
+
+def is_cjk(char: str) -> bool:
+    """判断是否为中日韩字符或全角标点"""
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF        # 中日韩统一表意文字
+        or 0x3400 <= code <= 0x4DBF     # 扩展A
+        or 0x3000 <= code <= 0x303F     # 中日韩标点
+        or 0xFF00 <= code <= 0xFFEF     # 全角字符
+        or 0x3040 <= code <= 0x30FF     # 日文假名
+        or 0xAC00 <= code <= 0xD7AF     # 韩文
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的token数"""
+    if not text:
+        return 0
+
+    cjk = 0
+    other = 0
+    for char in text:
+        if is_cjk(char):
+            cjk += 1
+        elif not char.isspace():
+            other += 1
+        else:
+            other += 0.25
+    return cjk + math.ceil(other / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """将文本截断到不超过max_tokens，尽量在句子结尾处断开"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 二分查找能放下的最长前缀（预留省略号的位置）
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) + 1 <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low].rstrip()
+
+    # 后半段有句子结尾时在句子结尾处断开
+    cut = max(prefix.rfind(mark) for mark in SENTENCE_ENDINGS)
+    if cut >= len(prefix) // 2:
+        return prefix[:cut + 1]
+
+    # 不在英文单词中间断开
+    if low < len(text) and text[low].isascii() and text[low].isalnum():
+        space = prefix.rfind(" ")
+        if space >= len(prefix) // 2:
+            prefix = prefix[:space].rstrip()
+    return prefix + ELLIPSIS if prefix else ""
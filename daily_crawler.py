@@ -16,6 +16,7 @@ import time
 sys.path.append(str(Path(__file__).parent))
 
 from crawler.main import AINewsCrawler
+from feishu.http_pool import close_http_client
 from crawler.content_processor import ContentProcessor
 
 async def daily_crawl_task():
@@ -82,6 +83,7 @@ async def daily_crawl_task():
     finally:
         # 清理资源
         await crawler.cleanup()
+        await close_http_client()
         print("🧹 资源清理完成")
 
 def run_daily_crawl():
@@ -24,8 +24,7 @@ async def debug_content_processor():
     # 创建内容处理器
     processor = ContentProcessor()
     
-    print(f"AI Client: {processor.ai_client}")
-    print(f"AI Model: {processor.ai_model}")
+    print(f"AI Router: {processor.router.model_id if processor.router else 'None'}")
     
     # 测试文章
     test_articles = [
@@ -6,66 +6,78 @@
 
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 import httpx
 from loguru import logger
 
 from config.settings import settings
+from feishu.http_pool import get_http_client
+from feishu.token_manager import get_token_manager, TOKEN_INVALID_CODES
+
+# 多维表格批量写入接口单次请求的最大记录数
+FEISHU_BATCH_LIMIT = 500
+# 列出记录接口单页的最大记录数
+FEISHU_PAGE_LIMIT = 500
 
 class FeishuClient:
     """飞书多维表格客户端"""
     
-    def __init__(self):
-        """初始化飞书客户端"""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """初始化飞书客户端
+
+        默认使用进程内共享的HTTP连接池，也可以传入自己管理生命周期的client
+        """
         self.app_id = settings.FEISHU_APP_ID
         self.app_secret = settings.FEISHU_APP_SECRET
         self.base_url = settings.FEISHU_BASE_URL
         self.table_token = settings.FEISHU_TABLE_TOKEN
-        self.access_token = None
-        
-        # HTTP客户端
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "AI-News-System/1.0"
-            }
-        )
+        self.token_manager = get_token_manager(self.app_id, self.app_secret, self.base_url)
+        self._client = client
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP客户端"""
+        return self._client or get_http_client()
+    
+    @property
+    def access_token(self) -> Optional[str]:
+        """当前缓存的访问令牌"""
+        return self.token_manager.access_token
     
     async def get_access_token(self) -> str:
-        """获取访问令牌"""
-        try:
-            url = f"{self.base_url}/auth/v3/app_access_token/internal"
-            data = {
-                "app_id": self.app_id,
-                "app_secret": self.app_secret
-            }
-            
-            response = await self.client.post(url, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get("code") == 0:
-                self.access_token = result.get("app_access_token") or result.get("tenant_access_token")
-                logger.info("飞书访问令牌获取成功")
-                return self.access_token
-            else:
-                raise Exception(f"获取访问令牌失败: {result.get('msg', 'Unknown error')}")
-                
-        except Exception as e:
-            logger.error(f"获取飞书访问令牌失败: {e}")
-            raise
+        """获取访问令牌，令牌由进程内所有客户端共享"""
+        return await self.token_manager.get_token(self.client)
     
     async def ensure_access_token(self):
-        """确保有有效的访问令牌"""
-        if not self.access_token:
-            await self.get_access_token()
+        """确保有有效的访问令牌，临近过期时提前刷新"""
+        await self.token_manager.get_token(self.client)
     
-    async def create_record(self, record_data: Dict[str, Any]) -> bool:
-        """在多维表格中创建记录"""
-        try:
-            await self.ensure_access_token()
+    async def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """发送带访问令牌的请求并返回响应JSON，令牌失效时刷新令牌重试一次"""
+        headers = dict(kwargs.pop("headers", None) or {})
+        
+        for attempt in range(2):
+            token = await self.token_manager.get_token(self.client)
+            headers["Authorization"] = f"Bearer {token}"
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            
+            # 令牌失效时飞书可能返回4xx状态码，先检查错误码再检查状态码
+            try:
+                result = response.json()
+            except ValueError:
+                result = None
             
+            if attempt == 0 and isinstance(result, dict) and result.get("code") in TOKEN_INVALID_CODES:
+                logger.warning(f"飞书访问令牌已失效（{result.get('code')}），刷新后重试")
+                self.token_manager.invalidate(token)
+                continue
+            
+            response.raise_for_status()
+            return result if isinstance(result, dict) else {}
+    
+    async def create_record(self, record_data: Dict[str, Any], client_token: Optional[str] = None) -> bool:
+        """在多维表格中创建记录，client_token相同的重复请求只创建一条记录"""
+        try:
             url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records"
             
             # 准备请求数据
@@ -77,15 +89,8 @@ class FeishuClient:
                 "fields": fields
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = await self.client.post(url, json=data, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
+            params = {"client_token": client_token} if client_token else None
+            result = await self._request("POST", url, json=data, params=params)
             if result.get("code") == 0:
                 logger.info("飞书记录创建成功")
                 return True
@@ -100,8 +105,6 @@ class FeishuClient:
     async def update_record(self, record_id: str, record_data: Dict[str, Any]) -> bool:
         """更新多维表格记录"""
         try:
-            await self.ensure_access_token()
-            
             url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records/{record_id}"
             
             # 准备请求数据
@@ -113,15 +116,7 @@ class FeishuClient:
                 "fields": fields
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = await self.client.put(url, json=data, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._request("PUT", url, json=data)
             if result.get("code") == 0:
                 logger.info(f"飞书记录 {record_id} 更新成功")
                 return True
@@ -133,54 +128,132 @@ class FeishuClient:
             logger.error(f"更新飞书记录时发生错误: {e}")
             return False
     
+    async def batch_create_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量创建记录
+
+        按单次请求上限分块，多个分块并发写入；返回与输入顺序一致的逐条结果
+        {"index", "success", "record_id", "error"}，失败的记录可以单独重试
+        """
+        url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records/batch_create"
+        payloads = [{"fields": dict(record)} for record in records]
+        return await self._batch_write(url, payloads, "创建")
+    
+    async def batch_update_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量更新记录，records为 [{"record_id": ..., "fields": {...}}]，返回逐条结果"""
+        url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records/batch_update"
+        payloads = [{"record_id": record["record_id"], "fields": dict(record["fields"])} for record in records]
+        return await self._batch_write(url, payloads, "更新")
+    
+    async def _batch_write(self, url: str, payloads: List[Dict[str, Any]], action: str) -> List[Dict[str, Any]]:
+        """分块并发调用批量写入接口"""
+        results: List[Dict[str, Any]] = [
+            {"index": index, "success": False, "record_id": payload.get("record_id"), "error": None}
+            for index, payload in enumerate(payloads)
+        ]
+        if not payloads:
+            return results
+        
+        batch_size = max(1, min(settings.FEISHU_BATCH_SIZE, FEISHU_BATCH_LIMIT))
+        semaphore = asyncio.Semaphore(max(1, settings.FEISHU_BATCH_CONCURRENCY))
+        
+        async def write_chunk(start: int):
+            chunk = payloads[start:start + batch_size]
+            async with semaphore:
+                try:
+                    result = await self._request("POST", url, json={"records": chunk})
+                    if result.get("code") != 0:
+                        raise Exception(result.get("msg", "Unknown error"))
+                    if not isinstance(result.get("data"), dict):
+                        # 无法确认写入结果，整块按失败处理
+                        raise Exception("响应缺少data")
+                    written = result["data"].get("records") or []
+                except Exception as e:
+                    # 批量接口整块成功或整块失败，失败时整块记录标记为失败
+                    logger.error(f"批量{action}飞书记录失败（第 {start + 1}-{start + len(chunk)} 条）: {e}")
+                    for offset in range(len(chunk)):
+                        results[start + offset]["error"] = str(e)
+                    return
+            
+            for offset in range(len(chunk)):
+                item = results[start + offset]
+                item["success"] = True
+                if offset < len(written):
+                    item["record_id"] = written[offset].get("record_id", item["record_id"])
+        
+        await asyncio.gather(*(write_chunk(start) for start in range(0, len(payloads), batch_size)))
+        
+        succeeded = sum(1 for item in results if item["success"])
+        logger.info(f"批量{action}飞书记录完成: 成功 {succeeded}/{len(results)} 条")
+        return results
+    
     async def get_records(self, page_size: int = 100, page_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """获取多维表格记录"""
+        """获取一页多维表格记录，读取整张表请使用iter_records"""
         try:
-            await self.ensure_access_token()
-            
-            url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records"
-            params = {
-                "page_size": page_size
-            }
-            
-            if page_token:
-                params["page_token"] = page_token
-            
-            headers = {
-                "Authorization": f"Bearer {self.access_token}"
-            }
-            
-            response = await self.client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get("code") == 0:
-                records = result.get("data", {}).get("items", [])
-                logger.info(f"获取到 {len(records)} 条飞书记录")
-                return records
-            else:
-                logger.error(f"获取飞书记录失败: {result.get('msg', 'Unknown error')}")
-                return []
+            records, _ = await self._fetch_page(page_size, page_token)
+            logger.info(f"获取到 {len(records)} 条飞书记录")
+            return records
                 
         except Exception as e:
             logger.error(f"获取飞书记录时发生错误: {e}")
             return []
     
+    async def _fetch_page(self, page_size: int, page_token: Optional[str] = None,
+                          field_names: Optional[List[str]] = None,
+                          filter: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """获取一页记录，返回 (记录列表, 下一页的page_token)，没有下一页时page_token为None"""
+        url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records"
+        params = {
+            "page_size": min(page_size, FEISHU_PAGE_LIMIT)
+        }
+        
+        if page_token:
+            params["page_token"] = page_token
+        if field_names:
+            params["field_names"] = json.dumps(field_names, ensure_ascii=False)
+        if filter:
+            params["filter"] = filter
+        
+        result = await self._request("GET", url, params=params)
+        if result.get("code") != 0:
+            raise Exception(f"获取飞书记录失败: {result.get('msg', 'Unknown error')}")
+        
+        data = result.get("data") or {}
+        next_token = data.get("page_token") if data.get("has_more") else None
+        return data.get("items") or [], next_token
+    
+    async def iter_records(self, page_size: int = FEISHU_PAGE_LIMIT, field_names: Optional[List[str]] = None,
+                           filter: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """逐条遍历整张表的记录
+
+        调用方处理当前页时后台预取下一页，内存中最多保留两页；
+        field_names只返回指定字段，filter为多维表格筛选公式（如 CurrentValue.[日期]>=...）
+        """
+        records, next_token = await self._fetch_page(page_size, None, field_names, filter)
+        prefetch: Optional[asyncio.Task] = None
+        try:
+            while True:
+                if next_token:
+                    prefetch = asyncio.create_task(self._fetch_page(page_size, next_token, field_names, filter))
+                
+                for record in records:
+                    yield record
+                
+                if prefetch is None:
+                    return
+                records, next_token = await prefetch
+                prefetch = None
+        finally:
+            # 调用方提前结束遍历时取消未完成的预取
+            if prefetch is not None:
+                prefetch.cancel()
+                await asyncio.gather(prefetch, return_exceptions=True)
+    
     async def delete_record(self, record_id: str) -> bool:
         """删除多维表格记录"""
         try:
-            await self.ensure_access_token()
-            
             url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI/records/{record_id}"
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}"
-            }
-            
-            response = await self.client.delete(url, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._request("DELETE", url)
             if result.get("code") == 0:
                 logger.info(f"飞书记录 {record_id} 删除成功")
                 return True
@@ -195,19 +268,10 @@ class FeishuClient:
     async def get_table_info(self) -> Dict[str, Any]:
         """获取表格信息"""
         try:
-            await self.ensure_access_token()
-            
-            headers = {
-                "Authorization": f"Bearer {self.access_token}"
-            }
-            
             # 直接使用已知的表格ID
             url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/tables/tblsXDf7QkK9jLzI"
             
-            response = await self.client.get(url, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._request("GET", url)
             if result.get("code") == 0:
                 table_info = result.get("data", {})
                 logger.info("获取表格信息成功")
@@ -223,19 +287,9 @@ class FeishuClient:
     async def create_automation(self, automation_config: Dict[str, Any]) -> bool:
         """创建自动化工作流"""
         try:
-            await self.ensure_access_token()
-            
             url = f"{self.base_url}/bitable/v1/apps/{self.table_token}/automations"
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = await self.client.post(url, json=automation_config, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = await self._request("POST", url, json=automation_config)
             if result.get("code") == 0:
                 logger.info("自动化工作流创建成功")
                 return True
@@ -248,6 +302,5 @@ class FeishuClient:
             return False
     
     async def close(self):
-        """关闭客户端"""
-        await self.client.aclose()
+        """关闭客户端；共享连接池由服务退出时统一关闭"""
         logger.info("飞书客户端已关闭")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书接口共享HTTP连接池
+进程内所有飞书客户端共用一个长连接httpx客户端，复用TCP/TLS连接；
+安装h2时启用HTTP/2，由API服务和定时任务在启动、退出时管理生命周期
+"""
+
+import asyncio
+from typing import Optional, Dict, Any
+
+import httpx
+from loguru import logger
+
+from config.settings import settings
+
+try:
+    import h2  # noqa: F401  HTTP/2为可选依赖
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+_loop = None
+_closing = set()  # 正在关闭的旧客户端任务，保留引用防止被垃圾回收
+_stats = {'clients_created': 0, 'requests': 0, 'responses': 0, 'http2_responses': 0}
+
+
+async def _on_request(request: httpx.Request):
+    _stats['requests'] += 1
+
+
+async def _on_response(response: httpx.Response):
+    _stats['responses'] += 1
+    if response.http_version == "HTTP/2":
+        _stats['http2_responses'] += 1
+
+
+async def _close_quietly(client: httpx.AsyncClient):
+    """关闭旧事件循环中创建的客户端，连接所属的事件循环已关闭时忽略错误"""
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug(f"关闭旧的飞书HTTP客户端失败: {e}")
+
+
+def _create_client() -> httpx.AsyncClient:
+    """按配置创建连接池客户端"""
+    http2 = settings.FEISHU_HTTP2 and HTTP2_AVAILABLE
+    if settings.FEISHU_HTTP2 and not HTTP2_AVAILABLE:
+        logger.warning("未安装h2，飞书接口使用HTTP/1.1")
+
+    _stats['clients_created'] += 1
+    return httpx.AsyncClient(
+        timeout=settings.FEISHU_HTTP_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.FEISHU_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.FEISHU_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.FEISHU_HTTP_KEEPALIVE_EXPIRY
+        ),
+        headers={
+            "Content-Type": "application/json",
+            "User-Agent": "AI-News-System/1.0"
+        },
+        event_hooks={'request': [_on_request], 'response': [_on_response]}
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端
+
+    连接与事件循环绑定，事件循环变化或客户端已关闭时重新创建
+    """
+    global _client, _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if _client is None or _client.is_closed or (loop is not None and _loop is not None and _loop is not loop):
+        if _client is not None and not _client.is_closed and loop is not None:
+            # 事件循环已变化，在当前事件循环中关闭旧客户端，释放其连接
+            task = loop.create_task(_close_quietly(_client))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        _client = _create_client()
+        _loop = loop
+    elif _loop is None:
+        _loop = loop
+    return _client
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """启动时创建共享客户端"""
+    client = get_http_client()
+    logger.info(f"飞书HTTP连接池已创建（HTTP/2: {'开启' if settings.FEISHU_HTTP2 and HTTP2_AVAILABLE else '关闭'}）")
+    return client
+
+
+async def close_http_client():
+    """退出时关闭共享客户端及其连接"""
+    global _client, _loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("飞书HTTP连接池已关闭")
+    _client = None
+    _loop = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """获取连接池统计信息"""
+    stats: Dict[str, Any] = {
+        'open': _client is not None and not _client.is_closed,
+        'http2': settings.FEISHU_HTTP2 and HTTP2_AVAILABLE,
+        'max_connections': settings.FEISHU_HTTP_MAX_CONNECTIONS,
+        'max_keepalive': settings.FEISHU_HTTP_MAX_KEEPALIVE,
+        **_stats
+    }
+
+    # httpcore连接池的内部状态，版本不兼容时只返回计数
+    pool = getattr(getattr(_client, '_transport', None), '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is not None:
+        stats['connections'] = len(connections)
+        stats['idle_connections'] = sum(1 for conn in connections if conn.is_idle())
+    return stats
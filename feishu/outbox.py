@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书写入发件箱
+早报先写入本地sqlite发件箱再发送到飞书，发送失败的记录由后台任务按指数退避重试，
+进程重启后继续发送；每条记录带幂等键（早报日期+内容哈希），重试不会产生重复记录
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable
+
+from loguru import logger
+
+from crawler.storage import connect_database
+
+
+def make_idempotency_key(report_date: str, content: Dict[str, Any]) -> str:
+    """幂等键：早报日期+内容哈希"""
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return f"{report_date}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}"
+
+
+def client_token_for(key: str) -> str:
+    """由幂等键生成固定的uuid4格式client_token，飞书据此对重复请求去重"""
+    return str(uuid.UUID(bytes=hashlib.sha256(key.encode('utf-8')).digest()[:16], version=4))
+
+
+class FeishuOutbox:
+    """飞书写入发件箱"""
+
+    def __init__(self, client_factory: Callable, max_attempts: int = 8, base_delay: float = 30.0,
+                 max_delay: float = 3600.0, poll_interval: float = 60.0):
+        """初始化发件箱表，client_factory返回用于发送的FeishuClient"""
+        self.client_factory = client_factory
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._sending: Dict[str, asyncio.Future] = {}  # 发送中的记录，重复发送时等待其结果
+        self._stats = {'enqueued': 0, 'duplicates': 0, 'sent': 0, 'retries': 0, 'gave_up': 0}
+
+        self.db = connect_database()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS feishu_outbox (
+                idempotency_key TEXT PRIMARY KEY,
+                fields TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                sent_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_feishu_outbox_due ON feishu_outbox (status, next_attempt_at);
+        """)
+        self.db.commit()
+
+    def enqueue(self, fields: Dict[str, Any], key: str) -> bool:
+        """写入发件箱，幂等键已存在时忽略，返回是否新加入"""
+        now = time.time()
+        cursor = self.db.execute(
+            """
+            INSERT OR IGNORE INTO feishu_outbox (idempotency_key, fields, status, next_attempt_at, created_at)
+            VALUES (?, ?, 'pending', ?, ?)
+            """,
+            (key, json.dumps(fields, ensure_ascii=False), now, now)
+        )
+        self.db.commit()
+        if cursor.rowcount:
+            self._stats['enqueued'] += 1
+            return True
+        self._stats['duplicates'] += 1
+        logger.info(f"飞书记录 {key} 已在发件箱中，跳过重复写入")
+        return False
+
+    def is_queued(self, key: str) -> bool:
+        """记录是否已写入发件箱（含已发送）"""
+        return self.db.execute(
+            "SELECT 1 FROM feishu_outbox WHERE idempotency_key = ?", (key,)
+        ).fetchone() is not None
+
+    async def send(self, key: str) -> bool:
+        """立即发送一条记录，已发送过的记录直接返回成功；同一记录正在发送时等待其结果"""
+        inflight = self._sending.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        return await self._send(key)
+
+    async def _send(self, key: str, due_only: bool = False) -> bool:
+        """发送一条记录；due_only为True时只发送到期的待发送记录（后台补发）"""
+        if key in self._sending:
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._sending[key] = future
+        try:
+            # 取得发送权后重新读取记录，期间可能已被其他发送更新
+            row = self.db.execute("SELECT * FROM feishu_outbox WHERE idempotency_key = ?", (key,)).fetchone()
+            if row is None:
+                future.set_result(False)
+                return False
+            if due_only and (row['status'] != 'pending' or row['next_attempt_at'] > time.time()):
+                future.set_result(False)
+                return False
+            if row['status'] == 'sent':
+                future.set_result(True)
+                return True
+
+            try:
+                success = await self.client_factory().create_record(
+                    json.loads(row['fields']), client_token=client_token_for(key)
+                )
+                error = None if success else "飞书接口返回失败"
+            except Exception as e:
+                success, error = False, str(e)
+
+            attempts = row['attempts'] + 1
+            now = time.time()
+            if success:
+                self.db.execute(
+                    """
+                    UPDATE feishu_outbox SET status = 'sent', attempts = ?, last_error = NULL, sent_at = ?
+                    WHERE idempotency_key = ?
+                    """,
+                    (attempts, now, key)
+                )
+                self._stats['sent'] += 1
+            elif attempts >= self.max_attempts:
+                self.db.execute(
+                    "UPDATE feishu_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE idempotency_key = ?",
+                    (attempts, error, key)
+                )
+                self._stats['gave_up'] += 1
+                logger.error(f"飞书记录 {key} 重试 {attempts} 次后仍失败，已停止重试: {error}")
+            else:
+                # 指数退避，加入随机抖动避免多条记录同时重试
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                self.db.execute(
+                    """
+                    UPDATE feishu_outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ?
+                    WHERE idempotency_key = ?
+                    """,
+                    (attempts, error, now + delay, key)
+                )
+                self._stats['retries'] += 1
+                logger.warning(f"飞书记录 {key} 发送失败，{delay:.0f} 秒后重试: {error}")
+            self.db.commit()
+            future.set_result(success)
+            return success
+        finally:
+            if not future.done():
+                future.set_result(False)
+            self._sending.pop(key, None)
+
+    async def drain(self) -> int:
+        """发送所有到期的待发送记录，返回成功数量"""
+        rows = self.db.execute(
+            """
+            SELECT idempotency_key FROM feishu_outbox WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY created_at
+            """,
+            (time.time(),)
+        ).fetchall()
+
+        sent = 0
+        for row in rows:
+            if await self._send(row['idempotency_key'], due_only=True):
+                sent += 1
+        return sent
+
+    def _next_due_in(self) -> float:
+        """距离下一条待发送记录到期的秒数，不超过轮询间隔"""
+        row = self.db.execute(
+            "SELECT MIN(next_attempt_at) FROM feishu_outbox WHERE status = 'pending'"
+        ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(1.0, row[0] - time.time()))
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self.drain()
+                if sent:
+                    logger.info(f"发件箱补发 {sent} 条飞书记录")
+            except Exception as e:
+                logger.error(f"发件箱发送任务出错: {e}")
+            await asyncio.sleep(self._next_due_in())
+
+    def start(self):
+        """启动后台发送任务，先补发上次运行遗留的记录"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台发送任务，未发送的记录保留在发件箱中"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def close(self):
+        """关闭发件箱数据库连接，需先调用stop停止后台任务"""
+        self.db.close()
+
+    def prune(self, retention_days: int):
+        """清理已发送的过期记录"""
+        cutoff = time.time() - retention_days * 86400
+        self.db.execute("DELETE FROM feishu_outbox WHERE status = 'sent' AND sent_at < ?", (cutoff,))
+        self.db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取发件箱统计信息"""
+        counts = {
+            row['status']: row['count'] for row in self.db.execute(
+                "SELECT status, COUNT(*) AS count FROM feishu_outbox GROUP BY status"
+            )
+        }
+        return {
+            'pending': counts.get('pending', 0),
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0),
+            'running': self._task is not None and not self._task.done(),
+            **{f'total_{name}': value for name, value in self._stats.items()}
+        }
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书访问令牌管理
+进程内缓存访问令牌及其过期时间，按过期时间定时在后台提前刷新；
+并发请求同时需要刷新时只发起一次获取请求
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+import httpx
+from loguru import logger
+
+from config.settings import settings
+from feishu.http_pool import get_http_client
+
+# 令牌无效或过期的错误码，收到后刷新令牌并重试一次
+TOKEN_INVALID_CODES = {99991661, 99991663, 99991664, 99991668}
+
+# 后台刷新失败后的重试间隔（秒）
+REFRESH_RETRY_SECONDS = 60
+
+
+class FeishuTokenManager:
+    """飞书访问令牌管理器"""
+
+    def __init__(self, app_id: str, app_secret: str, base_url: str, refresh_margin: float = 300.0):
+        """初始化令牌管理器，refresh_margin为过期前提前刷新的秒数"""
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.base_url = base_url
+        self.refresh_margin = refresh_margin
+
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {'fetches': 0, 'background_refreshes': 0, 'invalidations': 0, 'failures': 0}
+
+    def _ensure_primitives(self):
+        """asyncio同步原语与事件循环绑定，事件循环变化时重新创建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._refresh_task = None
+
+    @property
+    def remaining(self) -> float:
+        """令牌剩余有效秒数"""
+        return self.expires_at - time.monotonic()
+
+    async def get_token(self, client: httpx.AsyncClient) -> str:
+        """获取有效的访问令牌
+
+        令牌已过期或不存在时等待获取；临近过期时先返回当前令牌，同时在后台刷新
+        """
+        self._ensure_primitives()
+
+        if self.access_token and self.remaining > 0:
+            if self.remaining <= self.refresh_margin:
+                self._start_background_refresh(client)
+            return self.access_token
+
+        return await self._refresh(client, self.access_token)
+
+    def _schedule_refresh(self, client: httpx.AsyncClient, delay: Optional[float] = None):
+        """安排在令牌过期前refresh_margin秒自动刷新，调用稀疏时令牌也不会过期"""
+        if self._timer is not None:
+            self._timer.cancel()
+        if delay is None:
+            # 有效期短于refresh_margin时不立即刷新，避免连续请求
+            delay = max(self.remaining - self.refresh_margin, min(REFRESH_RETRY_SECONDS, self.remaining / 2))
+        self._timer = self._loop.call_later(delay, self._start_background_refresh, client)
+
+    def _start_background_refresh(self, client: httpx.AsyncClient):
+        """在后台刷新令牌，已有刷新任务时不重复发起"""
+        self._timer = None
+        if self._refresh_task is not None:
+            return
+        if client.is_closed:
+            # 原客户端已关闭（如连接池重建），改用当前的共享客户端
+            client = get_http_client()
+        self._stats['background_refreshes'] += 1
+        self._refresh_task = asyncio.create_task(self._background_refresh(client, self.access_token))
+
+    async def _background_refresh(self, client: httpx.AsyncClient, stale_token: Optional[str]):
+        try:
+            await self._refresh(client, stale_token)
+        except Exception:
+            # 刷新失败时保留旧令牌，旧令牌仍有效时稍后重试，过期后由下一次请求重新获取
+            if self.access_token and self.remaining > REFRESH_RETRY_SECONDS:
+                self._schedule_refresh(client, REFRESH_RETRY_SECONDS)
+        finally:
+            self._refresh_task = None
+
+    async def _refresh(self, client: httpx.AsyncClient, stale_token: Optional[str]) -> str:
+        """获取新令牌；等待锁期间其他协程已经刷新过时直接使用新令牌"""
+        async with self._lock:
+            if self.access_token and self.access_token != stale_token and self.remaining > 0:
+                return self.access_token
+
+            try:
+                url = f"{self.base_url}/auth/v3/app_access_token/internal"
+                data = {
+                    "app_id": self.app_id,
+                    "app_secret": self.app_secret
+                }
+
+                response = await client.post(url, json=data)
+                response.raise_for_status()
+
+                result = response.json()
+                if result.get("code") != 0:
+                    raise Exception(f"获取访问令牌失败: {result.get('msg', 'Unknown error')}")
+
+                self.access_token = result.get("app_access_token") or result.get("tenant_access_token")
+                self.expires_at = time.monotonic() + float(result.get("expire", 7200))
+                self._stats['fetches'] += 1
+                self._schedule_refresh(client)
+                logger.info(f"飞书访问令牌获取成功，有效期 {int(self.remaining)} 秒")
+                return self.access_token
+
+            except Exception as e:
+                self._stats['failures'] += 1
+                logger.error(f"获取飞书访问令牌失败: {e}")
+                raise
+
+    def invalidate(self, token: Optional[str]):
+        """服务端判定令牌无效时作废缓存；令牌已被其他请求刷新时不做处理"""
+        if token and token == self.access_token:
+            self._stats['invalidations'] += 1
+            self.access_token = None
+            self.expires_at = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取令牌统计信息"""
+        return {
+            'has_token': self.access_token is not None,
+            'expires_in_seconds': max(0, int(self.remaining)) if self.access_token else 0,
+            **self._stats
+        }
+
+
+# 进程内共享的令牌管理器，按应用区分
+_token_managers: Dict[tuple, FeishuTokenManager] = {}
+
+
+def get_token_manager(app_id: Optional[str] = None, app_secret: Optional[str] = None,
+                      base_url: Optional[str] = None) -> FeishuTokenManager:
+    """获取进程内共享的令牌管理器，所有飞书客户端共用同一个令牌"""
+    app_id = app_id if app_id is not None else settings.FEISHU_APP_ID
+    app_secret = app_secret if app_secret is not None else settings.FEISHU_APP_SECRET
+    base_url = base_url or settings.FEISHU_BASE_URL
+
+    key = (app_id, app_secret, base_url)
+    manager = _token_managers.get(key)
+    if manager is None:
+        manager = FeishuTokenManager(app_id, app_secret, base_url,
+                                     refresh_margin=settings.FEISHU_TOKEN_REFRESH_MARGIN)
+        _token_managers[key] = manager
+    return manager
@@ -13,6 +13,8 @@ sys.path.append(str(Path(__file__).parent))
 
 from crawler.main import AINewsCrawler
 from crawler.content_processor import ContentProcessor
+from crawler.extraction import ExtractionEngine
+from crawler.news_sources import NewsSources
 
 async def improved_crawler_test():
     """改进的爬虫测试"""
@@ -150,322 +152,46 @@ async def improved_crawler_test():
         await crawler.cleanup()
         print("\n🧹 资源清理完成")
 
+# 不在NEWS_SOURCES中的测试网站的选择器配置
+TEST_SOURCE_SELECTORS = {
+    "CSDN": {
+        "items": [
+            'div[class*="blog-list-box"] div[class*="blog-list-item"]',
+            'div[class*="article-item"]',
+            'div[class*="news-item"]',
+            'article',
+            'div[class*="item"]',
+            'div[class*="blog"]'
+        ]
+    },
+    "掘金": {
+        "items": [
+            'div[class*="entry-list"] div[class*="item"]',
+            'div[class*="article-item"]',
+            'article',
+            'div[class*="item"]'
+        ]
+    },
+    "少数派": {
+        "items": [
+            'div[class*="article-item"]',
+            'article',
+            'div[class*="item"]',
+            'div[class*="post"]'
+        ]
+    }
+}
+
+_extraction_engine = ExtractionEngine()
+
 def extract_articles_improved(html, source_name, base_url):
-    """改进的文章提取函数"""
-    articles = []
-    
-    try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        if source_name == "36氪":
-            # 36氪的文章选择器 - 更精确
-            selectors = [
-                'div[class*="article-item"]',
-                'div[class*="news-item"]',
-                'div[class*="item"]',
-                'article',
-                'div[class*="card"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:  # 只取前10篇
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) or element.find('a')
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:  # 过滤太短的标题
-                        continue
-                    
-                    # 获取链接
-                    link_elem = title_elem.find('a') if title_elem.name != 'a' else title_elem
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://36kr.com' + url
-                    
-                    # 获取摘要
-                    summary_elem = element.find(['p', 'div'], class_=lambda x: x and 'summary' in x.lower()) or element.find('p')
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "虎嗅网":
-            # 虎嗅网的文章选择器
-            selectors = [
-                'div[class*="article-item"]',
-                'div[class*="news-item"]',
-                'article',
-                'div[class*="item"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4'])
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://www.huxiu.com' + url
-                    
-                    summary_elem = element.find('p') or element.find('div', class_=lambda x: x and 'summary' in x.lower())
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "量子位":
-            # 量子位的文章选择器
-            selectors = [
-                'div[class*="article-item"]',
-                'div[class*="news-item"]',
-                'article',
-                'div[class*="item"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4'])
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://www.qbitai.com' + url
-                    
-                    summary_elem = element.find('p') or element.find('div', class_=lambda x: x and 'summary' in x.lower())
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "CSDN":
-            # CSDN的文章选择器 - 更精确的选择器
-            selectors = [
-                'div[class*="blog-list-box"] div[class*="blog-list-item"]',
-                'div[class*="article-item"]',
-                'div[class*="news-item"]',
-                'article',
-                'div[class*="item"]',
-                'div[class*="blog"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                # 尝试多种标题选择器
-                title_elem = (element.find(['h1', 'h2', 'h3', 'h4']) or 
-                             element.find('a', class_=lambda x: x and 'title' in x.lower()) or
-                             element.find('a', class_=lambda x: x and 'blog' in x.lower()))
-                
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    # 获取链接
-                    link_elem = title_elem if title_elem.name == 'a' else title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://www.csdn.net' + url
-                    
-                    # 获取摘要
-                    summary_elem = (element.find('p') or 
-                                   element.find('div', class_=lambda x: x and 'summary' in x.lower()) or
-                                   element.find('div', class_=lambda x: x and 'desc' in x.lower()))
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "InfoQ":
-            # InfoQ的文章选择器
-            selectors = [
-                'div[class*="article-item"]',
-                'div[class*="news-item"]',
-                'article',
-                'div[class*="item"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4'])
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://www.infoq.cn' + url
-                    
-                    summary_elem = element.find('p') or element.find('div', class_=lambda x: x and 'summary' in x.lower())
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "掘金":
-            # 掘金的文章选择器
-            selectors = [
-                'div[class*="entry-list"] div[class*="item"]',
-                'div[class*="article-item"]',
-                'article',
-                'div[class*="item"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4']) or element.find('a', class_=lambda x: x and 'title' in x.lower())
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem if title_elem.name == 'a' else title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://juejin.cn' + url
-                    
-                    summary_elem = element.find('p') or element.find('div', class_=lambda x: x and 'summary' in x.lower())
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        elif source_name == "少数派":
-            # 少数派的文章选择器
-            selectors = [
-                'div[class*="article-item"]',
-                'article',
-                'div[class*="item"]',
-                'div[class*="post"]'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"  🔍 使用选择器: {selector} (找到 {len(elements)} 个元素)")
-                    break
-            
-            for element in elements[:10]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4']) or element.find('a', class_=lambda x: x and 'title' in x.lower())
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem if title_elem.name == 'a' else title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    if url and not url.startswith('http'):
-                        url = 'https://sspai.com' + url
-                    
-                    summary_elem = element.find('p') or element.find('div', class_=lambda x: x and 'summary' in x.lower())
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-        
-        # 如果没有找到特定选择器，使用通用选择器
-        if not articles:
-            print(f"  🔍 使用通用选择器...")
-            # 通用文章提取
-            for element in soup.find_all(['article', 'div'], class_=lambda x: x and any(keyword in x.lower() for keyword in ['article', 'news', 'item', 'card']))[:15]:
-                title_elem = element.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                if title_elem:
-                    title = title_elem.get_text().strip()
-                    if len(title) < 10:
-                        continue
-                    
-                    link_elem = title_elem.find('a') or element.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    
-                    summary_elem = element.find('p')
-                    summary = summary_elem.get_text().strip() if summary_elem else title
-                    
-                    articles.append({
-                        'title': title,
-                        'summary': summary,
-                        'source': source_name,
-                        'url': url,
-                        'publish_time': '2024-01-15T10:00:00Z'
-                    })
-    
-    except Exception as e:
-        print(f"⚠️ 提取文章时出错: {e}")
-    
-    return articles
+    """改进的文章提取函数（基于提取引擎）"""
+    source = NewsSources().get_source_by_name(source_name) or {
+        'name': source_name,
+        'url': base_url,
+        'selectors': TEST_SOURCE_SELECTORS.get(source_name, {})
+    }
+    return _extraction_engine.extract(html, source)
 
 if __name__ == "__main__":
     asyncio.run(improved_crawler_test())
@@ -78,6 +78,7 @@ async def quick_test():
         os.environ["FEISHU_BASE_URL"] = "https://open.feishu.cn/open-apis"
         
         from feishu.client import FeishuClient
+        from feishu.http_pool import close_http_client
         client = FeishuClient()
         
         try:
@@ -91,6 +92,7 @@ async def quick_test():
             print(f"❌ 飞书连接测试失败: {e}")
         finally:
             await client.close()
+            await close_http_client()
         
         print("\n🎉 快速测试完成！")
         print("\n📊 测试结果总结：")
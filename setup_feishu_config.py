@@ -100,6 +100,7 @@ def test_config():
     
     try:
         from feishu.client import FeishuClient
+        from feishu.http_pool import close_http_client
         import asyncio
         
         async def test():
@@ -115,6 +116,7 @@ def test_config():
                     return False
             finally:
                 await client.close()
+                await close_http_client()
         
         return asyncio.run(test())
         
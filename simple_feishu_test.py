@@ -14,6 +14,7 @@ os.environ["FEISHU_BASE_URL"] = "https://open.feishu.cn/open-apis"
 os.environ["FEISHU_TABLE_TOKEN"] = "F5I2bdNZxawzTqsRBVbcJWEMn9H"
 
 from feishu.client import FeishuClient
+from feishu.http_pool import close_http_client
 
 async def simple_test():
     """简单测试"""
@@ -49,6 +50,7 @@ async def simple_test():
     
     finally:
         await client.close()
+        await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(simple_test())
@@ -21,6 +21,7 @@ os.environ["FEISHU_BASE_URL"] = "https://open.feishu.cn/open-apis"
 os.environ["FEISHU_TABLE_TOKEN"] = "F5I2bdNZxawzTqsRBVbcJWEMn9H"
 
 from crawler.main import AINewsCrawler
+from feishu.http_pool import close_http_client
 from improved_crawler_test import extract_articles_improved
 
 async def test_complete_workflow():
@@ -129,6 +130,7 @@ async def test_complete_workflow():
     finally:
         # 清理资源
         await crawler.cleanup()
+        await close_http_client()
         print("\n🧹 资源清理完成")
 
 if __name__ == "__main__":
@@ -14,6 +14,7 @@ os.environ["FEISHU_BASE_URL"] = "https://open.feishu.cn/open-apis"
 os.environ["FEISHU_TABLE_TOKEN"] = "F5I2bdNZxawzTqsRBVbcJWEMn9H"
 
 from feishu.client import FeishuClient
+from feishu.http_pool import close_http_client
 
 async def test_feishu_config():
     """测试飞书配置"""
@@ -59,6 +60,7 @@ async def test_feishu_config():
         # 关闭客户端
         if 'client' in locals():
             await client.close()
+            await close_http_client()
     
     print("🏁 飞书配置测试完成")
 
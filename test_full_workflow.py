@@ -14,6 +14,7 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).parent))
 
 from crawler.main import AINewsCrawler
+from feishu.http_pool import close_http_client
 from crawler.content_processor import ContentProcessor
 
 async def test_full_workflow():
@@ -103,6 +104,7 @@ async def test_full_workflow():
     finally:
         # 清理资源
         await crawler.cleanup()
+        await close_http_client()
         print("\n🧹 资源清理完成")
 
 if __name__ == "__main__":
@@ -99,6 +99,7 @@ async def test_feishu_client():
             return True
         
         from feishu.client import FeishuClient
+        from feishu.http_pool import close_http_client
         
         client = FeishuClient()
         
@@ -113,6 +114,7 @@ async def test_feishu_client():
             return False
         
         await client.close()
+        await close_http_client()
         return True
         
     except Exception as e:
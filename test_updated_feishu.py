@@ -16,6 +16,7 @@ os.environ["FEISHU_BASE_URL"] = "https://open.feishu.cn/open-apis"
 os.environ["FEISHU_TABLE_TOKEN"] = "F5I2bdNZxawzTqsRBVbcJWEMn9H"
 
 from feishu.client import FeishuClient
+from feishu.http_pool import close_http_client
 
 async def test_updated_feishu():
     """测试更新后的飞书配置"""
@@ -94,6 +95,7 @@ async def test_updated_feishu():
         # 关闭客户端
         if 'client' in locals():
             await client.close()
+            await close_http_client()
     
     print("\n🏁 飞书配置测试完成")
 
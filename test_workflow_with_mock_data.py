@@ -22,6 +22,7 @@ os.environ["FEISHU_TABLE_TOKEN"] = "F5I2bdNZxawzTqsRBVbcJWEMn9H"
 
 from crawler.content_processor import ContentProcessor
 from feishu.client import FeishuClient
+from feishu.http_pool import close_http_client
 
 async def test_workflow_with_mock_data():
     """使用模拟数据测试完整工作流程"""
@@ -160,6 +161,7 @@ async def test_workflow_with_mock_data():
             print(f"❌ 飞书写入过程中出现错误: {e}")
         finally:
             await client.close()
+            await close_http_client()
         
     except Exception as e:
         print(f"❌ 测试过程中发生错误: {e}")
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 测试使用内存数据库，不读写项目目录下的ai_news.db
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已处理文章存储测试
+"""
+
+import time
+
+from crawler.article_store import ArticleStore
+
+
+def make_article(url, title):
+    return {'url': url, 'title': title, 'source': 'test'}
+
+
+def test_seen_articles_are_skipped():
+    """链接相同，或换了链接但标准化后标题相同的文章视为已处理"""
+    store = ArticleStore()
+    store.mark_seen([make_article('https://a.example/1', 'OpenAI发布GPT-5模型！')])
+
+    articles = [
+        make_article('https://a.example/1', '标题被修改'),
+        make_article('https://m.a.example/1?utm_source=feed', 'OpenAI 发布 GPT-5 模型'),
+        make_article('https://a.example/2', '英伟达发布新一代GPU')
+    ]
+    assert [article['url'] for article in store.filter_new(articles)] == ['https://a.example/2']
+
+
+def test_alternates_are_marked_seen_too():
+    """近似重复合并掉的其他来源版本一并记录，下次不会以其他来源再次出现"""
+    store = ArticleStore()
+    keeper = make_article('https://a.example/1', 'OpenAI发布GPT-5模型')
+    keeper['alternates'] = [{'source': 'b', 'title': 'GPT-5正式发布', 'url': 'https://b.example/1'}]
+    store.mark_seen([keeper])
+
+    assert store.count() == 2
+    assert store.is_seen(make_article('https://b.example/1', '另一个标题'))
+
+
+def test_prune_forgets_old_records():
+    store = ArticleStore()
+    store.mark_seen([make_article('https://a.example/1', 'OpenAI发布GPT-5模型')])
+    store.db.execute("UPDATE seen_articles SET first_seen = ?", (time.time() - 10 * 86400,))
+
+    assert store.prune(retention_days=7) == 1
+    assert not store.is_seen(make_article('https://a.example/1', 'OpenAI发布GPT-5模型'))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+早报内容准备测试
+"""
+
+import asyncio
+
+from config.settings import settings
+from crawler.content_processor import ContentProcessor
+
+
+def make_articles():
+    return [
+        {'title': 'OpenAI发布GPT-5模型，推理能力大幅提升', 'summary': '', 'source': '来源A',
+         'url': 'https://a.example/1'},
+        {'title': 'OpenAI发布GPT-5模型，推理能力大幅提升！', 'summary': '', 'source': '来源B',
+         'url': 'https://b.example/1'},
+        {'title': '英伟达公布新一代数据中心芯片', 'summary': '', 'source': '来源C',
+         'url': 'https://c.example/1'}
+    ]
+
+
+def make_processor(groups):
+    """路由为占位对象，分组概括只记录分组名"""
+    processor = ContentProcessor()
+    processor.router = object()
+
+    async def summarize_group(group, group_articles, use_cache, usage):
+        groups[group] = len(group_articles)
+        return "要点"
+
+    processor._summarize_group = summarize_group
+    return processor
+
+
+def test_map_phase_groups_by_topic_without_mutating_articles(monkeypatch):
+    """API入口直接传入的文章没有聚类信息，分组概括时在副本上聚类，按话题分组"""
+    monkeypatch.setattr(settings, 'AI_MAP_REDUCE_THRESHOLD', 2)
+    monkeypatch.setattr(settings, 'AI_MAP_GROUP_BY', 'cluster')
+    groups = {}
+    processor = make_processor(groups)
+    articles = make_articles()
+
+    _, map_groups = asyncio.run(
+        processor._prepare_articles_text(articles, use_cache=False, usage=processor._new_usage())
+    )
+
+    assert map_groups == 2
+    assert sorted(groups.values()) == [1, 2]
+    assert any(name.startswith('话题：') for name in groups)
+    assert all('cluster_id' not in article for article in articles)
+
+
+def test_no_clustering_when_articles_fit_the_prompt(monkeypatch):
+    monkeypatch.setattr(settings, 'AI_MAP_REDUCE_THRESHOLD', 40)
+    monkeypatch.setattr(settings, 'AI_MAP_GROUP_BY', 'cluster')
+    groups = {}
+    processor = make_processor(groups)
+    articles = make_articles()
+
+    text, map_groups = asyncio.run(
+        processor._prepare_articles_text(articles, use_cache=False, usage=processor._new_usage())
+    )
+
+    assert map_groups == 0 and not groups
+    assert '英伟达' in text
+    assert all('cluster_id' not in article for article in articles)
+
+
+def test_stream_reports_status_before_map_phase_finishes(monkeypatch):
+    """分组概括完成前先输出status事件，随后逐组输出map进度"""
+    monkeypatch.setattr(settings, 'AI_MAP_REDUCE_THRESHOLD', 2)
+    monkeypatch.setattr(settings, 'AI_MAP_GROUP_BY', 'cluster')
+    processor = make_processor({})
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def summarize_group(group, group_articles, use_cache, usage):
+            await gate.wait()
+            return "要点"
+
+        processor._summarize_group = summarize_group
+        stream = processor.stream_articles(make_articles(), use_cache=False)
+        events = [await asyncio.wait_for(stream.__anext__(), 1)]
+        gate.set()
+        async for event in stream:
+            events.append(event)
+            if event.get('stage') == 'generate':
+                break
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(run())
+
+    assert events[0] == {'channel': 'status', 'stage': 'prepare', 'total_articles': 3}
+    assert [(event['channel'], event['completed'], event['total']) for event in events[1:3]] == [
+        ('map', 1, 2), ('map', 2, 2)
+    ]
+    assert events[3]['map_groups'] == 2
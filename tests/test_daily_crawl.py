@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日爬取任务收尾步骤测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from crawler.article_store import ArticleStore
+from crawler.main import AINewsCrawler
+
+
+class FailingIndex:
+    def add(self, articles):
+        raise RuntimeError("向量索引写入失败")
+
+
+def make_crawler(saved):
+    """只保留run_daily_crawl用到的属性，爬取、生成早报和保存均为替身"""
+    articles = [{'title': 'OpenAI发布GPT-5模型', 'url': 'https://example.com/gpt5', 'source': 'test'}]
+    crawler = AINewsCrawler.__new__(AINewsCrawler)
+    crawler.settings = SimpleNamespace(STREAMING_PIPELINE=False, INCREMENTAL_CRAWL=True,
+                                       SEEN_ARTICLE_RETENTION_DAYS=30)
+    crawler.enricher = None
+    crawler.feishu_outbox = None
+    crawler.article_store = ArticleStore()
+    crawler.embedding_index = FailingIndex()
+    crawler.saved_reports = []
+
+    async def crawl_news_sources(only_new=False):
+        return articles
+
+    async def generate_daily_report(items):
+        return {'date': '2026-10-18', 'articles': items}
+
+    async def save_to_feishu(report):
+        crawler.saved_reports.append(report)
+        return saved
+
+    crawler.crawl_news_sources = crawl_news_sources
+    crawler.generate_daily_report = generate_daily_report
+    crawler.save_to_feishu = save_to_feishu
+    return crawler, articles
+
+
+def test_articles_marked_seen_only_after_report_saved():
+    crawler, articles = make_crawler(saved=False)
+    asyncio.run(crawler.run_daily_crawl())
+    assert len(crawler.saved_reports) == 1
+    assert not crawler.article_store.is_seen(articles[0])
+
+    crawler, articles = make_crawler(saved=True)
+    asyncio.run(crawler.run_daily_crawl())
+    assert crawler.article_store.is_seen(articles[0])
+
+
+def test_index_failure_does_not_drop_report():
+    """向量索引出错时早报仍然保存，文章仍记录为已处理"""
+    crawler, articles = make_crawler(saved=True)
+    asyncio.run(crawler.run_daily_crawl())
+    assert len(crawler.saved_reports) == 1
+    assert crawler.article_store.is_seen(articles[0])
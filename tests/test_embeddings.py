@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章向量索引测试
+"""
+
+from config.settings import settings
+from crawler.embeddings import EmbeddingIndex, HashingEmbedder
+
+
+def make_article(index, title):
+    return {'title': title, 'summary': title, 'url': f"https://example.com/{index}", 'source': 'test'}
+
+
+def test_two_instances_share_one_index(tmp_path, monkeypatch):
+    """API服务与定时任务各自打开索引时，互相能检索到对方新增的文章，行号不冲突"""
+    monkeypatch.setattr(settings, 'DATABASE_URL', f"sqlite:///{tmp_path / 'ai_news.db'}")
+    path = str(tmp_path / 'vectors.f32')
+    embedder = HashingEmbedder(64)
+    scheduler = EmbeddingIndex(path, embedder, initial_capacity=2)
+    api = EmbeddingIndex(path, embedder, initial_capacity=2)
+
+    try:
+        assert scheduler.add([make_article(1, 'OpenAI发布GPT-5模型')]) == 1
+        results = api.search('GPT-5模型')
+        assert [item['url'] for item in results] == ["https://example.com/1"]
+
+        # 超过初始容量，另一个实例需要重新映射扩大后的文件
+        assert api.add([make_article(2, '谷歌发布Gemini新版本'), make_article(3, 'Meta开源Llama模型')]) == 2
+        assert scheduler.add([make_article(1, 'OpenAI发布GPT-5模型'), make_article(4, '英伟达发布新一代GPU')]) == 1
+
+        for index in (scheduler, api):
+            assert index.get_stats()['articles'] == 4
+            assert index.search('GPT-5模型', top_k=1)[0]['url'] == "https://example.com/1"
+            assert index.search('英伟达GPU', top_k=1)[0]['url'] == "https://example.com/4"
+            assert index.search('Gemini新版本', top_k=1)[0]['url'] == "https://example.com/2"
+    finally:
+        scheduler.close()
+        api.close()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐篇文章AI增强结果解析测试
+"""
+
+import json
+
+import pytest
+
+from crawler.content_processor import ContentProcessor
+from crawler.enrichment import ArticleEnricher
+
+
+@pytest.fixture
+def enricher():
+    return ArticleEnricher(content_processor=None)
+
+
+def item(index, **overrides):
+    value = {"id": index, "summary": f"摘要{index}", "tags": ["大模型"], "importance": 5}
+    value.update(overrides)
+    return value
+
+
+def test_parse_valid_array_with_surrounding_text(enricher):
+    content = "```json\n" + json.dumps([item(1), item(2)], ensure_ascii=False) + "\n```"
+    items = enricher._parse(content, 2)
+    assert sorted(items) == [1, 2]
+    assert items[1].summary == "摘要1"
+
+
+def test_parse_skips_invalid_items(enricher):
+    content = json.dumps([
+        item(1),
+        item(2, summary=""),          # 空摘要
+        item(3, importance=11),       # 评分超出范围
+        item(9),                      # 编号超出本批文章数
+        "不是对象",
+        {"summary": "缺少编号", "importance": 3},
+        item(4, tags=["芯片", "融资"])
+    ], ensure_ascii=False)
+    items = enricher._parse(content, 4)
+    assert sorted(items) == [1, 4]
+    assert items[4].tags == ["芯片", "融资"]
+
+
+def test_parse_truncated_array_keeps_complete_items(enricher):
+    complete = json.dumps([item(1), item(2)], ensure_ascii=False)
+    # 输出在第三个条目的标签列表中间被截断
+    content = complete[:-1] + ', {"id": 3, "summary": "摘要3", "tags": ["大模'
+    items = enricher._parse(content, 3)
+    assert sorted(items) == [1, 2]
+
+
+@pytest.mark.parametrize("content", ["", "抱歉，无法处理", "[", "[{\"id\": 1, ", "{\"id\": 1}"])
+def test_parse_malformed_content_returns_nothing(enricher, content):
+    assert enricher._parse(content, 3) == {}
+
+
+def test_ai_importance_raises_article_score():
+    processor = ContentProcessor()
+    article = {'title': '某公司发布新模型', 'summary': '', 'source_weight': 1.0}
+    keyword_score = processor.score_article(article)
+
+    article['ai_importance'] = 8
+    assert processor.score_article(article) == keyword_score + 8
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书多维表格客户端批量写入测试
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from config.settings import settings
+from feishu.client import FEISHU_BATCH_LIMIT, FeishuClient
+
+
+def make_client(handle_batch):
+    """模拟飞书接口：令牌请求直接成功，批量写入交给handle_batch"""
+    chunks = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/app_access_token/internal"):
+            return httpx.Response(200, json={'code': 0, 'tenant_access_token': 't', 'expire': 7200})
+        records = json.loads(request.content)['records']
+        chunks.append(len(records))
+        return httpx.Response(200, json=handle_batch(len(chunks), records))
+
+    return FeishuClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler))), chunks
+
+
+def written(records):
+    return {'code': 0, 'data': {'records': [{'record_id': f"rec{i}"} for i in range(len(records))]}}
+
+
+def test_batch_create_splits_at_the_request_limit(monkeypatch):
+    monkeypatch.setattr(settings, 'FEISHU_BATCH_SIZE', 1000)
+    client, chunks = make_client(lambda _, records: written(records))
+
+    results = asyncio.run(client.batch_create_records([{'标题': str(i)} for i in range(FEISHU_BATCH_LIMIT + 1)]))
+
+    assert sorted(chunks) == [1, FEISHU_BATCH_LIMIT]
+    assert all(item['success'] for item in results)
+    assert [item['index'] for item in results] == list(range(FEISHU_BATCH_LIMIT + 1))
+    assert results[FEISHU_BATCH_LIMIT]['record_id'] == "rec0"
+
+
+def test_failed_or_empty_chunks_do_not_abort_the_batch(monkeypatch):
+    """一块返回错误、一块返回data为null时只标记这两块失败，其余分块照常写入"""
+    monkeypatch.setattr(settings, 'FEISHU_BATCH_SIZE', 2)
+    monkeypatch.setattr(settings, 'FEISHU_BATCH_CONCURRENCY', 1)
+
+    def handle_batch(number, records):
+        if number == 1:
+            return {'code': 1254001, 'msg': 'WrongRequestBody'}
+        if number == 2:
+            return {'code': 0, 'data': None}
+        return written(records)
+
+    client, chunks = make_client(handle_batch)
+    results = asyncio.run(client.batch_create_records([{'标题': str(i)} for i in range(6)]))
+
+    assert chunks == [2, 2, 2]
+    assert [item['success'] for item in results] == [False, False, False, False, True, True]
+    assert results[0]['error'] == 'WrongRequestBody'
+    assert results[2]['error'] == '响应缺少data'
+
+
+def make_paged_client(pages):
+    """_fetch_page替换为内存中的分页数据，page_token为页码，记录请求和被取消的页"""
+    client = FeishuClient(client=httpx.AsyncClient())
+    state = {'requested': [], 'cancelled': []}
+
+    async def fetch_page(page_size, page_token=None, field_names=None, filter=None):
+        index = int(page_token or 0)
+        state['requested'].append(index)
+        try:
+            await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            state['cancelled'].append(index)
+            raise
+        return pages[index], str(index + 1) if index + 1 < len(pages) else None
+
+    client._fetch_page = fetch_page
+    return client, state
+
+
+def test_iter_records_prefetches_next_page():
+    client, state = make_paged_client([[{'id': 1}, {'id': 2}], [{'id': 3}], [{'id': 4}]])
+
+    async def run():
+        seen = []
+        async for record in client.iter_records():
+            if record['id'] == 1:
+                # 处理第一页时第二页已经在请求中
+                await asyncio.sleep(0)
+                seen.append(list(state['requested']))
+            seen.append(record['id'])
+        return seen
+
+    assert asyncio.run(run()) == [[0, 1], 1, 2, 3, 4]
+    assert state['requested'] == [0, 1, 2]
+
+
+def test_iter_records_cancels_prefetch_on_early_exit():
+    client, state = make_paged_client([[{'id': 1}], [{'id': 2}], [{'id': 3}]])
+
+    async def main():
+        iterator = client.iter_records()
+        async for record in iterator:
+            if record['id'] == 2:
+                await asyncio.sleep(0)
+                break
+        await iterator.aclose()
+
+    asyncio.run(main())
+    assert state['requested'] == [0, 1, 2]
+    assert state['cancelled'] == [2]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书写入发件箱测试
+"""
+
+import asyncio
+
+from feishu.outbox import FeishuOutbox
+
+
+class SlowClient:
+    """记录调用次数、延迟返回成功的飞书客户端"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create_record(self, fields, client_token=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return True
+
+
+def test_concurrent_send_waits_for_inflight_send():
+    """同一记录正在发送时，再次发送等待其结果而不是返回失败，也不会重复写入"""
+    client = SlowClient()
+    outbox = FeishuOutbox(lambda: client)
+    outbox.enqueue({'标题': '早报'}, "2026-10-18:abc")
+
+    async def run():
+        return await asyncio.gather(
+            outbox.send("2026-10-18:abc"),
+            outbox.send("2026-10-18:abc"),
+            outbox.drain()
+        )
+
+    try:
+        first, second, drained = asyncio.run(run())
+        assert (first, second) == (True, True)
+        assert drained == 0
+        assert client.calls == 1
+        assert outbox.get_stats()['sent'] == 1
+    finally:
+        outbox.close()
+
+
+def test_drain_rereads_row_before_sending():
+    """补发前重新读取记录，快照之后已发送的记录不会再次发送"""
+    client = SlowClient()
+    outbox = FeishuOutbox(lambda: client)
+    outbox.enqueue({'标题': '早报'}, "2026-10-18:abc")
+
+    async def run():
+        sent = await outbox.send("2026-10-18:abc")
+        return sent, await outbox._send("2026-10-18:abc", due_only=True)
+
+    try:
+        assert asyncio.run(run()) == (True, False)
+        assert client.calls == 1
+    finally:
+        outbox.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书访问令牌管理测试
+"""
+
+import asyncio
+
+import httpx
+
+from feishu.token_manager import FeishuTokenManager
+
+
+def make_client(counter, expire):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter.append(request)
+        return httpx.Response(200, json={'code': 0, 'tenant_access_token': f"t{len(counter)}", 'expire': expire})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_token_is_refreshed_before_expiry_without_requests():
+    """没有请求时也会在过期前refresh_margin秒自动刷新"""
+    fetches = []
+
+    async def run():
+        async with make_client(fetches, expire=1) as client:
+            manager = FeishuTokenManager("app", "secret", "http://feishu.test", refresh_margin=0.8)
+            first = await manager.get_token(client)
+            await asyncio.sleep(0.5)
+            return first, manager.access_token
+
+    first, current = asyncio.run(run())
+    assert (first, current) == ("t1", "t2")
+    assert len(fetches) == 2
+
+
+def test_concurrent_requests_share_one_fetch():
+    fetches = []
+
+    async def run():
+        async with make_client(fetches, expire=7200) as client:
+            manager = FeishuTokenManager("app", "secret", "http://feishu.test")
+            return await asyncio.gather(*(manager.get_token(client) for _ in range(10)))
+
+    assert set(asyncio.run(run())) == {"t1"}
+    assert len(fetches) == 1
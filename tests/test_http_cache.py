@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表页条件请求与验证缓存测试
+"""
+
+import asyncio
+
+import httpx
+
+from crawler.fetcher import TIER_HTTP, FetchResult, TieredFetcher
+from crawler.http_cache import ValidatorCache
+from crawler.main import AINewsCrawler
+
+SOURCE = {'name': '测试源', 'url': 'https://news.example.com/ai'}
+ARTICLES = [{'title': 'OpenAI发布GPT-5模型', 'url': 'https://news.example.com/ai/1'}]
+
+
+def make_crawler(cache):
+    """只保留_articles_from_fetch用到的属性，记录提取次数"""
+    crawler = AINewsCrawler.__new__(AINewsCrawler)
+    crawler.validator_cache = cache
+    crawler.extractions = 0
+
+    async def extract_articles(html, source):
+        crawler.extractions += 1
+        return [dict(article) for article in ARTICLES]
+
+    crawler._extract_articles = extract_articles
+    return crawler
+
+
+def test_not_modified_reuses_cached_article_list():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>列表页</html>", headers={'ETag': '"v1"'})
+
+    cache = ValidatorCache()
+    fetcher = TieredFetcher(browser_pool=None, user_agent="test", validator_cache=cache)
+    fetcher.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    crawler = make_crawler(cache)
+
+    async def run():
+        first = await crawler._articles_from_fetch(await fetcher.fetch(SOURCE, TIER_HTTP), SOURCE)
+        fetched = await fetcher.fetch(SOURCE, TIER_HTTP)
+        second = await crawler._articles_from_fetch(fetched, SOURCE)
+        await fetcher.close()
+        return first, fetched, second
+
+    first, fetched, second = asyncio.run(run())
+
+    assert 'If-None-Match' not in requests[0].headers
+    assert requests[1].headers['If-None-Match'] == '"v1"'
+    assert fetched.not_modified
+    assert second == first == ARTICLES
+    assert crawler.extractions == 1
+
+
+def test_same_content_hash_skips_extraction():
+    """服务器不支持条件请求时，页面内容哈希相同也复用上次的文章列表"""
+    cache = ValidatorCache()
+    crawler = make_crawler(cache)
+    html = "<html>列表页</html>"
+
+    async def run():
+        first = await crawler._articles_from_fetch(FetchResult(TIER_HTTP, html=html), SOURCE)
+        second = await crawler._articles_from_fetch(FetchResult(TIER_HTTP, html=html), SOURCE)
+        changed = await crawler._articles_from_fetch(FetchResult(TIER_HTTP, html=html + "新"), SOURCE)
+        return first, second, changed
+
+    first, second, changed = asyncio.run(run())
+    assert first == second == changed == ARTICLES
+    assert crawler.extractions == 2
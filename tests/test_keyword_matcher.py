@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多关键词匹配测试
+"""
+
+import random
+
+from crawler.content_processor import IMPORTANCE_KEYWORDS, ContentProcessor
+from crawler.keyword_matcher import KeywordMatcher
+
+
+def substring_score(article):
+    """原先逐个关键词做子串查找的评分"""
+    title = article.get('title', '').lower()
+    summary = article.get('summary', '').lower()
+    weights = {'high': 3, 'medium': 2, 'low': 1}
+    score = sum(
+        weights[level]
+        for level, keywords in IMPORTANCE_KEYWORDS.items()
+        for keyword in keywords
+        if keyword in title or keyword in summary
+    )
+    return score * article.get('source_weight', 1.0)
+
+
+def substring_filter(articles, keywords):
+    """原先逐个关键词做子串查找的过滤"""
+    return [
+        article for article in articles
+        if any(
+            keyword.lower() in article.get(field, '').lower()
+            for keyword in keywords
+            for field in ('title', 'summary', 'content')
+        )
+    ]
+
+
+def random_articles(count, seed=7):
+    """由关键词片段、重叠片段和普通文字随机拼成的文章"""
+    rng = random.Random(seed)
+    pieces = [word for words in IMPORTANCE_KEYWORDS.values() for word in words]
+    pieces += ['突', '破', '首', '发', '布会', 'GPT', 'gpt-5', 'OpenAI', '模型', '，', ' ']
+    def text():
+        return "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+    return [
+        {'title': text(), 'summary': text(), 'content': text(), 'source_weight': rng.choice([0.5, 1.0, 1.5])}
+        for _ in range(count)
+    ]
+
+
+def test_scores_match_substring_implementation():
+    processor = ContentProcessor()
+    for article in random_articles(500):
+        assert processor.score_article(article) == substring_score(article)
+
+
+def test_filter_matches_substring_implementation():
+    processor = ContentProcessor()
+    articles = random_articles(500, seed=11)
+    for keywords in (['gpt'], ['OpenAI', '发布会'], ['突破', '首发', 'GPT-5'], ['不存在的词'], ['']):
+        assert processor.filter_articles_by_keywords(articles, keywords) == substring_filter(articles, keywords)
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher({'a': ['he', 'she', 'his', 'hers'], 'b': ['Hers']})
+    assert matcher.matched_keywords("USHERS") == ['he', 'hers', 'she']
+    assert matcher.group_counts("ushers") == {'a': 3, 'b': 1}
+    # 不会跨字段拼出关键词
+    assert matcher.find_all("us", "hers") == matcher.find_all("hers")
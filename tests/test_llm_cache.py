@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI响应缓存测试
+"""
+
+import asyncio
+import time
+
+from crawler.content_processor import ContentProcessor
+from crawler.llm_cache import LLMResponseCache
+from crawler.llm_router import ChatResult, LLMBackend, LLMRouter
+from crawler.rate_limiter import LLMRateLimiter
+
+
+class CountingBackend(LLMBackend):
+    def __init__(self):
+        super().__init__("fake", "fake-model")
+        self.calls = 0
+
+    async def complete(self, system_prompt, prompt, max_tokens, temperature):
+        self.calls += 1
+        return ChatResult(f"第{self.calls}次回答", 10, 5)
+
+    async def stream(self, system_prompt, prompt, max_tokens, temperature):
+        yield await self.complete(system_prompt, prompt, max_tokens, temperature)
+
+
+def test_key_depends_on_every_request_parameter():
+    base = ("m", "系统", "提示词", 0.7, 100)
+    key = LLMResponseCache.make_key(*base)
+    assert key == LLMResponseCache.make_key(*base)
+    for index, value in enumerate(("m2", "系统2", "提示词2", 0.3, 200)):
+        changed = list(base)
+        changed[index] = value
+        assert LLMResponseCache.make_key(*changed) != key
+
+
+def test_expired_entries_miss_and_least_recently_used_are_evicted():
+    cache = LLMResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", "m", "A")
+    cache.put("b", "m", "B")
+    assert cache.get("a") == "A"  # a最近被使用，b最久未使用
+    cache.put("c", "m", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+
+    cache.db.execute("UPDATE llm_cache SET created_at = ? WHERE cache_key = 'a'", (time.time() - 120,))
+    assert cache.get("a") is None
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_repeated_chat_is_served_from_cache():
+    backend = CountingBackend()
+    processor = ContentProcessor()
+    processor.router = LLMRouter([backend], hedge_enabled=False)
+    processor.llm_cache = LLMResponseCache()
+    processor.rate_limiter = LLMRateLimiter()
+
+    async def run():
+        usage = processor._new_usage()
+        first = await processor._chat("系统", "提示词", 100, 0.7, usage=usage)
+        second = await processor._chat("系统", "提示词", 100, 0.7, usage=usage)
+        fresh = await processor._chat("系统", "提示词", 100, 0.7, use_cache=False, usage=usage)
+        return first, second, fresh, usage
+
+    first, second, fresh, usage = asyncio.run(run())
+    assert first == second == "第1次回答"
+    assert fresh == "第2次回答"
+    assert backend.calls == 2
+    assert (usage['calls'], usage['cached_calls']) == (2, 1)
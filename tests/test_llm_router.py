@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多服务商路由测试
+"""
+
+import asyncio
+
+import pytest
+
+from crawler.llm_router import ChatResult, LLMBackend, LLMRouter
+from crawler.rate_limiter import LLMRateLimiter
+
+
+class SleepBackend(LLMBackend):
+    """固定延迟返回的服务"""
+
+    def __init__(self, name: str, delay: float):
+        super().__init__(name, f"{name}-model")
+        self.delay = delay
+
+    async def complete(self, system_prompt, prompt, max_tokens, temperature):
+        await asyncio.sleep(self.delay)
+        return ChatResult(self.name)
+
+    async def stream(self, system_prompt, prompt, max_tokens, temperature):
+        await asyncio.sleep(self.delay)
+        yield ChatResult(self.name)
+
+
+class ChunkedBackend(LLMBackend):
+    """首个片段很快，之后逐段缓慢输出；fail_after不为None时输出若干片段后断开"""
+
+    def __init__(self, name: str, chunks: int, interval: float, fail_after=None):
+        super().__init__(name, f"{name}-model")
+        self.chunks = chunks
+        self.interval = interval
+        self.fail_after = fail_after
+
+    async def complete(self, system_prompt, prompt, max_tokens, temperature):
+        return ChatResult(self.name)
+
+    async def stream(self, system_prompt, prompt, max_tokens, temperature):
+        for index in range(self.chunks):
+            if index:
+                await asyncio.sleep(self.interval)
+            if index == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield ChatResult(str(index))
+
+
+class CountingRateLimiter(LLMRateLimiter):
+    """记录同时占用的最大许可数"""
+
+    def __init__(self):
+        super().__init__()
+        self.peak = 0
+
+    def _release(self, permit, latency):
+        self.peak = max(self.peak, self.in_flight)
+        super()._release(permit, latency)
+
+
+def test_incomplete_backend_cannot_be_created():
+    class CompleteOnly(LLMBackend):
+        async def complete(self, system_prompt, prompt, max_tokens, temperature):
+            return ChatResult()
+
+    with pytest.raises(TypeError):
+        CompleteOnly("partial", "m")
+
+
+def test_cancelled_hedge_loser_is_not_a_latency_sample():
+    """对冲落败被取消的请求不进入延迟样本，经常落败的服务排到后面"""
+    slow = SleepBackend("slow", 0.5)
+    fast = SleepBackend("fast", 0.01)
+    # 慢服务的历史样本显示它很快
+    for _ in range(5):
+        slow.stats.record_success(0.001)
+    router = LLMRouter([slow, fast], hedge_after=0.05)
+
+    async def run():
+        return [await router.complete("s", "p", 10, 0.1) for _ in range(3)]
+
+    results = asyncio.run(run())
+
+    assert [result.backend for result in results][0] == "fast"
+    assert slow.stats.cancelled >= 1
+    assert len(slow.stats.samples) == 5
+    assert slow.stats.percentile(0.95) == 0.001
+    assert router.ordered_backends()[0] is fast
+
+
+def test_model_id_covers_all_backends():
+    router = LLMRouter([SleepBackend("a", 0), SleepBackend("b", 0)])
+    assert router.model_id == "a/a-model+b/b-model"
+    assert router.model_of("b") == "b-model"
+
+
+def test_stream_latency_sample_is_time_to_first_chunk():
+    backend = ChunkedBackend("long", chunks=4, interval=0.05)
+    router = LLMRouter([backend])
+
+    async def run():
+        return [chunk.content async for chunk in router.stream("s", "p", 10, 0.1)]
+
+    assert asyncio.run(run()) == ["0", "1", "2", "3"]
+    assert backend.stats.requests == 1
+    assert backend.stats.percentile(0.5) < 0.05
+
+
+def test_stream_dropped_mid_output_is_recorded_as_failure():
+    backend = ChunkedBackend("flaky", chunks=4, interval=0.01, fail_after=2)
+    router = LLMRouter([backend])
+
+    async def run():
+        received = []
+        with pytest.raises(ConnectionError):
+            async for chunk in router.stream("s", "p", 10, 0.1):
+                received.append(chunk.content)
+        return received
+
+    assert asyncio.run(run()) == ["0", "1"]
+    assert backend.stats.errors == 1
+    assert backend.stats.error_rate == 1.0
+
+
+def test_hedge_takes_its_own_rate_limit_permit():
+    limiter = CountingRateLimiter()
+    router = LLMRouter([SleepBackend("slow", 0.3), SleepBackend("fast", 0.01)],
+                       hedge_after=0.05, rate_limiter=limiter)
+
+    async def run():
+        async with limiter.slot(10):
+            return await router.complete("s", "p", 10, 0.1, estimated_tokens=10)
+
+    assert asyncio.run(run()).backend == "fast"
+    assert limiter.peak == 2
+    assert limiter.get_stats()['requests'] == 2
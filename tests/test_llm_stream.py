@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式AI调用token用量测试
+"""
+
+import asyncio
+import json
+
+import httpx
+import openai
+
+from crawler.content_processor import ContentProcessor
+from crawler.llm_router import LLMRouter, OpenAICompatibleBackend
+from crawler.rate_limiter import LLMRateLimiter
+
+PROMPT_TOKENS = 42
+COMPLETION_TOKENS = 7
+
+
+def _sse(payload) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _chunk(choices, usage=None):
+    payload = {"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "m", "choices": choices}
+    if usage is not None:
+        payload["usage"] = usage
+    return payload
+
+
+def make_client(requests):
+    """模拟OpenAI兼容接口：只有请求了include_usage时才在最后一个片段返回用量"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+
+        events = [
+            _chunk([{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+            for text in ("今日", "AI", "早报")
+        ]
+        if body.get("stream_options", {}).get("include_usage"):
+            events.append(_chunk([], {
+                "prompt_tokens": PROMPT_TOKENS,
+                "completion_tokens": COMPLETION_TOKENS,
+                "total_tokens": PROMPT_TOKENS + COMPLETION_TOKENS
+            }))
+        content = "".join(_sse(event) for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=content.encode('utf-8'),
+                              headers={"content-type": "text/event-stream"})
+
+    return openai.AsyncOpenAI(
+        api_key="test",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+class RecordingRateLimiter(LLMRateLimiter):
+    """记录每次释放许可时的实际token数"""
+
+    def __init__(self):
+        super().__init__()
+        self.recorded = []
+
+    def _release(self, permit, latency):
+        self.recorded.append(permit.actual_tokens)
+        super()._release(permit, latency)
+
+
+def test_stream_reports_token_usage():
+    requests = []
+    processor = ContentProcessor()
+    processor.router = LLMRouter([OpenAICompatibleBackend("fake", make_client(requests), "m")])
+    processor.llm_cache = None
+    processor.rate_limiter = RecordingRateLimiter()
+
+    async def run():
+        usage = processor._new_usage()
+        parts = [part async for part in processor._chat_stream("系统", "提示词", 100, 0.5, usage=usage)]
+        return parts, usage
+
+    parts, usage = asyncio.run(run())
+
+    assert "".join(parts) == "今日AI早报"
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert usage['prompt_tokens'] == PROMPT_TOKENS
+    assert usage['completion_tokens'] == COMPLETION_TOKENS
+    assert usage['calls'] == 1
+    assert processor.rate_limiter.recorded == [PROMPT_TOKENS + COMPLETION_TOKENS]
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨来源近似重复检测测试
+"""
+
+from crawler.near_dup import article_text, cluster_near_duplicates, jaccard, shingles
+
+
+def make_article(title, summary, source, weight=1.0):
+    return {'title': title, 'summary': summary, 'url': f"https://{source}.example.com/{title}",
+            'source': source, 'source_weight': weight}
+
+
+# 同一事件在两个来源的不同措辞
+SAME_STORY = (
+    make_article('Meta开源Llama 3大模型',
+                 'Meta今日开源Llama 3系列模型，包括8B和70B两个版本，性能超越同级别开源模型', 'a'),
+    make_article('Meta发布开源大模型Llama 3，提供8B和70B版本',
+                 'Meta正式开源Llama 3，8B与70B版本在多项基准测试中领先同规模开源模型', 'b')
+)
+
+# 同一公司的另一条新闻
+OTHER_STORY = make_article('Meta发布Ray-Ban智能眼镜新功能',
+                           'Meta为Ray-Ban智能眼镜推送AI助手更新，支持实时翻译和视觉问答', 'c')
+
+
+def test_threshold_separates_reworded_duplicates_from_distinct_stories():
+    same = jaccard(shingles(article_text(SAME_STORY[0])), shingles(article_text(SAME_STORY[1])))
+    other = jaccard(shingles(article_text(SAME_STORY[0])), shingles(article_text(OTHER_STORY)))
+    assert other < 0.2 <= same
+
+
+def test_cluster_near_duplicates_merges_only_the_same_story():
+    kept = cluster_near_duplicates([SAME_STORY[0], OTHER_STORY, SAME_STORY[1]])
+    assert [article['source'] for article in kept] == ['a', 'c']
+    assert [alternate['source'] for alternate in kept[0]['alternates']] == ['b']
+    assert 'alternates' not in kept[1]
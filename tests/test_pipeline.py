@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式流水线去重阶段测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from crawler.near_dup import cluster_near_duplicates
+from crawler.pipeline import CrawlPipeline
+
+
+class FakeArticleStore:
+    """只把指定链接视为已处理"""
+
+    def __init__(self, seen_urls):
+        self.seen_urls = set(seen_urls)
+
+    def is_seen(self, article):
+        return article.get('url') in self.seen_urls
+
+
+def make_pipeline(seen_urls=()):
+    crawler = SimpleNamespace(
+        settings=SimpleNamespace(NEAR_DUP_ENABLED=True, NEAR_DUP_THRESHOLD=0.2, CRAWL_CONCURRENCY=2),
+        article_store=FakeArticleStore(seen_urls)
+    )
+    return CrawlPipeline(crawler, only_new=True)
+
+
+def make_article(url, source, weight):
+    return {
+        'title': 'OpenAI发布GPT-5模型，推理能力大幅提升',
+        'summary': 'OpenAI今天正式发布GPT-5模型，在数学和代码推理上大幅领先上一代',
+        'url': url,
+        'source': source,
+        'source_weight': weight
+    }
+
+
+def test_higher_weight_duplicate_does_not_replace_emitted_keeper():
+    """已交给下游的文章不会被之后到达的高权重重复文章（且已处理过的链接）替换"""
+    pipeline = make_pipeline(seen_urls={'https://b.example/gpt5'})
+
+    keeper = make_article('https://a.example/gpt5', '来源A', 1.0)
+    emitted = asyncio.run(pipeline._dedup(keeper))
+    assert emitted == [keeper]
+
+    # 下游阶段已经写入的字段
+    keeper['importance_score'] = 3
+    keeper['ai_summary'] = 'A的AI摘要'
+
+    duplicate = make_article('https://b.example/gpt5', '来源B', 2.0)
+    assert asyncio.run(pipeline._dedup(duplicate)) == []
+
+    assert keeper['url'] == 'https://a.example/gpt5'
+    assert keeper['source'] == '来源A'
+    assert keeper['importance_score'] == 3
+    assert keeper['ai_summary'] == 'A的AI摘要'
+    assert [alt['url'] for alt in keeper['alternates']] == ['https://b.example/gpt5']
+
+
+def test_duplicate_of_seen_story_is_not_reported():
+    """已报道过的事件，之后到达的高权重重复文章也不会重新进入早报"""
+    pipeline = make_pipeline(seen_urls={'https://a.example/gpt5'})
+
+    assert asyncio.run(pipeline._dedup(make_article('https://a.example/gpt5', '来源A', 1.0))) == []
+    assert asyncio.run(pipeline._dedup(make_article('https://b.example/gpt5', '来源B', 2.0))) == []
+
+
+def test_batch_clustering_keeps_highest_weight_without_mutating_inputs():
+    """批量聚合保留权重最高的文章，被代替的文章内容不变"""
+    low = make_article('https://a.example/gpt5', '来源A', 1.0)
+    high = make_article('https://b.example/gpt5', '来源B', 2.0)
+
+    kept = cluster_near_duplicates([low, high])
+
+    assert kept == [high]
+    assert low['url'] == 'https://a.example/gpt5' and 'alternates' not in low
+    assert [alt['url'] for alt in high['alternates']] == ['https://a.example/gpt5']
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI接口限流器测试
+"""
+
+import asyncio
+
+from crawler.rate_limiter import LLMRateLimiter, TokenBucket
+
+
+def test_stream_latency_is_measured_at_first_token():
+    """流式调用生成时间长但首个片段很快时不视为过载"""
+    limiter = LLMRateLimiter(max_concurrency=4, latency_target=0.05)
+
+    async def call(stream: bool):
+        async with limiter.slot(10) as permit:
+            if stream:
+                permit.mark_first_token()
+            await asyncio.sleep(0.1)
+
+    asyncio.run(call(stream=True))
+    assert limiter.get_stats()['slow'] == 0
+    assert limiter.concurrency_limit == 4
+
+    asyncio.run(call(stream=False))
+    assert limiter.get_stats()['slow'] == 1
+    assert limiter.concurrency_limit == 3
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    assert bucket.wait_time(10) == 0.0
+    bucket.consume(10)
+    assert 1.9 < bucket.wait_time(10) <= 2.0
+    # 单次请求超过容量时按装满计算
+    assert bucket.wait_time(100) <= 2.0
+    # 透支部分由后续补充抵扣
+    bucket.consume(5)
+    assert bucket.wait_time(1) > 1.0
+
+
+def test_aimd_halves_on_429_and_grows_additively():
+    limiter = LLMRateLimiter(requests_per_minute=6000, max_concurrency=8, latency_target=10.0)
+
+    async def call(rate_limited: bool = False):
+        async with limiter.slot(10) as permit:
+            if rate_limited:
+                permit.mark_rate_limited(retry_after=0.01)
+
+    asyncio.run(call(rate_limited=True))
+    assert limiter.concurrency_limit == 4
+    assert limiter.get_stats()['rate_limited'] == 1
+
+    # 加性增：每轮成功的调用数等于当前并发数时并发数加1
+    for _ in range(4):
+        asyncio.run(call())
+    assert 4.9 < limiter.concurrency_limit < 5.1
+
+    for _ in range(100):
+        asyncio.run(call())
+    assert limiter.concurrency_limit == 8
+
+
+def test_calls_beyond_concurrency_limit_queue_in_order():
+    limiter = LLMRateLimiter(max_concurrency=1, latency_target=10.0)
+    order = []
+
+    async def call(name: str):
+        async with limiter.slot(10):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(call(name) for name in "abcd"))
+
+    asyncio.run(run())
+    assert order == list("abcd")
+    assert limiter.get_stats()['requests'] == 4
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词token预算测试
+"""
+
+from config.settings import settings
+from crawler.content_processor import ContentProcessor
+from crawler.token_budget import estimate_tokens, truncate_to_tokens
+
+
+def test_truncate_stays_within_budget_and_prefers_sentence_end():
+    text = "第一句话说明事件背景。第二句话介绍主要影响，后面还有很多补充内容需要截断"
+    truncated = truncate_to_tokens(text, 15)
+    assert estimate_tokens(truncated) <= 15
+    assert truncated == "第一句话说明事件背景。"
+    assert truncate_to_tokens(text, 1000) == text
+
+
+def test_packing_stays_under_budget_and_drops_from_the_tail(monkeypatch):
+    """按重要性放入文章，总量不超过预算，放不下的是最不重要的文章"""
+    monkeypatch.setattr(settings, 'AI_PROMPT_TOKEN_BUDGET', 300)
+    monkeypatch.setattr(settings, 'AI_PROMPT_MAX_ARTICLES', 20)
+    processor = ContentProcessor()
+    articles = [
+        {'title': f"新闻{index}", 'summary': "这是一段用来占用提示词空间的摘要内容。" * 5,
+         'source': 'test', 'url': f"https://example.com/{index}", 'ai_importance': index}
+        for index in range(1, 11)
+    ]
+
+    text = processor._format_articles_for_ai(articles)
+
+    assert estimate_tokens(text) <= 300
+    included = [index for index in range(1, 11) if f"标题: 新闻{index}\n" in text]
+    assert included and included == list(range(11 - len(included), 11))
+    assert len(included) < 10
+    # 相同输入得到相同文本，便于命中响应缓存
+    assert processor._format_articles_for_ai(list(reversed(articles))) == text